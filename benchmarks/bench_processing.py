@@ -0,0 +1,67 @@
+"""Size/depth benchmark for `tgedr_pycommons.data.processing.process_text_array`.
+
+Compares the single-pass engine against the previous implementation, which rebuilt a
+NumPy array of every sub-list at each level of nesting.
+
+Usage:
+    uv run python benchmarks/bench_processing.py
+"""
+
+import timeit
+from typing import Any, Callable  # noqa: UP035
+
+import numpy as np
+
+from tgedr_pycommons.data.processing import process_text_array
+
+
+def legacy_process_text_array(x: list, f: Callable[[str], Any]) -> list:
+    """Reference implementation preceding the single-pass engine."""
+    np.array(x)
+
+    def multidim_process(x: list) -> list:
+        if 1 == np.array(x).ndim:
+            return [f(t) for t in x]
+        return [multidim_process(s) for s in x]
+
+    return multidim_process(x)
+
+
+def make_array(shape: tuple[int, ...]) -> list:
+    """Build a nested list of tokens with the given shape."""
+    if len(shape) == 1:
+        return [f"token{i % 97}" for i in range(shape[0])]
+    return [make_array(shape[1:]) for _ in range(shape[0])]
+
+
+def bench(shape: tuple[int, ...], repeat: int = 3) -> tuple[float, float]:
+    """Return the best timings (legacy, current) in seconds for an array of the given shape."""
+    x = make_array(shape)
+    f = str.upper
+    assert legacy_process_text_array(x, f) == process_text_array(x, f)
+    legacy = min(timeit.repeat(lambda: legacy_process_text_array(x, f), number=1, repeat=repeat))
+    current = min(timeit.repeat(lambda: process_text_array(x, f), number=1, repeat=repeat))
+    return legacy, current
+
+
+def main() -> None:
+    """Run the benchmark over a grid of sizes and depths and print a table."""
+    shapes = [
+        (10_000,),
+        (100_000,),
+        (100, 100),
+        (1_000, 100),
+        (10, 100, 100),
+        (100, 100, 10),
+        (1_000, 10, 10),
+        (10, 10, 10, 100),
+    ]
+    print(f"{'shape':>20} {'elements':>10} {'legacy (s)':>12} {'current (s)':>12} {'speedup':>8}")  # noqa: T201
+    for shape in shapes:
+        legacy, current = bench(shape)
+        elements = int(np.prod(shape))
+        print(f"{shape!s:>20} {elements:>10} {legacy:>12.4f} {current:>12.4f} {legacy / current:>7.1f}x")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -3,27 +3,68 @@
 This module provides utilities to:
 - Parse command line arguments for callable execution
 - Resolve callables (functions or class methods) from module paths
-- Execute the resolved callable with provided parameters
+- Execute the resolved callable with provided parameters, or once per line of a JSONL parameters file
+- Run as a warm worker serving invocations, or forward an invocation to one (see `worker`)
+- Run coroutines on a single managed event loop (optionally uvloop), and stream the items of
+  generators and async generators to stdout as they are produced
+- List the callables of packages from a manifest built without importing them (`--list`), and
+  check a target against it before importing anything (`--manifest`), see `manifest`
+- Time the phases of an execution (`--timings`), or profile it (`--profile cpu|mem`), see `profiling`
+- Report the time spent importing a target module, module by module (`--import-profile`)
+
+Startup budget: the entrypoint is meant for short-lived jobs, where interpreter startup and
+imports dominate. Importing this module must stay within 5 ms (about 1.5 ms today, from
+bytecode) on top of a bare interpreter, and load nothing beyond `importlib`. Everything else
+(`argparse`, `json`, `logging`, `concurrent.futures`, the worker and its sockets) is imported
+on first use, and the root logger is only configured when `entrypoint` runs, never as a side
+effect of the import. Check a change against the budget with:
+
+    python -X importtime -c "import tgedr_pycommons.cicd.entrypoint"
 """
 
-import argparse
-from collections.abc import Sequence
-from argparse import Namespace
-import json
-import logging
+from __future__ import annotations
+
+import sys
+import time
 from importlib import import_module
-from typing import Any
 
 
-root_logger = logging.getLogger()
-root_logger.setLevel(logging.INFO)
-stream_handler = logging.StreamHandler()
-stream_handler.setLevel(logging.INFO)
-formatter = logging.Formatter("[%(asctime)s] [%(name)s] [%(levelname)s] => %(message)s")
-stream_handler.setFormatter(formatter)
-root_logger.addHandler(stream_handler)
+# `typing` (and the `re` it pulls in) costs more than the budget, only type checkers need it
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import asyncio  # noqa: TC003
+    from argparse import Namespace  # noqa: TC003
+    from collections.abc import AsyncIterator, Callable, Iterator, Sequence  # noqa: TC003
+    from typing import IO, Any
+
+    from tgedr_pycommons.cicd.profiling import Timings  # noqa: TC001
+    from tgedr_pycommons.cicd.resolution import ResolutionCache  # noqa: TC001
+
+
+_LOG_HANDLER_NAME = __name__
+_LOG_FORMAT = "[%(asctime)s] [%(name)s] [%(levelname)s] => %(message)s"
+
+# one event loop runner per loop implementation (uvloop or not), kept for the life of the process
+_RUNNERS: dict[bool, asyncio.Runner] = {}
+
+
+def _configure_logging() -> None:
+    """Log INFO records to stderr through the root logger, once."""
+    import logging
+
+    root_logger = logging.getLogger()
+    if any(handler.get_name() == _LOG_HANDLER_NAME for handler in root_logger.handlers):
+        return
+    root_logger.setLevel(logging.INFO)
+    stream_handler = logging.StreamHandler()
+    stream_handler.set_name(_LOG_HANDLER_NAME)
+    stream_handler.setLevel(logging.INFO)
+    stream_handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+    root_logger.addHandler(stream_handler)
+
 
-logger = logging.getLogger(__name__)
+class EntrypointException(Exception):
+    """Exception raised by the entrypoint."""
 
 
 def parse_arguments(explicit_args: Sequence[str] | None = None) -> Namespace:
@@ -35,6 +76,8 @@ def parse_arguments(explicit_args: Sequence[str] | None = None) -> Namespace:
       Namespace: The parsed command line arguments
 
     """
+    import argparse
+
     parser = argparse.ArgumentParser(description="Get the parameters for the python callable to execute.")
     parser.add_argument("--module", type=str, help="The module where to find the callable")
     parser.add_argument("--callable", type=str, help="The callable (function or class function)")
@@ -45,56 +88,550 @@ def parse_arguments(explicit_args: Sequence[str] | None = None) -> Namespace:
         "--classparams",
         required=False,
         type=str,
-        help="If the callable is a class function, specify the class constructor parameters (as a JSON string)",
+        help="If the callable is a class function, specify the class constructor parameters"
+        " (as a JSON string, or @file to read them from a file, see `serialization`)",
+    )
+    params_group = parser.add_mutually_exclusive_group()
+    params_group.add_argument(
+        "--params",
+        type=str,
+        help="The parameters for the callable (as a JSON string, or @file to read them from a file, @- from stdin)",
+    )
+    params_group.add_argument(
+        "--params-file",
+        required=False,
+        type=str,
+        help="A JSONL file (or - for stdin) with the parameters of one call per line, results are printed as JSONL, "
+        "or written as a list to --output",
+    )
+    parser.add_argument(
+        "--params-format",
+        required=False,
+        type=str,
+        help="The format of the --params @file (json, pickle, msgpack, npz, ...), by default from its extension",
+    )
+    parser.add_argument(
+        "--output",
+        required=False,
+        type=str,
+        help="Write the result to this file (or - for stdout) instead of printing it",
+    )
+    parser.add_argument(
+        "--output-format",
+        required=False,
+        type=str,
+        help="The format of the --output file (json, pickle, msgpack, npy, npz, ...), by default from its extension",
+    )
+    parser.add_argument(
+        "--parallel",
+        required=False,
+        type=int,
+        help="With --params-file, the number of calls to run concurrently",
+    )
+    parser.add_argument(
+        "--parallel-backend",
+        required=False,
+        choices=["thread", "process"],
+        default="thread",
+        help="With --parallel, run the calls on a pool of threads (the default) or processes",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as a warm worker executing the JSON lines invocations read from stdin, or from --socket",
+    )
+    parser.add_argument(
+        "--socket",
+        required=False,
+        type=str,
+        help="The Unix socket a worker serves on with --serve, otherwise forward the invocation to that worker",
+    )
+    parser.add_argument(
+        "--uvloop",
+        action="store_true",
+        help="Run coroutines and async generators on a uvloop event loop, if uvloop is installed",
+    )
+    parser.add_argument(
+        "--manifest",
+        required=False,
+        type=str,
+        help="A manifest (see --build-manifest) to check the callable against before importing its module,"
+        " or to --list",
+    )
+    parser.add_argument(
+        "--build-manifest",
+        required=False,
+        nargs="+",
+        metavar="PACKAGE",
+        help="Instead of executing the callable, build the manifest of these packages, into --manifest or to stdout",
+    )
+    parser.add_argument(
+        "--list",
+        action="store_true",
+        help="Instead of executing the callable, list the callables in --manifest, or else in --module",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print, on stderr, a JSON breakdown of the time spent parsing, importing, constructing, calling and"
+        " serializing",
+    )
+    parser.add_argument(
+        "--profile",
+        required=False,
+        choices=["cpu", "mem"],
+        help="Profile the execution with cProfile (cpu) or tracemalloc (mem), printing the report on stderr",
+    )
+    parser.add_argument(
+        "--profile-top",
+        required=False,
+        type=int,
+        default=25,
+        help="With --profile, the number of functions, or allocating lines, in the report",
+    )
+    parser.add_argument(
+        "--import-profile",
+        action="store_true",
+        help="Instead of executing the callable, print the time spent importing --module, module by module",
     )
-    parser.add_argument("--params", type=str, help="The parameters for the callable (as a JSON string)")
     args = parser.parse_args(explicit_args)
+    if args.socket and args.params_file:
+        parser.error("--params-file can not be combined with --socket, forward one invocation per --params")
     return args
 
 
-def resolve_callable(arguments: Namespace) -> Any:
+def resolve_callable(arguments: Namespace, cache: ResolutionCache | None = None, timings: Timings | None = None) -> Any:
     """Resolve the callable from the parsed arguments.
 
     Args:
       arguments (Namespace): The parsed command line arguments
+      cache (ResolutionCache): The cache of resolved callables to use, if any
+      timings (Timings): Where to record the time spent importing and constructing, if anywhere; with a cache
+        both are recorded as "resolve"
     Returns:
       Any: The resolved callable (function or class method)
 
     """
+    if timings is None:
+        from tgedr_pycommons.cicd.profiling import Timings
+
+        timings = Timings()
+
+    if cache is not None:
+        with timings.phase("resolve"):
+            return cache.resolve(arguments.module, arguments.callable, arguments.classname, arguments.classparams)
+
     result = None
 
+    with timings.phase("import"):
+        module = import_module(arguments.module)
     if arguments.classname:
-        _class = getattr(import_module(arguments.module), arguments.classname)
+        _class = getattr(module, arguments.classname)
         class_instance = None
-        if arguments.classparams:
-            class_params: dict = json.loads(arguments.classparams)
-            class_instance = _class(**class_params)
-        else:
-            class_instance = _class()
+        with timings.phase("construct"):
+            if arguments.classparams:
+                class_params: dict = _load_params(arguments.classparams)
+                class_instance = _class(**class_params)
+            else:
+                class_instance = _class()
         result = getattr(class_instance, arguments.callable)
     else:
-        result = getattr(import_module(arguments.module), arguments.callable)
+        result = getattr(module, arguments.callable)
+
+    return result
+
+
+def _load_params(value: str | None, fmt: str | None = None) -> dict:
+    """Load the parameters given as a JSON string, or as an @file reference."""
+    if value and value.startswith("@"):
+        from tgedr_pycommons.cicd.serialization import load_params
+
+        return load_params(value, fmt)
+
+    import json
+
+    return json.loads(value) if value else {}
+
+
+def _runner(use_uvloop: bool = False) -> asyncio.Runner:  # noqa: FBT001, FBT002
+    """Get the event loop runner shared by all the coroutines executed in this process."""
+    runner = _RUNNERS.get(use_uvloop)
+    if runner is None:
+        import asyncio
+        import atexit
+
+        loop_factory = None
+        if use_uvloop:
+            try:
+                import uvloop
+
+                loop_factory = uvloop.new_event_loop
+            except ImportError:
+                import logging
+
+                logging.getLogger(__name__).warning("[_runner] uvloop is not installed, using the asyncio event loop")
+        runner = _RUNNERS[use_uvloop] = asyncio.Runner(loop_factory=loop_factory)
+        atexit.register(runner.close)
+    return runner
+
+
+def _print_item(item: Any) -> None:
+    """Print a streamed item to stdout as soon as it is produced."""
+    print(item, flush=True)  # noqa: T201
+
+
+def _collect(items: Iterator, emit: Callable[[Any], None] | None) -> list:
+    result = []
+    for item in items:
+        if emit is not None:
+            emit(item)
+        result.append(item)
+    return result
+
+
+async def _collect_async(items: AsyncIterator, emit: Callable[[Any], None] | None) -> list:
+    result = []
+    async for item in items:
+        if emit is not None:
+            emit(item)
+        result.append(item)
+    return result
+
+
+def complete(result: Any, *, use_uvloop: bool = False, emit: Callable[[Any], None] | None = None) -> tuple[Any, bool]:
+    """Complete the result of a callable: await a coroutine, exhaust a generator or an async generator.
+
+    Coroutines and async generators all run on the same, managed, event loop.
+
+    Args:
+      result: The value returned by the callable
+      use_uvloop: Whether the event loop is a uvloop one, when uvloop is installed
+      emit: Called with each item of a generator or an async generator, as soon as it is produced
+    Returns:
+      tuple[Any, bool]: The completed result, a list for generators, and whether it was a generator
+
+    """
+    import types
+
+    if isinstance(result, types.CoroutineType):
+        return _runner(use_uvloop).run(result), False
+    if isinstance(result, types.AsyncGeneratorType):
+        return _runner(use_uvloop).run(_collect_async(result, emit)), True
+    if isinstance(result, types.GeneratorType):
+        return _collect(result, emit), True
+    return result, False
+
+
+def _call_with_params(call: Any, line: str) -> Any:
+    """Execute the callable with the parameters of a JSONL line, exhausting a generator it returns."""
+    import json
+    import types
+
+    result = call(**json.loads(line))
+    return _collect(result, None) if isinstance(result, types.GeneratorType) else result
+
+
+def _complete_with_params(call: Any, line: str, use_uvloop: bool) -> Any:  # noqa: FBT001
+    """Execute the callable with the parameters of a JSONL line, completing its result in this process."""
+    return complete(_call_with_params(call, line), use_uvloop=use_uvloop)[0]
+
+
+async def _complete_all(values: list) -> list:
+    """Await coroutines, and exhaust async generators, concurrently on the running event loop."""
+    import asyncio
+    import types
+
+    async def complete_one(value: Any) -> Any:
+        if isinstance(value, types.CoroutineType):
+            return await value
+        if isinstance(value, types.AsyncGeneratorType):
+            return await _collect_async(value, None)
+        return value
+
+    return list(await asyncio.gather(*map(complete_one, values)))
+
+
+def _reset_runners() -> None:
+    """Drop the event loop runners inherited by a forked pool process, it creates its own."""
+    _RUNNERS.clear()
+
 
+def run_params_file(
+    call: Any,
+    params_file: IO[str],
+    parallel: int | None = None,
+    backend: str = "thread",
+    *,
+    use_uvloop: bool = False,
+    echo: bool = True,
+) -> list:
+    """Execute the callable once per line of a JSONL parameters file, writing the results to stdout as JSONL.
+
+    Results are completed as by `complete`. With the process backend each pool process completes
+    its own results. With the thread backend generators are exhausted in the pool threads, and
+    coroutines and async generators are run concurrently on the managed event loop, once the
+    calls returned them.
+
+    Args:
+      call: The resolved callable
+      params_file: The JSONL stream, each line a JSON object with the parameters of one call
+      parallel: The number of calls to run concurrently, one at a time if None
+      backend: The kind of pool running the concurrent calls, "thread" or "process"
+      use_uvloop: Whether coroutines and async generators run on a uvloop event loop
+      echo: Whether the results are written to stdout, as soon as they are available
+    Returns:
+      list: The results, in the order of the lines
+
+    """
+    import json
+    import types
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    from itertools import repeat
+
+    from tgedr_pycommons.cicd.serialization import json_default
+
+    lines = (line for line in params_file if line.strip())
+    result = []
+
+    def emit(item: Any) -> None:
+        if echo:
+            print(json.dumps(item, default=json_default), flush=True)  # noqa: T201
+        result.append(item)
+
+    if parallel is None:
+        for item in map(_complete_with_params, repeat(call), lines, repeat(use_uvloop)):
+            emit(item)
+    elif backend == "process":
+        with ProcessPoolExecutor(max_workers=parallel, initializer=_reset_runners) as executor:
+            for item in executor.map(_complete_with_params, repeat(call), lines, repeat(use_uvloop)):
+                emit(item)
+    else:
+        # results following a coroutine wait for it, to keep the order of the lines
+        pending = []
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            for value in executor.map(_call_with_params, repeat(call), lines):
+                if pending or isinstance(value, types.CoroutineType | types.AsyncGeneratorType):
+                    pending.append(value)
+                else:
+                    emit(value)
+        if pending:
+            for item in _runner(use_uvloop).run(_complete_all(pending)):
+                emit(item)
     return result
 
 
-def entrypoint(explicit_args: Sequence[str] | None = None) -> Any:
+def forward(arguments: Namespace) -> Any:
+    """Forward the invocation to the warm worker serving on the `--socket` Unix socket.
+
+    The parameters are loaded here, `@file` references being read by this process and not by the
+    worker, and sent as JSON: parameters JSON can not represent (arrays, sets, ...) are rejected.
+
+    Args:
+      arguments (Namespace): The parsed command line arguments
+    Returns:
+      Any: The result of the callable executed by the worker
+    Raises:
+      EntrypointException: If the parameters can not be sent as JSON, or the invocation failed in the worker
+
+    """
+    import json
+
+    from tgedr_pycommons.cicd import worker
+
+    message = {
+        "module": arguments.module,
+        "callable": arguments.callable,
+        "classname": arguments.classname,
+        "classparams": _load_params(arguments.classparams),
+        "params": _load_params(arguments.params, arguments.params_format),
+    }
+    try:
+        json.dumps(message)
+    except (TypeError, ValueError) as e:
+        msg = f"the parameters can not be sent to the worker, only JSON values can: {e}"
+        raise EntrypointException(msg) from e
+    response = worker.send(arguments.socket, message)
+    if "error" in response:
+        msg = f"{response['error']['type']}: {response['error']['message']}"
+        raise EntrypointException(msg)
+    return response["result"]
+
+
+def entrypoint(explicit_args: Sequence[str] | None = None, cache: ResolutionCache | None = None) -> Any:
     """Execute a python callable based on command line arguments.
 
     Args:
       explicit_args: A sequence of command line arguments
+      cache: A cache of parsed arguments and resolved callables, shared by repeated in-process calls
     Returns:
       Any: The result of the executed callable
 
     """
-    args: Namespace = parse_arguments(explicit_args)
-    call = resolve_callable(args)
-    if args.params:
-        params: dict = json.loads(args.params)
-        result: Any = call(**params)
+    started = time.perf_counter()
+    if cache is None:
+        args: Namespace = parse_arguments(explicit_args)
+    else:
+        args: Namespace = cache.parse(sys.argv[1:] if explicit_args is None else explicit_args)
+    parsed = time.perf_counter()
+    _configure_logging()
+    if args.import_profile:
+        return import_profile(args.module)
+    if args.build_manifest or args.list:
+        return _manifest_command(args)
+
+    if args.serve:
+        from tgedr_pycommons.cicd import worker
+
+        if args.socket:
+            worker.serve_unix_socket(args.socket, use_uvloop=args.uvloop)
+        else:
+            worker.Worker(use_uvloop=args.uvloop).serve(sys.stdin, sys.stdout)
+        return None
+
+    from tgedr_pycommons.cicd.profiling import Profiler, Timings
+
+    timings = Timings()
+    timings.add("parse", parsed - started)
+    try:
+        with Profiler(args.profile, args.profile_top):
+            return _execute(args, cache, timings)
+    finally:
+        if args.timings:
+            timings.report()
+
+
+def _execute(args: Namespace, cache: ResolutionCache | None, timings: Timings) -> Any:
+    """Execute the callable, or forward it to a worker, and output its result."""
+    if args.manifest:
+        with timings.phase("check"):
+            _check_manifest(args)
+
+    if args.socket:
+        with timings.phase("call"):
+            result: Any = forward(args)
+    elif args.params_file:
+        from contextlib import nullcontext
+
+        call = resolve_callable(args, cache, timings)
+        stream = nullcontext(sys.stdin) if args.params_file == "-" else open(args.params_file)  # noqa: PTH123, SIM115
+        with timings.phase("call"), stream as params_file:
+            result = run_params_file(
+                call, params_file, args.parallel, args.parallel_backend, use_uvloop=args.uvloop, echo=not args.output
+            )
+        if not args.output:
+            return result
+    else:
+        with timings.phase("parse"):
+            params: dict = _load_params(args.params, args.params_format)
+        call = resolve_callable(args, cache, timings)
+        with timings.phase("call"):
+            result: Any = call(**params)
+            result, streamed = complete(result, use_uvloop=args.uvloop, emit=None if args.output else _print_item)
+        if streamed and not args.output:
+            return result
+
+    with timings.phase("serialize"):
+        if args.output:
+            from tgedr_pycommons.cicd.serialization import write
+
+            write(result, args.output, args.output_format)
+        # Print result to stdout for shell capture
+        elif result is not None:
+            print(result)  # noqa: T201
+    return result
+
+
+def _manifest_command(args: Namespace) -> Any:
+    """Build a manifest, or list the callables of one."""
+    from tgedr_pycommons.cicd import manifest
+
+    if args.build_manifest:
+        result = manifest.build_manifest(args.build_manifest)
+        if args.manifest:
+            manifest.write_manifest(result, args.manifest)
+        else:
+            import json
+
+            print(json.dumps(result, indent=1))  # noqa: T201
+        return result
+
+    if args.manifest:
+        content = manifest.load_manifest(args.manifest)
+    elif args.module:
+        content = manifest.build_manifest([args.module])
     else:
-        result: Any = call()
-    # Print result to stdout for shell capture
-    if result is not None:
-        print(result)  # noqa: T201
+        msg = "--list needs a --manifest or a --module"
+        raise EntrypointException(msg)
+    result = manifest.targets(content)
+    for target in result:
+        print(manifest.format_target(target))  # noqa: T201
     return result
+
+
+def _check_manifest(args: Namespace) -> None:
+    """Check the callable against the --manifest, before importing its module.
+
+    Raises:
+      EntrypointException: If the manifest rules the callable out
+
+    """
+    from tgedr_pycommons.cicd import manifest
+
+    try:
+        manifest.check(manifest.load_manifest(args.manifest), args.module, args.callable, args.classname)
+    except manifest.ManifestException as e:
+        raise EntrypointException(str(e)) from e
+
+
+def import_profile(module: str) -> list[dict[str, Any]]:
+    """Import a module in a fresh interpreter and print the time spent importing each module it loads.
+
+    The breakdown comes from `python -X importtime`, sorted by cumulative time, most expensive first.
+
+    Args:
+      module: The module to profile
+    Returns:
+      list[dict[str, Any]]: One entry per imported module, with its `module` name, `self_us` and
+        `cumulative_us` import times in microseconds and its nesting `depth`
+    Raises:
+      EntrypointException: If the module can not be imported
+
+    """
+    import os
+    import subprocess  # nosec B404
+
+    # -X importtime only reports the imports going through __import__, not importlib.import_module
+    code = "import sys; __import__(sys.argv[1])"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(map(str, sys.path))}
+    completed = subprocess.run(  # noqa: S603  # nosec B603
+        [sys.executable, "-X", "importtime", "-c", code, module], capture_output=True, text=True, env=env, check=False
+    )
+    if completed.returncode != 0:
+        errors = completed.stderr.strip().splitlines()
+        msg = f"failed to import {module}: {errors[-1] if errors else completed.returncode}"
+        raise EntrypointException(msg)
+
+    result = []
+    for line in completed.stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        result.append(
+            {
+                "module": name.strip(),
+                "self_us": int(fields[0]),
+                "cumulative_us": int(fields[1]),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            }
+        )
+    result.sort(key=lambda row: row["cumulative_us"], reverse=True)
+
+    print(f"{'self [us]':>10} | {'cumulative [us]':>15} | module")  # noqa: T201
+    for row in result:
+        print(f"{row['self_us']:>10} | {row['cumulative_us']:>15} | {row['module']}")  # noqa: T201
+    return result
+
+
+if __name__ == "__main__":
+    entrypoint()
@@ -0,0 +1,287 @@
+"""Manifest of the callables the entrypoint can execute, built without importing anything.
+
+The manifest is built by parsing the sources of packages (their AST), it lists for each module
+its functions and its classes with their methods, and their signatures:
+
+    {"version": 2, "packages": ["jobs"], "modules": {"jobs.daily": {
+        "functions": {"run": {"signature": "(day: str)", "async": false}},
+        "classes": {"Job": {"signature": "(config: dict)", "bases": ["Base"], "methods": {...}}},
+        "names": ["Base", "logger"], "dynamic": false}}}
+
+It lets the entrypoint list the public targets (`--list`) and reject a mistyped one (`--manifest`)
+before paying for a heavy import. The check is conservative: private names, definitions nested
+in if/try blocks and class attributes are recorded, and what can not be known statically, a
+name imported or assigned in the module, a method a class may inherit, a module `__getattr__`
+or star import, is accepted.
+"""
+
+import ast
+import json
+import logging
+from collections.abc import Iterable, Iterator
+from difflib import get_close_matches
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 2
+
+
+class ManifestException(Exception):
+    """Exception raised when a manifest can not be built, or rejects a target."""
+
+
+def build_manifest(packages: Iterable[str]) -> dict[str, Any]:
+    """Build the manifest of packages (or modules), from their sources.
+
+    Only the top level package is located with the import system, which does not import it.
+
+    Args:
+      packages: The dotted names of the packages, or modules, to scan
+    Returns:
+      dict[str, Any]: The manifest
+    Raises:
+      ManifestException: If a package can not be found
+
+    """
+    packages = list(packages)
+    modules = {}
+    for package in packages:
+        for name, path in _sources(package):
+            try:
+                tree = ast.parse(path.read_bytes(), filename=str(path))
+            except (SyntaxError, ValueError):
+                logger.warning("[build_manifest] skipping %s, it can not be parsed", path, exc_info=True)
+                continue
+            modules[name] = _module_entry(tree)
+    return {"version": MANIFEST_VERSION, "packages": packages, "modules": dict(sorted(modules.items()))}
+
+
+def write_manifest(manifest: dict[str, Any], path: str) -> None:
+    """Write a manifest to a JSON file.
+
+    Args:
+      manifest: The manifest
+      path: The file to write
+
+    """
+    Path(path).write_text(json.dumps(manifest, indent=1))
+
+
+def load_manifest(path: str) -> dict[str, Any]:
+    """Load a manifest from a JSON file.
+
+    Args:
+      path: The file to read
+    Returns:
+      dict[str, Any]: The manifest
+    Raises:
+      ManifestException: If the file is not a manifest of this version
+
+    """
+    manifest = json.loads(Path(path).read_text())
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        msg = f"{path} is not a version {MANIFEST_VERSION} manifest, build it again"
+        raise ManifestException(msg)
+    return manifest
+
+
+def targets(manifest: dict[str, Any]) -> list[dict[str, Any]]:
+    """List the public targets of a manifest, functions first and then class methods, module by module.
+
+    Args:
+      manifest: The manifest
+    Returns:
+      list[dict[str, Any]]: One entry per target, with its `module`, `classname` (None for functions),
+        `callable`, `signature` and `async` flag
+
+    """
+    result = []
+    for module, entry in manifest["modules"].items():
+        result.extend(
+            {"module": module, "classname": None, "callable": name, **function}
+            for name, function in entry["functions"].items()
+            if _is_public(name)
+        )
+        for classname, cls in entry["classes"].items():
+            if _is_public(classname):
+                result.extend(
+                    {"module": module, "classname": classname, "callable": name, **method}
+                    for name, method in cls["methods"].items()
+                    if _is_public(name)
+                )
+    return result
+
+
+def format_target(target: dict[str, Any]) -> str:
+    """Format a target as `module:[Class.]callable(signature)`, prefixed with `async` for coroutines."""
+    owner = f"{target['classname']}." if target["classname"] else ""
+    prefix = "async " if target["async"] else ""
+    return f"{prefix}{target['module']}:{owner}{target['callable']}{target['signature']}"
+
+
+def check(manifest: dict[str, Any], module: str, name: str, classname: str | None = None) -> None:
+    """Check that a target exists in a manifest.
+
+    Args:
+      manifest: The manifest
+      module: The module of the callable
+      name: The callable (function or class function)
+      classname: If the callable is a class function, the class name
+    Raises:
+      ManifestException: If the manifest rules the target out
+
+    """
+    modules = manifest["modules"]
+    entry = modules.get(module)
+    if entry is None:
+        _reject(f"module {module} is not in the manifest", module, modules)
+    if entry["dynamic"]:
+        return
+
+    if not classname:
+        if name not in entry["functions"] and name not in entry["names"]:
+            _reject(f"{module} has no function {name}", name, entry["functions"])
+        return
+
+    cls = entry["classes"].get(classname)
+    if cls is None:
+        if classname not in entry["names"]:
+            _reject(f"{module} has no class {classname}", classname, entry["classes"])
+        return
+    if name not in cls["methods"] and not cls["bases"]:
+        _reject(f"{module}.{classname} has no method {name}", name, cls["methods"])
+
+
+def _reject(msg: str, name: str, candidates: Iterable[str]) -> None:
+    matches = get_close_matches(name, list(candidates), n=3)
+    if matches:
+        msg += f", did you mean {' or '.join(matches)}?"
+    raise ManifestException(msg)
+
+
+def _sources(package: str) -> Iterator[tuple[str, Path]]:
+    """Find the source files of a package, or module, without importing it, with their module names."""
+    top, _, rest = package.partition(".")
+    spec = find_spec(top)
+    if spec is None:
+        msg = f"package {top} can not be found"
+        raise ManifestException(msg)
+
+    roots = [Path(location) for location in spec.submodule_search_locations or ()]
+    if not roots:
+        if rest or not spec.origin or not spec.origin.endswith(".py"):
+            msg = f"package {package} can not be found"
+            raise ManifestException(msg)
+        yield package, Path(spec.origin)
+        return
+
+    found = False
+    for root in roots:
+        path = root.joinpath(*rest.split(".")) if rest else root
+        if path.is_dir():
+            found = True
+            for source in sorted(path.rglob("*.py")):
+                parts = source.relative_to(path).with_suffix("").parts
+                if parts[-1] == "__init__":
+                    parts = parts[:-1]
+                if all(part.isidentifier() for part in parts):
+                    yield ".".join((package, *parts)), source
+        elif path.with_suffix(".py").is_file():
+            found = True
+            yield package, path.with_suffix(".py")
+    if not found:
+        msg = f"package {package} can not be found"
+        raise ManifestException(msg)
+
+
+def _module_entry(tree: ast.Module) -> dict[str, Any]:
+    functions = {}
+    classes = {}
+    names = set()
+    for node in _statements(tree.body):
+        if isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef):
+            if node.name == "__getattr__":
+                names.add(node.name)
+            else:
+                functions[node.name] = _function_entry(node, method=False)
+        elif isinstance(node, ast.ClassDef):
+            classes[node.name] = _class_entry(node)
+        else:
+            names.update(_bound_names(node))
+    # a star import binds names that can not be known statically
+    dynamic = "__getattr__" in names or "*" in names
+    names.discard("*")
+    return {"functions": functions, "classes": classes, "names": sorted(names), "dynamic": dynamic}
+
+
+def _class_entry(node: ast.ClassDef) -> dict[str, Any]:
+    methods = {}
+    signature = None
+    for child in _statements(node.body):
+        if isinstance(child, ast.FunctionDef | ast.AsyncFunctionDef):
+            if child.name == "__init__":
+                signature = _function_entry(child, method=True)["signature"]
+            if not _decorated_with(child, "property"):
+                methods[child.name] = _function_entry(child, method=not _decorated_with(child, "staticmethod"))
+        elif isinstance(child, ast.Assign | ast.AnnAssign) and not isinstance(child.value, ast.Constant | None):
+            # e.g. go = staticmethod(run), the value may be callable
+            methods.update({name: {"signature": "(...)", "async": False} for name in _bound_names(child)})
+    bases = [ast.unparse(base) for base in node.bases if ast.unparse(base) != "object"]
+    if signature is None:
+        # without an __init__ of its own, the class takes what its bases take
+        signature = "(...)" if bases else "()"
+    return {"signature": signature, "bases": bases, "methods": methods}
+
+
+def _statements(body: list[ast.stmt]) -> Iterator[ast.stmt]:
+    """Iterate over the statements of a body, and of the if/try/with/for/while blocks in it."""
+    for node in body:
+        if isinstance(
+            node, ast.If | ast.Try | ast.TryStar | ast.With | ast.AsyncWith | ast.For | ast.AsyncFor | ast.While
+        ):
+            # the names bound outside of the blocks, e.g. a for target or an except name
+            yield node
+            blocks = [getattr(node, field, []) for field in ("body", "orelse", "finalbody")]
+            blocks.extend(handler.body for handler in getattr(node, "handlers", []))
+            for block in blocks:
+                yield from _statements(block)
+        else:
+            yield node
+
+
+def _function_entry(node: ast.FunctionDef | ast.AsyncFunctionDef, *, method: bool) -> dict[str, Any]:
+    args = node.args
+    if method:
+        args = ast.arguments(**{field: getattr(args, field) for field in args._fields})
+        if args.posonlyargs:
+            args.posonlyargs = args.posonlyargs[1:]
+        else:
+            args.args = args.args[1:]
+        positional = len(args.posonlyargs) + len(args.args)
+        args.defaults = args.defaults[-positional:] if positional else []
+    return {"signature": f"({ast.unparse(args)})", "async": isinstance(node, ast.AsyncFunctionDef)}
+
+
+def _decorated_with(node: ast.FunctionDef | ast.AsyncFunctionDef, name: str) -> bool:
+    return any(ast.unparse(decorator).split(".")[-1] == name for decorator in node.decorator_list)
+
+
+def _bound_names(node: ast.stmt) -> Iterator[str]:
+    """Find the names a statement binds, other than through def and class, "*" for a star import."""
+    if isinstance(node, ast.Import | ast.ImportFrom):
+        for alias in node.names:
+            yield alias.asname or alias.name.split(".")[0]
+    else:
+        for child in ast.walk(node):
+            if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+                yield child.id
+            elif isinstance(child, ast.ExceptHandler) and child.name:
+                yield child.name
+
+
+def _is_public(name: str) -> bool:
+    return not name.startswith("_")
@@ -0,0 +1,150 @@
+"""Timing and profiling of the entrypoint executions.
+
+`Timings` records how long each phase of an execution takes, the entrypoint reports them
+with `--timings` as one JSON line on stderr:
+
+    {"parse": 0.0004, "import": 0.0812, "construct": 0.0001, "call": 1.2034, "serialize": 0.0002, "total": 1.2853}
+
+`Profiler` profiles what runs in its context, with `--profile cpu` (cProfile, the pstats report
+sorted by cumulative time) or `--profile mem` (tracemalloc, the lines allocating the most memory),
+and prints its report on stderr.
+
+Both are kept cheap to import, the profilers being only imported when profiling.
+"""
+
+import sys
+import time
+from types import TracebackType
+from typing import IO, Any
+
+
+PROFILER_KINDS = ("cpu", "mem")
+
+
+class Timings:
+    """Durations, in seconds, of the phases of an execution."""
+
+    def __init__(self) -> None:
+        """Initialize the timings with no phase."""
+        self.seconds: dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Add a duration to a phase.
+
+        Args:
+          phase: The name of the phase
+          seconds: The duration
+
+        """
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    def phase(self, name: str) -> "_Phase":
+        """Time the code run in the returned context as part of a phase.
+
+        Args:
+          name: The name of the phase
+        Returns:
+          _Phase: The context manager timing the phase
+
+        """
+        return _Phase(self, name)
+
+    def as_dict(self) -> dict[str, float]:
+        """Return the durations of the phases, in the order they started, and their total."""
+        return {**self.seconds, "total": sum(self.seconds.values())}
+
+    def report(self, stream: IO[str] | None = None) -> None:
+        """Write the durations as a JSON line.
+
+        Args:
+          stream: Where to write them, stderr by default
+
+        """
+        import json
+
+        stream = stream or sys.stderr
+        stream.write(json.dumps({name: round(seconds, 6) for name, seconds in self.as_dict().items()}) + "\n")
+        stream.flush()
+
+
+class _Phase:
+    """Context manager adding the time spent in its context to a phase."""
+
+    def __init__(self, timings: Timings, name: str) -> None:
+        self._timings = timings
+        self._name = name
+        self._started = 0.0
+
+    def __enter__(self) -> "_Phase":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self._timings.add(self._name, time.perf_counter() - self._started)
+
+
+class Profiler:
+    """Profiles the code run in its context and prints a report when leaving it."""
+
+    def __init__(self, kind: str | None, top: int = 25, stream: IO[str] | None = None) -> None:
+        """Initialize the profiler.
+
+        Args:
+          kind: "cpu" for cProfile, "mem" for tracemalloc, None to not profile
+          top: The number of functions, or allocating lines, in the report
+          stream: Where to print the report, stderr by default
+        Raises:
+          ValueError: If the kind of profiler is unknown
+
+        """
+        if kind is not None and kind not in PROFILER_KINDS:
+            msg = f"kind must be one of {PROFILER_KINDS}, got {kind}"
+            raise ValueError(msg)
+        self.kind = kind
+        self.top = top
+        self.stream = stream
+        self.stats: Any = None
+        self._profile: Any = None
+        self._tracing = False
+
+    def __enter__(self) -> "Profiler":
+        """Start profiling."""
+        if self.kind == "cpu":
+            import cProfile
+
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif self.kind == "mem":
+            import tracemalloc
+
+            # leave tracing alone when it was started by someone else
+            self._tracing = not tracemalloc.is_tracing()
+            if self._tracing:
+                tracemalloc.start()
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        """Stop profiling and print the report."""
+        stream = self.stream or sys.stderr
+        if self.kind == "cpu":
+            import pstats
+
+            self._profile.disable()
+            self.stats = pstats.Stats(self._profile, stream=stream)
+            self.stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        elif self.kind == "mem":
+            import tracemalloc
+
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if self._tracing:
+                tracemalloc.stop()
+            self.stats = snapshot.statistics("lineno")[: self.top]
+            stream.write(f"[profile] peak traced memory: {peak} bytes, top {len(self.stats)} allocations:\n")
+            for statistic in self.stats:
+                stream.write(f"{statistic}\n")
+            stream.flush()
@@ -0,0 +1,157 @@
+"""Cache of resolved callables, for driving the entrypoint in-process.
+
+Calling `entrypoint([...])` in a loop parses the arguments, imports the module, looks the
+callable up and constructs the class instance on every call. A `ResolutionCache` keeps the
+outcome of those steps, so that a repeated invocation costs about one dictionary lookup:
+
+    cache = ResolutionCache(maxsize=256, reuse_instances=True)
+    for day in days:
+        entrypoint(["--module", "jobs", "--callable", "run", "--params", day], cache=cache)
+"""
+
+import json
+import threading
+from argparse import Namespace
+from collections import OrderedDict
+from collections.abc import Sequence
+from importlib import import_module
+from typing import Any, NamedTuple
+
+from tgedr_pycommons.cicd.entrypoint import parse_arguments
+from tgedr_pycommons.cicd.serialization import load_params
+
+
+class _Constructor(NamedTuple):
+    """A class to instantiate on every resolution, when instances are not reused."""
+
+    cls: type
+    params: dict[str, Any]
+    name: str
+
+
+class ResolutionCache:
+    """LRU cache of resolved callables, keyed on module, class, class parameters and callable.
+
+    Functions are cached as they are. Class methods are cached either bound to a single,
+    reused, class instance, or as the class and its parsed parameters, a new instance being
+    constructed on each resolution. `hits` and `misses` count the lookups of resolutions and of
+    parsed arguments alike. The cache can be shared across threads, its bookkeeping is done under
+    a lock, released while loading callables.
+    """
+
+    def __init__(self, maxsize: int | None = 128, *, reuse_instances: bool = False) -> None:
+        """Initialize an empty cache.
+
+        Args:
+          maxsize: The number of resolutions (and of parsed argument lists) kept, unbounded if None
+          reuse_instances: Whether class methods are bound to one instance shared across resolutions
+        Raises:
+          ValueError: If maxsize is not positive
+
+        """
+        if maxsize is not None and maxsize <= 0:
+            msg = f"maxsize must be a positive integer or None, got {maxsize}"
+            raise ValueError(msg)
+        self.maxsize = maxsize
+        self.reuse_instances = reuse_instances
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, Any] = OrderedDict()
+        self._arguments: OrderedDict[tuple[str, ...], Namespace] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of cached resolutions."""
+        return len(self._entries)
+
+    def resolve(
+        self, module: str, name: str, classname: str | None = None, classparams: str | dict[str, Any] | None = None
+    ) -> Any:
+        """Resolve a callable, from the cache when it was already resolved.
+
+        Args:
+          module: The module where to find the callable
+          name: The callable (function or class function)
+          classname: If the callable is a class function, the class name
+          classparams: The class constructor parameters, as a dictionary, a JSON string or an @file reference,
+            the file being read when first resolved
+        Returns:
+          Any: The resolved callable (function or class method)
+
+        """
+        key = (module, classname, _canonical(classparams), name)
+        entry = self._lookup(self._entries, key)
+        if entry is None:
+            entry = self._store(self._entries, key, self._load(module, name, classname, classparams))
+        if isinstance(entry, _Constructor):
+            return getattr(entry.cls(**entry.params), entry.name)
+        return entry
+
+    def parse(self, explicit_args: Sequence[str]) -> Namespace:
+        """Parse entrypoint command line arguments, from the cache when they were already parsed.
+
+        The parsed arguments are shared across calls and must not be modified.
+
+        Args:
+          explicit_args: A sequence of command line arguments
+        Returns:
+          Namespace: The parsed command line arguments
+
+        """
+        key = tuple(explicit_args)
+        result = self._lookup(self._arguments, key)
+        if result is None:
+            result = self._store(self._arguments, key, parse_arguments(key))
+        return result
+
+    def invalidate(self, module: str | None = None) -> None:
+        """Drop cached resolutions, so that they are resolved again on next use.
+
+        Reloading a module (`importlib.reload`) does not update what was already resolved from
+        it, its resolutions must be invalidated too.
+
+        Args:
+          module: Only drop the resolutions from this module, everything (parsed arguments included) if None
+
+        """
+        with self._lock:
+            if module is None:
+                self._entries.clear()
+                self._arguments.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == module]:
+                    del self._entries[key]
+
+    def _lookup(self, store: OrderedDict, key: tuple) -> Any:
+        with self._lock:
+            value = store.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                store.move_to_end(key)
+        return value
+
+    def _store(self, store: OrderedDict, key: tuple, value: Any) -> Any:
+        with self._lock:
+            store[key] = value
+            if self.maxsize is not None and len(store) > self.maxsize:
+                store.popitem(last=False)
+        return value
+
+    def _load(self, module: str, name: str, classname: str | None, classparams: str | dict[str, Any] | None) -> Any:
+        target = import_module(module)
+        if not classname:
+            return getattr(target, name)
+        cls = getattr(target, classname)
+        params = load_params(classparams)
+        if self.reuse_instances:
+            return getattr(cls(**params), name)
+        return _Constructor(cls, params, name)
+
+
+def _canonical(classparams: str | dict[str, Any] | None) -> str | None:
+    """Key class parameters given as a JSON string as they are, and as a dictionary by their sorted JSON."""
+    if classparams is None or isinstance(classparams, str):
+        return classparams or None
+    return json.dumps(classparams, sort_keys=True, default=str)
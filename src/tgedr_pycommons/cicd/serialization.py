@@ -0,0 +1,216 @@
+"""Serializers moving parameters and results of the entrypoint through files.
+
+Parameters passed as JSON strings in argv run into argv size limits, and printing a result
+turns a large array into an enormous string. Parameters can instead be read from a file,
+`--params @params.npz`, or from stdin, `--params @-`, and results written to a file with
+`--output result.npy`, without going through text.
+
+The format is chosen explicitly, or else from the file extension:
+
+    =========  ==================  ==============================================
+    format     extensions          values
+    =========  ==================  ==============================================
+    json       .json               JSON compatible values (the default)
+    pickle     .pkl, .pickle       any picklable value
+    msgpack    .msgpack, .mpk      msgpack compatible values, needs `msgpack`
+    npy        .npy                one array
+    npz        .npz                a dictionary of arrays, e.g. keyword arguments
+    =========  ==================  ==============================================
+
+Other formats can be added with `register_serializer`.
+"""
+
+import io
+import json
+import pickle  # nosec B403
+import sys
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import IO, Any, NamedTuple
+
+
+STDIO = "-"
+
+
+class SerializationException(Exception):
+    """Exception raised when a value can not be serialized or deserialized."""
+
+
+class Serializer(NamedTuple):
+    """Reads a value from, and writes a value to, a binary stream."""
+
+    load: Callable[[IO[bytes]], Any]
+    dump: Callable[[Any, IO[bytes]], None]
+
+
+_SERIALIZERS: dict[str, Serializer] = {}
+_EXTENSIONS: dict[str, str] = {}
+
+
+def register_serializer(name: str, serializer: Serializer, extensions: Iterable[str] = ()) -> None:
+    """Register a serializer, replacing any serializer with the same name or extensions.
+
+    Args:
+      name: The name of the format
+      serializer: The serializer
+      extensions: The file extensions, with their leading dot, selecting this format
+
+    """
+    _SERIALIZERS[name] = serializer
+    for extension in extensions:
+        _EXTENSIONS[extension.lower()] = name
+
+
+def get_serializer(name: str | None = None, path: str | None = None) -> Serializer:
+    """Get the serializer of a format, by name or else by file extension, JSON by default.
+
+    Args:
+      name: The name of the format
+      path: The file whose extension selects the format when no name is given
+    Returns:
+      Serializer: The serializer
+    Raises:
+      SerializationException: If there is no serializer with that name
+
+    """
+    if name is None:
+        name = _EXTENSIONS.get(Path(path).suffix.lower(), "json") if path else "json"
+    serializer = _SERIALIZERS.get(name)
+    if serializer is None:
+        msg = f"unknown format {name}, expected one of {sorted(_SERIALIZERS)}"
+        raise SerializationException(msg)
+    return serializer
+
+
+def read(path: str, fmt: str | None = None) -> Any:
+    """Read a value from a file, or from stdin if `path` is "-".
+
+    Args:
+      path: The file to read
+      fmt: The name of the format, by default from the file extension
+    Returns:
+      Any: The value read
+
+    """
+    serializer = get_serializer(fmt, path)
+    if path == STDIO:
+        # some readers (numpy) need a seekable stream
+        return serializer.load(io.BytesIO(sys.stdin.buffer.read()))
+    with Path(path).open("rb") as stream:
+        return serializer.load(stream)
+
+
+def write(value: Any, path: str, fmt: str | None = None) -> None:
+    """Write a value to a file, or to stdout if `path` is "-".
+
+    Args:
+      value: The value to write
+      path: The file to write
+      fmt: The name of the format, by default from the file extension
+
+    """
+    serializer = get_serializer(fmt, path)
+    if path == STDIO:
+        serializer.dump(value, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+        return
+    with Path(path).open("wb") as stream:
+        serializer.dump(value, stream)
+
+
+def load_params(value: str | dict[str, Any] | None, fmt: str | None = None) -> dict[str, Any]:
+    """Load keyword parameters given as a dictionary, a JSON string, or a "@file" ("@-" for stdin) reference.
+
+    Args:
+      value: The parameters
+      fmt: The name of the format of a referenced file, by default from its extension
+    Returns:
+      dict[str, Any]: The parameters
+    Raises:
+      SerializationException: If the parameters are not a dictionary
+
+    """
+    if not value:
+        return {}
+    if isinstance(value, str):
+        value = read(value[1:], fmt) if value.startswith("@") else json.loads(value)
+    if not isinstance(value, dict):
+        msg = f"parameters must be a dictionary, got {type(value).__name__}"
+        raise SerializationException(msg)
+    return value
+
+
+def json_default(value: Any) -> Any:
+    """Serialize arrays (anything with `tolist`) as lists, anything else as its string, for `json.dumps`.
+
+    Args:
+      value: A value `json` can not serialize
+    Returns:
+      Any: A value it can
+
+    """
+    return value.tolist() if hasattr(value, "tolist") else str(value)
+
+
+def _json_dump(value: Any, stream: IO[bytes]) -> None:
+    stream.write(json.dumps(value, default=json_default).encode("utf-8"))
+
+
+def _pickle_load(stream: IO[bytes]) -> Any:
+    return pickle.load(stream)  # noqa: S301  # nosec B301 - only ever reads files given by the caller
+
+
+def _pickle_dump(value: Any, stream: IO[bytes]) -> None:
+    pickle.dump(value, stream, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _msgpack() -> Any:
+    try:
+        import msgpack
+    except ImportError as e:
+        msg = "the msgpack format needs the msgpack package"
+        raise SerializationException(msg) from e
+    return msgpack
+
+
+def _msgpack_load(stream: IO[bytes]) -> Any:
+    return _msgpack().unpack(stream)
+
+
+def _msgpack_dump(value: Any, stream: IO[bytes]) -> None:
+    _msgpack().pack(value, stream)
+
+
+def _npy_load(stream: IO[bytes]) -> Any:
+    import numpy as np
+
+    return np.load(stream, allow_pickle=False)
+
+
+def _npy_dump(value: Any, stream: IO[bytes]) -> None:
+    import numpy as np
+
+    np.save(stream, np.asarray(value), allow_pickle=False)
+
+
+def _npz_load(stream: IO[bytes]) -> Any:
+    import numpy as np
+
+    with np.load(stream, allow_pickle=False) as arrays:
+        return {name: arrays[name] for name in arrays.files}
+
+
+def _npz_dump(value: Any, stream: IO[bytes]) -> None:
+    import numpy as np
+
+    if not isinstance(value, dict):
+        msg = f"the npz format writes a dictionary of arrays, got {type(value).__name__}"
+        raise SerializationException(msg)
+    np.savez(stream, **value)
+
+
+register_serializer("json", Serializer(json.load, _json_dump), [".json"])
+register_serializer("pickle", Serializer(_pickle_load, _pickle_dump), [".pkl", ".pickle"])
+register_serializer("msgpack", Serializer(_msgpack_load, _msgpack_dump), [".msgpack", ".mpk"])
+register_serializer("npy", Serializer(_npy_load, _npy_dump), [".npy"])
+register_serializer("npz", Serializer(_npz_load, _npz_dump), [".npz"])
@@ -0,0 +1,204 @@
+"""Warm worker executing python callables on demand.
+
+Instead of paying interpreter startup and module imports on every invocation, a worker
+process stays up and receives invocations as JSON lines, over stdin/stdout or a local
+Unix socket. Each message holds the same fields as the entrypoint command line arguments:
+
+    {"id": 1, "module": "pkg.mod", "classname": "AClass", "classparams": {"config": {}},
+     "callable": "run", "params": {"n": 1}}
+
+`classname`, `classparams`, `params` and `id` are optional, `classparams` and `params` can
+also be JSON strings, or "@file" references to files the worker can read (see `serialization`).
+Each result is written back as soon as it is available, as a JSON line:
+
+    {"id": 1, "result": ...}  or  {"id": 1, "error": {"type": "KeyError", "message": "..."}}
+
+Resolved callables and class instances are kept warm across invocations, in a `ResolutionCache`.
+As with the entrypoint, coroutines are awaited, on the event loop the worker keeps across
+invocations, and generators and async generators are exhausted into lists.
+When serving over stdio, what the callables print goes to stderr, stdout carrying the responses.
+"""
+
+import contextlib
+import json
+import logging
+import socket
+import socketserver
+import stat
+import sys
+from pathlib import Path
+from typing import IO, Any
+
+from tgedr_pycommons.cicd.entrypoint import complete
+from tgedr_pycommons.cicd.resolution import ResolutionCache
+from tgedr_pycommons.cicd.serialization import json_default, load_params
+
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Executes invocation messages, keeping class instances warm across invocations."""
+
+    def __init__(self, cache: ResolutionCache | None = None, *, use_uvloop: bool = False) -> None:
+        """Initialize the worker.
+
+        Args:
+          cache: The cache of resolved callables, by default an unbounded one reusing class instances
+          use_uvloop: Whether coroutines and async generators run on a uvloop event loop
+
+        """
+        self.cache = cache or ResolutionCache(maxsize=None, reuse_instances=True)
+        self.use_uvloop = use_uvloop
+
+    def resolve(self, message: dict[str, Any]) -> Any:
+        """Resolve the callable of an invocation message.
+
+        Args:
+          message: The invocation message
+        Returns:
+          Any: The resolved callable (function or class method)
+
+        """
+        return self.cache.resolve(
+            message["module"], message["callable"], message.get("classname"), message.get("classparams")
+        )
+
+    def invoke(self, message: dict[str, Any]) -> Any:
+        """Execute an invocation message.
+
+        Args:
+          message: The invocation message
+        Returns:
+          Any: The result of the executed callable, awaited if a coroutine, a list if a generator
+
+        """
+        result = self.resolve(message)(**load_params(message.get("params")))
+        return complete(result, use_uvloop=self.use_uvloop)[0]
+
+    def handle(self, line: str) -> str:
+        """Execute an invocation message received as a JSON line.
+
+        Args:
+          line: The invocation message, as a JSON line
+        Returns:
+          str: The response, as a JSON line
+
+        """
+        response: dict[str, Any] = {}
+        try:
+            message = json.loads(line)
+            response["id"] = message.get("id")
+            response["result"] = self.invoke(message)
+        except Exception as e:  # noqa: BLE001 - failures are reported to the caller, the worker stays up
+            logger.debug("[handle] invocation failed: %s", line, exc_info=True)
+            response.pop("result", None)
+            response["error"] = {"type": type(e).__name__, "message": str(e)}
+        return json.dumps(response, default=json_default) + "\n"
+
+    def serve(self, reader: IO[str], writer: IO[str]) -> None:
+        """Execute the invocation messages read from `reader` until it is exhausted, streaming responses to `writer`.
+
+        Args:
+          reader: The stream of JSON lines invocation messages
+          writer: The stream the JSON lines responses are written to, when it is stdout what the
+            callables print is redirected to stderr
+
+        """
+        for line in reader:
+            if line.strip():
+                # keep the prints of the callables out of the responses
+                with contextlib.redirect_stdout(sys.stderr) if writer is sys.stdout else contextlib.nullcontext():
+                    response = self.handle(line)
+                writer.write(response)
+                writer.flush()
+
+
+class WorkerServer(socketserver.UnixStreamServer):
+    """Unix socket server handing each connection's invocation messages to a worker."""
+
+    def __init__(self, path: str, worker: Worker | None = None) -> None:
+        """Bind the server to a Unix socket, removing the socket file a stopped worker left behind.
+
+        Args:
+          path: The path of the Unix socket
+          worker: The worker executing the invocations, a new one by default
+        Raises:
+          FileExistsError: If a worker is serving on the socket, or the path is not a socket
+
+        """
+        self.worker = worker or Worker()
+        _remove_stale_socket(path)
+        super().__init__(path, _WorkerRequestHandler)
+
+
+class _WorkerRequestHandler(socketserver.StreamRequestHandler):
+    """Serves the invocation messages of one connection."""
+
+    def handle(self) -> None:
+        reader = (line.decode("utf-8") for line in self.rfile)
+        self.server.worker.serve(reader, _Utf8Writer(self.wfile))
+
+
+class _Utf8Writer:
+    """Text facade over a binary stream."""
+
+    def __init__(self, stream: IO[bytes]) -> None:
+        self._stream = stream
+
+    def write(self, text: str) -> None:
+        self._stream.write(text.encode("utf-8"))
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Remove a socket file nothing listens on anymore."""
+    try:
+        mode = Path(path).stat().st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        msg = f"{path} exists and is not a socket"
+        raise FileExistsError(msg)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            logger.info("[WorkerServer] removing the stale socket %s", path)
+            Path(path).unlink()
+            return
+    msg = f"a worker is already serving on {path}"
+    raise FileExistsError(msg)
+
+
+def serve_unix_socket(path: str, *, use_uvloop: bool = False) -> None:
+    """Serve invocations on a Unix socket until interrupted.
+
+    Args:
+      path: The path of the Unix socket
+      use_uvloop: Whether coroutines and async generators run on a uvloop event loop
+
+    """
+    logger.info("[serve_unix_socket] serving on %s", path)
+    with WorkerServer(path, Worker(use_uvloop=use_uvloop)) as server:
+        server.serve_forever()
+
+
+def send(path: str, message: dict[str, Any]) -> dict[str, Any]:
+    """Send an invocation message to the worker serving on a Unix socket.
+
+    Args:
+      path: The path of the Unix socket
+      message: The invocation message
+    Returns:
+      dict[str, Any]: The response of the worker
+
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+        with client.makefile("rwb") as stream:
+            stream.write(json.dumps(message).encode("utf-8") + b"\n")
+            stream.flush()
+            return json.loads(stream.readline())
@@ -1,50 +1,1108 @@
 """Utilities for processing data."""
 
-from typing import Any, Callable  # noqa: UP035
+import asyncio
+import inspect
+import logging
+import math
+import os
+import pickle  # nosec B403
+import time
+import tracemalloc
+import zipfile
+from collections.abc import Awaitable, Iterable, Iterator, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import IO, Any, Callable, Literal  # noqa: UP035
 import numpy as np
+import numpy.typing as npt
 
+from tgedr_pycommons.data.ragged import RaggedArray
 
-def process_text_array(x: list, f: Callable[[str], Any]) -> list:
-    """Apply a transformation function to each string in a nested text array.
+
+logger = logging.getLogger(__name__)
+
+_SEQUENCE_TYPES = (list, tuple)
+
+
+def _is_sequence(x: Any) -> bool:
+    """Whether `x` is a level of nesting: a list, a tuple or a NumPy array with dimensions."""
+    return isinstance(x, _SEQUENCE_TYPES) or (isinstance(x, np.ndarray) and x.ndim > 0)
+
+
+def _flatten(x: Any) -> tuple[list, tuple[int, ...]]:
+    """Flatten a balanced nested sequence in a single pass.
+
+    The shape is inferred from the first element at each level of nesting and every
+    other sub-sequence is checked against it while its leaves are collected, so no
+    intermediate NumPy array is ever built.
 
     Parameters
     ----------
-    x : list
-        A (possibly nested) list of strings that should form a balanced array.
-    f : Callable[[str], Any]
-        A function applied to each string element.
+    x : Any
+        A (possibly nested) list/tuple of items or of NumPy arrays, or a NumPy array.
 
     Returns
     -------
-    list
-        A nested list with the same structure as `x` containing transformed items.
+    tuple[list, tuple[int, ...]]
+        The leaves of `x` in row-major order and the shape of `x`.
+
+    Raises
+    ------
+    ValueError
+        If `x` is not balanced.
+
+    """
+    if isinstance(x, np.ndarray):
+        return list(x.flat), x.shape
+
+    shape = []
+    probe = x
+    while _is_sequence(probe):
+        shape.append(len(probe))
+        if len(probe) == 0:
+            break
+        probe = probe[0]
+
+    depth = len(shape)
+    flat = []
+
+    def walk(node: Any, level: int) -> None:
+        if level == depth:
+            flat.append(node)
+            return
+        if not _is_sequence(node):
+            msg = f"found a scalar at depth {level}, expected a sequence of length {shape[level]}"
+            raise ValueError(msg)
+        if len(node) != shape[level]:
+            msg = f"inhomogeneous shape at depth {level}, expected length {shape[level]} and got {len(node)}"
+            raise ValueError(msg)
+        if level == depth - 1:
+            for item in node:
+                if _is_sequence(item):
+                    msg = f"found a nested sequence at depth {depth}, expected a scalar"
+                    raise ValueError(msg)
+            flat.extend(node)
+        else:
+            for item in node:
+                walk(item, level + 1)
+
+    walk(x, 0)
+    return flat, tuple(shape)
+
+
+def _unflatten(flat: list, shape: tuple[int, ...]) -> Any:
+    """Rebuild a nested list of the given shape from its row-major leaves.
+
+    Parameters
+    ----------
+    flat : list
+        The leaves in row-major order, `len(flat)` must equal the product of `shape`.
+    shape : tuple[int, ...]
+        The shape of the nested list to build.
+
+    Returns
+    -------
+    Any
+        A nested list with the requested shape, or the single leaf if `shape` is empty.
+
+    """
+    if not shape:
+        return flat[0]
+    # group the innermost dimension first, the number of groups at each level is the
+    # product of the outer dimensions so that zero-sized dimensions are preserved
+    groups = [1]
+    for n in shape[:-1]:
+        groups.append(groups[-1] * n)
+    result = flat
+    for level in range(len(shape) - 1, 0, -1):
+        n = shape[level]
+        result = [result[i * n : (i + 1) * n] for i in range(groups[level])]
+    return result
+
+
+def _flatten_balanced(x: Any) -> tuple[list, tuple[int, ...]]:
+    """Flatten `x`, reporting any unbalanced input the way `process_text_array` does.
 
     Raises
     ------
     ValueError
-        If `x` cannot be converted to a balanced NumPy array.
+        If `x` is a scalar or is not balanced.
 
     """
     try:
-        np.array(x)
+        flat, shape = _flatten(x)
     except ValueError as e:
         msg = f"x must be a balanced array, convertible to a numpy array. Error: {e}"
         raise ValueError(msg) from e
+    if not shape:
+        msg = "x must be a balanced array, convertible to a numpy array. Error: x is a scalar"
+        raise ValueError(msg)
+    return flat, shape
+
+
+def _deduplicate(flat: list) -> tuple[list, list[int]]:
+    """Find the distinct values of `flat`, in order of first appearance.
+
+    Parameters
+    ----------
+    flat : list
+        The values to deduplicate, they must be hashable.
+
+    Returns
+    -------
+    tuple[list, list[int]]
+        The distinct values and, for each item of `flat`, the index of its distinct value.
+
+    """
+    index: dict[Any, int] = {}
+    inverse = [index.setdefault(t, len(index)) for t in flat]
+    logger.info(
+        "[process_text_array] dedup ratio: %.4f (%d distinct out of %d)",
+        len(index) / len(flat) if flat else 1.0,
+        len(index),
+        len(flat),
+    )
+    return list(index), inverse
+
+
+def _check_positive(name: str, value: int | None) -> None:
+    """Reject a non positive value for an optional count option.
+
+    Raises
+    ------
+    ValueError
+        If `value` is set and lower than 1.
+
+    """
+    if value is not None and value < 1:
+        msg = f"{name} must be a positive number, got {value}"
+        raise ValueError(msg)
+
+
+def _apply_chunk(f: Callable[[Any], Any], chunk: list, batch_size: int | None = None) -> list:
+    """Apply `f` to a chunk of values, one at a time or in batches of `batch_size`, runs on the executor workers.
+
+    Raises
+    ------
+    ValueError
+        If a batch function returns a different number of results than it was given values.
+
+    """
+    if batch_size is None:
+        return [f(t) for t in chunk]
+    results = []
+    for i in range(0, len(chunk), batch_size):
+        batch = chunk[i : i + batch_size]
+        batch_results = f(batch)
+        if len(batch_results) != len(batch):
+            msg = f"the batch function returned {len(batch_results)} results for a batch of {len(batch)} values"
+            raise ValueError(msg)
+        results.extend(batch_results)
+    return results
+
+
+def _apply_chunk_timed(f: Callable[[Any], Any], chunk: list, batch_size: int | None = None) -> tuple[list, list[float]]:
+    """Apply `f` to a chunk of values like `_apply_chunk`, also returning the latency of every call to `f`."""
+    latencies = []
+
+    def timed(value: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return f(value)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    return _apply_chunk(timed, chunk, batch_size), latencies
+
+
+def _is_picklable(obj: Any) -> bool:
+    """Check whether `obj` can be shipped to a worker process."""
+    try:
+        pickle.dumps(obj)
+    except (pickle.PicklingError, AttributeError, TypeError):
+        return False
+    return True
+
 
-    def unidim_process(x: list, f: Callable[[str], Any]) -> list:
-        result = []
-        for t in x:
-            output = f(t)
-            result.append(output)
-        return result
-
-    def multidim_process(x: list, f: Callable[[str], Any]) -> list:
-        result = []
-        if 1 == np.array(x).ndim:
-            result = unidim_process(x=x, f=f)
+_EXECUTOR_KINDS = {"process": ProcessPoolExecutor, "thread": ThreadPoolExecutor}
+
+
+@contextmanager
+def _executor_scope(
+    executor: Executor | Literal["process", "thread"] | None, workers: int | None
+) -> Iterator[Executor | None]:
+    """Provide the executor to run on, creating (and shutting down) a pool of `workers` if none is given.
+
+    Raises
+    ------
+    ValueError
+        If `executor` is an unknown kind of pool.
+
+    """
+    if isinstance(executor, str) and executor not in _EXECUTOR_KINDS:
+        msg = f"executor must be an Executor or one of {sorted(_EXECUTOR_KINDS)}, got {executor!r}"
+        raise ValueError(msg)
+    if isinstance(executor, Executor) or (executor is None and workers is None):
+        yield executor
+    else:
+        with _EXECUTOR_KINDS[executor or "process"](max_workers=workers) as pool:
+            yield pool
+
+
+def _apply(
+    values: list,
+    f: Callable[[Any], Any],
+    executor: Executor | None = None,
+    workers: int | None = None,
+    chunksize: int | None = None,
+    batch_size: int | None = None,
+    latencies: list[float] | None = None,
+) -> list:
+    """Apply `f` to every value, serially or in chunks on `executor`, keeping the input order.
+
+    Parameters
+    ----------
+    values : list
+        The flat values to transform.
+    f : Callable[[Any], Any]
+        A function applied to each value, or to each batch of values if `batch_size` is set.
+    executor : Executor | None
+        The executor to run the chunks on, serial execution if None.
+    workers : int | None
+        The number of workers of `executor`, used to derive the default chunk size.
+    chunksize : int | None
+        The number of values sent to a worker at once, if None the values are split in
+        about four chunks per worker to balance the load.
+    batch_size : int | None
+        If set, `f` is a batch function called with lists of up to `batch_size` values.
+    latencies : list[float] | None
+        If set, the latency in seconds of every call to `f` is appended to it.
+
+    Returns
+    -------
+    list
+        The transformed values.
+
+    """
+    apply_chunk = _apply_chunk if latencies is None else _apply_chunk_timed
+    if executor is not None and chunksize is None:
+        chunksize = max(1, -(-len(values) // (4 * (workers or os.cpu_count() or 1))))
+        if batch_size is not None:
+            # whole batches per chunk, so that only the last batch can be short
+            chunksize = -(-chunksize // batch_size) * batch_size
+
+    if executor is None or len(values) <= chunksize:
+        parts = [apply_chunk(f, values, batch_size)]
+    elif isinstance(executor, ProcessPoolExecutor) and not _is_picklable(f):
+        logger.warning("[process_text_array] f=%r cannot be pickled, falling back to serial execution", f)
+        parts = [apply_chunk(f, values, batch_size)]
+    else:
+        chunks = [values[i : i + chunksize] for i in range(0, len(values), chunksize)]
+        parts = executor.map(partial(apply_chunk, f, batch_size=batch_size), chunks)
+
+    results = []
+    for part in parts:
+        if latencies is None:
+            results.extend(part)
         else:
-            for s in x:
-                result.append(multidim_process(x=s, f=f))
-        return result
+            results.extend(part[0])
+            latencies.extend(part[1])
+    return results
+
+
+def _dense_output(
+    shape: tuple[int, ...], out: np.ndarray | None, out_dtype: npt.DTypeLike | None, max_len: int | None
+) -> np.ndarray:
+    """Provide the array the results are written to, shaped like the input plus a trailing `max_len` dimension.
+
+    Raises
+    ------
+    ValueError
+        If `out` does not have the expected shape, dtype or memory layout.
+
+    """
+    expected = shape if max_len is None else (*shape, max_len)
+    if out is None:
+        return np.empty(expected, dtype=out_dtype)
+    if out.shape != expected:
+        msg = f"out must have shape {expected}, got {out.shape}"
+        raise ValueError(msg)
+    if out_dtype is not None and out.dtype != np.dtype(out_dtype):
+        msg = f"out has dtype {out.dtype}, which does not match out_dtype {np.dtype(out_dtype)}"
+        raise ValueError(msg)
+    if not out.flags.c_contiguous:
+        msg = "out must be a C-contiguous array"
+        raise ValueError(msg)
+    return out
+
+
+def _check_width(results: list, dtype: np.dtype, max_len: int | None) -> None:
+    """Check that the results fit a fixed width string dtype, which NumPy would silently truncate them to.
+
+    Raises
+    ------
+    ValueError
+        If a result is longer than the itemsize of `dtype`.
+
+    """
+    if dtype.kind not in "SU":
+        return
+    width = dtype.itemsize // (4 if dtype.kind == "U" else 1)
+    items = results if max_len is None else (item for sequence in results for item in sequence[:max_len])
+    for item in items:
+        length = len(item) if isinstance(item, str | bytes) else len(str(item))
+        if length > width:
+            msg = f"result {item!r} does not fit the output dtype {dtype}, set a wider out_dtype"
+            raise ValueError(msg)
+
+
+def _write_dense(results: list, target: np.ndarray, max_len: int | None, pad: Any) -> None:
+    """Write flat results into `target`, one row of `max_len` items per result if `max_len` is set.
+
+    Raises
+    ------
+    ValueError
+        If a result does not fit a fixed width string `target`.
+
+    """
+    _check_width(results, target.dtype, max_len)
+    if max_len is None:
+        target[:] = results
+        return
+    for row, sequence in zip(target, results, strict=True):
+        n = min(len(sequence), max_len)
+        row[:n] = sequence[:n]
+        row[n:] = pad
+
+
+@dataclass
+class ProcessingStats:
+    """Instrumentation of a `process_text_array` call.
+
+    Attributes
+    ----------
+    elements : int
+        The number of elements in the text array.
+    distinct : int | None
+        The number of distinct elements `f` was applied to, in dedup mode.
+    validation_seconds : float
+        The time spent validating and flattening the input.
+    apply_seconds : float
+        The wall time spent applying `f`, pool scheduling included.
+    total_seconds : float
+        The wall time of the whole call.
+    f_latencies : np.ndarray
+        The latency in seconds of every call to `f`, per element or per batch.
+    peak_memory_bytes : int
+        The peak memory allocated by the calling process during the call, as traced by
+        `tracemalloc`, the allocations of worker processes are not included.
+
+    """
+
+    elements: int = 0
+    distinct: int | None = None
+    validation_seconds: float = 0.0
+    apply_seconds: float = 0.0
+    total_seconds: float = 0.0
+    f_latencies: np.ndarray = field(default_factory=lambda: np.empty(0))
+    peak_memory_bytes: int = 0
+
+    @property
+    def calls(self) -> int:
+        """The number of calls to `f`."""
+        return len(self.f_latencies)
+
+    @property
+    def f_total_seconds(self) -> float:
+        """The cumulated latency of the calls to `f`."""
+        return float(self.f_latencies.sum())
+
+    @property
+    def elements_per_second(self) -> float:
+        """The throughput of the whole call."""
+        return self.elements / self.total_seconds if self.total_seconds else 0.0
+
+    @property
+    def dedup_ratio(self) -> float | None:
+        """The ratio of distinct to total elements in dedup mode."""
+        if self.distinct is None:
+            return None
+        return self.distinct / self.elements if self.elements else 1.0
+
+    def f_latency_percentile(self, q: float) -> float:
+        """Compute a percentile of the latency of `f`.
+
+        Parameters
+        ----------
+        q : float
+            The percentile to compute, between 0 and 100.
+
+        Returns
+        -------
+        float
+            The percentile in seconds, 0 if `f` was not called.
+
+        """
+        return float(np.percentile(self.f_latencies, q)) if self.calls else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summarise the statistics, e.g. for logging or JSON serialisation.
+
+        Returns
+        -------
+        dict[str, Any]
+            The statistics, with the 50th, 95th and 99th percentiles of the latency of `f`.
+
+        """
+        return {
+            "elements": self.elements,
+            "distinct": self.distinct,
+            "dedup_ratio": self.dedup_ratio,
+            "calls": self.calls,
+            "validation_seconds": self.validation_seconds,
+            "apply_seconds": self.apply_seconds,
+            "total_seconds": self.total_seconds,
+            "f_total_seconds": self.f_total_seconds,
+            "f_latency_p50_seconds": self.f_latency_percentile(50),
+            "f_latency_p95_seconds": self.f_latency_percentile(95),
+            "f_latency_p99_seconds": self.f_latency_percentile(99),
+            "elements_per_second": self.elements_per_second,
+            "peak_memory_bytes": self.peak_memory_bytes,
+        }
+
+
+@contextmanager
+def _instrumentation(on_stats: Callable[[ProcessingStats], None] | None) -> Iterator[ProcessingStats | None]:
+    """Provide the statistics to fill, if `on_stats` is set, timing the block and tracing its memory peak."""
+    if on_stats is None:
+        yield None
+        return
+    stats = ProcessingStats()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.total_seconds = time.perf_counter() - started
+        stats.peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+        if not tracing:
+            tracemalloc.stop()
+    on_stats(stats)
+
+
+def process_text_array(
+    x: list | RaggedArray,
+    f: Callable[[str], Any] | Callable[[list[str]], Sequence[Any]],
+    *,
+    dedup: bool = False,
+    workers: int | None = None,
+    executor: Executor | Literal["process", "thread"] | None = None,
+    chunksize: int | None = None,
+    batch_size: int | None = None,
+    out_dtype: npt.DTypeLike | None = None,
+    out: np.ndarray | None = None,
+    max_len: int | None = None,
+    pad: Any = 0,
+    on_stats: Callable[[ProcessingStats], None] | None = None,
+) -> list | np.ndarray | RaggedArray:
+    """Apply a transformation function to each string in a nested text array.
+
+    The shape of `x` is checked once, `f` is then applied over a flat view of its
+    elements and the nested output is rebuilt from the results.
+
+    Parameters
+    ----------
+    x : list | RaggedArray
+        A (possibly nested) list of strings that should form a balanced array, or a ragged
+        array whose sub-lists may have different lengths, in which case `f` only runs over
+        its values and a ragged array with the same offsets is returned.
+    f : Callable[[str], Any] | Callable[[list[str]], Sequence[Any]]
+        A function applied to each string element or, if `batch_size` is set, a batch
+        function applied to lists of string elements and returning one result per element.
+    dedup : bool, default False
+        If True, `f` is called only once per distinct string and its result is shared
+        by every occurrence of that string, the dedup ratio (distinct / total) is logged.
+        Worthwhile when `x` repeats many strings and `f` is expensive.
+    workers : int | None, default None
+        If set, the flattened array is split in chunks that are processed on a pool of
+        `workers` processes (or threads), and the results put back in the original order.
+        For a process pool `f` must be picklable (e.g. a module level function), otherwise
+        it runs serially with a warning.
+    executor : Executor | Literal["process", "thread"] | None, default None
+        The kind of pool to create with `workers`, "process" (the default) for CPU bound `f`,
+        "thread" for I/O bound `f` where `workers` bounds the number of calls in flight.
+        An existing executor can be given instead, it is left running.
+    chunksize : int | None, default None
+        The number of elements sent to a worker at once, by default about four chunks per
+        worker. Larger chunks amortise the inter-process overhead for cheap `f`, smaller
+        ones balance the load when the cost of `f` varies a lot across elements.
+    batch_size : int | None, default None
+        If set, `f` is a batch function called over the flattened elements with lists of up
+        to `batch_size` strings, which removes the per element call overhead for vectorised
+        transformations such as tokenizers.
+    out_dtype : npt.DTypeLike | None, default None
+        If set, the results are written straight into a new ndarray of this dtype shaped
+        like `x`, instead of a nested list. Meant for numeric or fixed width results such as
+        token ids, lengths or hashes, results longer than a fixed width string dtype raise
+        a ValueError instead of being truncated.
+    out : np.ndarray | None, default None
+        A preallocated C-contiguous ndarray shaped like `x` to write the results into,
+        instead of a nested list.
+    max_len : int | None, default None
+        Only with `out_dtype`/`out`, `f` returns sequences (e.g. token ids) that are truncated
+        or padded to `max_len` items to fill a trailing dimension of the output array.
+    pad : Any, default 0
+        The value padding the sequences shorter than `max_len`.
+    on_stats : Callable[[ProcessingStats], None] | None, default None
+        If set, the call is instrumented and this callback receives its `ProcessingStats`
+        (validation time, latency of `f`, throughput, peak memory) once it completes.
+        Instrumentation traces memory allocations, which slows processing down; without
+        a callback it costs next to nothing.
+
+    Returns
+    -------
+    list | np.ndarray | RaggedArray
+        A nested list with the same structure as `x` containing transformed items, or the
+        output array if `out_dtype`/`out` is set. If `x` is a ragged array, a ragged array
+        whose values are the transformed items (the output array for `out_dtype`/`out`).
+
+    Raises
+    ------
+    ValueError
+        If `x` cannot be converted to a balanced NumPy array, `workers`/`chunksize`/`batch_size`/`max_len`
+        are not positive, `executor` is an unknown kind of pool, a batch function returns a
+        different number of results than it was given elements, `max_len` is set without an
+        output array, `out` does not match the shape of `x` (of its values, if ragged) or a
+        result does not fit a fixed width string output dtype.
+
+    """
+    _check_positive("workers", workers)
+    _check_positive("chunksize", chunksize)
+    _check_positive("batch_size", batch_size)
+    _check_positive("max_len", max_len)
+    dense = out is not None or out_dtype is not None
+    if max_len is not None and not dense:
+        msg = "max_len requires an output array, set out_dtype or out"
+        raise ValueError(msg)
+
+    with _instrumentation(on_stats) as stats:
+        started = time.perf_counter()
+        if isinstance(x, RaggedArray):
+            flat = list(x.values)
+            shape = (len(flat),)
+        else:
+            flat, shape = _flatten_balanced(x)
+        if dense:
+            result = _dense_output(shape, out, out_dtype, max_len)
+            trailing = () if max_len is None else (max_len,)
+        validated = time.perf_counter()
+
+        if dedup:
+            uniques, inverse = _deduplicate(flat)
+        latencies = None if stats is None else []
+        with _executor_scope(executor, workers) as _executor:
+            results = _apply(uniques if dedup else flat, f, _executor, workers, chunksize, batch_size, latencies)
+        applied = time.perf_counter()
+
+        if dense:
+            target = result.reshape(len(flat), *trailing)
+            if dedup:
+                unique_target = np.empty((len(uniques), *trailing), dtype=result.dtype)
+                _write_dense(results, unique_target, max_len, pad)
+                target[:] = unique_target[np.asarray(inverse, dtype=np.intp)]
+            else:
+                _write_dense(results, target, max_len, pad)
+        else:
+            if dedup:
+                results = [results[i] for i in inverse]
+            result = _unflatten(results, shape)
+
+        if stats is not None:
+            stats.elements = len(flat)
+            stats.distinct = len(uniques) if dedup else None
+            stats.validation_seconds = validated - started
+            stats.apply_seconds = applied - validated
+            stats.f_latencies = np.asarray(latencies, dtype=np.float64)
+    return x.with_values(result) if isinstance(x, RaggedArray) else result
+
+
+def _iter_process_rows(
+    rows: Iterable[Any],
+    f: Callable[[Any], Any],
+    workers: int | None,
+    executor: Executor | Literal["process", "thread"] | None,
+    chunksize: int | None,
+    batch_size: int | None,
+    block_size: int,
+) -> Iterator[Any]:
+    """Transform `rows` block by block, see `iter_process_text_array`."""
+    rows = iter(rows)
+    shape = None
+    size = 0
+    index = 0
+    with _executor_scope(executor, workers) as _executor:
+        while block := list(islice(rows, block_size)):
+            flat = []
+            for row in block:
+                try:
+                    row_flat, row_shape = _flatten(row)
+                except ValueError as e:
+                    msg = f"row {index} must be a balanced array, convertible to a numpy array. Error: {e}"
+                    raise ValueError(msg) from e
+                if shape is None:
+                    shape = row_shape
+                    size = len(row_flat)
+                elif row_shape != shape:
+                    msg = f"row {index} has shape {row_shape}, expected {shape} as the first row"
+                    raise ValueError(msg)
+                flat.extend(row_flat)
+                index += 1
+            results = _apply(flat, f, _executor, workers, chunksize, batch_size)
+            for i in range(len(block)):
+                yield _unflatten(results[i * size : (i + 1) * size], shape)
+
+
+def iter_process_text_array(
+    rows: Iterable[Any],
+    f: Callable[[str], Any] | Callable[[list[str]], Sequence[Any]],
+    *,
+    workers: int | None = None,
+    executor: Executor | Literal["process", "thread"] | None = None,
+    chunksize: int | None = None,
+    batch_size: int | None = None,
+    block_size: int = 1024,
+) -> Iterator[Any]:
+    """Lazily apply a transformation function to each string of a stream of text array rows.
+
+    The streaming counterpart of `process_text_array`, for text arrays too large to be
+    materialised: only `block_size` top level rows are held in memory at any time. Each
+    row must be balanced and have the same shape as the first one.
+
+    Parameters
+    ----------
+    rows : Iterable[Any]
+        The top level rows of the text array, each one a string or a (possibly nested)
+        list of strings, e.g. a generator reading a corpus from disk.
+    f : Callable[[str], Any] | Callable[[list[str]], Sequence[Any]]
+        A function applied to each string element, or a batch function if `batch_size` is set.
+    workers : int | None, default None
+        The number of workers of the pool processing each block, see `process_text_array`.
+    executor : Executor | Literal["process", "thread"] | None, default None
+        The kind of pool to create with `workers`, or an existing executor, see `process_text_array`.
+    chunksize : int | None, default None
+        The number of elements sent to a worker at once, see `process_text_array`.
+    batch_size : int | None, default None
+        If set, `f` is a batch function called with lists of up to `batch_size` strings.
+    block_size : int, default 1024
+        The number of rows read from `rows` and transformed together, larger blocks give
+        more room to batches and pools, smaller ones a lower memory footprint and latency.
+
+    Returns
+    -------
+    Iterator[Any]
+        The transformed rows, in the order of `rows`.
+
+    Raises
+    ------
+    ValueError
+        If an option is not positive, or (while iterating) a row is unbalanced or its shape
+        differs from the first row's.
+
+    """
+    _check_positive("workers", workers)
+    _check_positive("chunksize", chunksize)
+    _check_positive("batch_size", batch_size)
+    _check_positive("block_size", block_size)
+    return _iter_process_rows(rows, f, workers, executor, chunksize, batch_size, block_size)
+
+
+async def _apply_async(values: list, f: Callable[[str], Awaitable[Any] | Any], concurrency: int) -> list:
+    """Apply `f` to every value with at most `concurrency` calls in flight, keeping the input order."""
+    results = [None] * len(values)
+    positions = iter(range(len(values)))
+
+    async def worker() -> None:
+        # the workers share the positions iterator, each one picks the next value as soon as it is free
+        for i in positions:
+            result = f(values[i])
+            results[i] = await result if inspect.isawaitable(result) else result
+
+    async with asyncio.TaskGroup() as group:
+        for _ in range(min(concurrency, len(values))):
+            group.create_task(worker())
+    return results
+
+
+async def process_text_array_async(
+    x: list,
+    f: Callable[[str], Awaitable[Any] | Any],
+    *,
+    concurrency: int = 64,
+    dedup: bool = False,
+) -> list:
+    """Apply a coroutine function to each string in a nested text array, concurrently.
+
+    Suited to I/O bound transformations (e.g. calls to an embedding server or a key-value
+    store), the calls are interleaved on the running event loop.
+
+    Parameters
+    ----------
+    x : list
+        A (possibly nested) list of strings that should form a balanced array.
+    f : Callable[[str], Awaitable[Any] | Any]
+        A coroutine function (`async def f(s)`) applied to each string element, plain
+        functions are accepted too.
+    concurrency : int, default 64
+        The maximum number of calls to `f` in flight at any time.
+    dedup : bool, default False
+        If True, `f` is called only once per distinct string, see `process_text_array`.
+
+    Returns
+    -------
+    list
+        A nested list with the same structure as `x` containing transformed items.
+
+    Raises
+    ------
+    ValueError
+        If `x` cannot be converted to a balanced NumPy array or `concurrency` is not positive.
+
+    """
+    _check_positive("concurrency", concurrency)
+
+    flat, shape = _flatten_balanced(x)
+    if dedup:
+        uniques, inverse = _deduplicate(flat)
+        unique_results = await _apply_async(uniques, f, concurrency)
+        results = [unique_results[i] for i in inverse]
+    else:
+        results = await _apply_async(flat, f, concurrency)
+    return _unflatten(results, shape)
+
+
+def _read_npy_header(fp: IO[bytes], name: str) -> tuple[tuple[int, ...], bool, np.dtype]:
+    """Read and validate the header of a .npy stream, leaving `fp` at the start of the data.
+
+    Raises
+    ------
+    ValueError
+        If the stored array is an object array, which may be unbalanced, or a scalar.
+
+    """
+    version = np.lib.format.read_magic(fp)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fp)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fp)
+    if dtype.hasobject:
+        msg = f"{name} must hold a balanced array, found an object array (dtype {dtype}) which may be unbalanced"
+        raise ValueError(msg)
+    if not shape:
+        msg = f"{name} must hold a balanced array, found a scalar"
+        raise ValueError(msg)
+    return shape, fortran_order, dtype
+
+
+@contextmanager
+def _open_text_file(
+    src: Path, key: str | None
+) -> Iterator[tuple[tuple[int, ...], bool, np.dtype, Callable[[int, int], np.ndarray]]]:
+    """Open a .npy or .npz input without loading its data.
+
+    Provides the shape, memory order and dtype read from the header, plus a function
+    reading the elements `[start, stop)` in storage order. A .npy file is memory-mapped,
+    a .npz member is streamed from the archive, as zip members cannot be memory-mapped.
+
+    Raises
+    ------
+    ValueError
+        If `key` does not designate a single member of a .npz archive, or the header is invalid.
+
+    """
+    if src.suffix != ".npz":
+        with src.open("rb") as fp:
+            shape, fortran_order, dtype = _read_npy_header(fp, str(src))
+        data = np.load(src, mmap_mode="r", allow_pickle=False)
+        flat = data.reshape(-1, order="F" if fortran_order else "C")
+        yield shape, fortran_order, dtype, lambda start, stop: flat[start:stop]
+        return
+
+    with zipfile.ZipFile(src) as archive:
+        members = [name.removesuffix(".npy") for name in archive.namelist()]
+        if key is None and len(members) == 1:
+            key = members[0]
+        if key not in members:
+            msg = f"key must be one of the arrays in {src}: {members}, got {key!r}"
+            raise ValueError(msg)
+        with archive.open(f"{key}.npy") as fp:
+            shape, fortran_order, dtype = _read_npy_header(fp, f"{src}[{key}]")
+
+            def read(start: int, stop: int) -> np.ndarray:
+                # members are read sequentially, chunks are requested in order
+                return np.frombuffer(fp.read((stop - start) * dtype.itemsize), dtype=dtype)
+
+            yield shape, fortran_order, dtype, read
+
+
+def process_text_file(
+    src: str | os.PathLike,
+    dst: str | os.PathLike,
+    f: Callable[[str], Any] | Callable[[list[str]], Sequence[Any]],
+    *,
+    key: str | None = None,
+    out_dtype: npt.DTypeLike | None = None,
+    max_len: int | None = None,
+    pad: Any = 0,
+    chunk_elements: int = 65536,
+    workers: int | None = None,
+    executor: Executor | Literal["process", "thread"] | None = None,
+    chunksize: int | None = None,
+    batch_size: int | None = None,
+) -> Path:
+    """Apply a transformation function to each string of a text array stored on disk, into a new .npy file.
+
+    The input is opened without loading it, its shape is validated from the file header
+    and its elements are processed `chunk_elements` at a time and written to a
+    memory-mapped output file, so resident memory stays bounded by the chunk size
+    whatever the size of the dataset.
+
+    Parameters
+    ----------
+    src : str | os.PathLike
+        The input .npy file, memory-mapped, or .npz archive, whose member is streamed.
+    dst : str | os.PathLike
+        The output .npy file, shaped like the input plus a trailing `max_len` dimension if set.
+    f : Callable[[str], Any] | Callable[[list[str]], Sequence[Any]]
+        A function applied to each string element, or a batch function if `batch_size` is set.
+    key : str | None, default None
+        The array to process in a .npz archive, optional if the archive holds a single array.
+    out_dtype : npt.DTypeLike | None, default None
+        The dtype of the output, by default the dtype of the input. Results longer than a
+        fixed width string dtype raise a ValueError instead of being truncated.
+    max_len : int | None, default None
+        If set, `f` returns sequences that are truncated or padded to `max_len` items.
+    pad : Any, default 0
+        The value padding the sequences shorter than `max_len`.
+    chunk_elements : int, default 65536
+        The number of elements read, transformed and written at once.
+    workers : int | None, default None
+        The number of workers of the pool processing each chunk, see `process_text_array`.
+    executor : Executor | Literal["process", "thread"] | None, default None
+        The kind of pool to create with `workers`, or an existing executor, see `process_text_array`.
+    chunksize : int | None, default None
+        The number of elements sent to a worker at once, see `process_text_array`.
+    batch_size : int | None, default None
+        If set, `f` is a batch function called with lists of up to `batch_size` strings.
+
+    Returns
+    -------
+    Path
+        The path of the output file.
+
+    Raises
+    ------
+    ValueError
+        If an option is not positive, the input holds an object array or a scalar, `key`
+        does not designate a single array of a .npz archive, or a result does not fit a fixed
+        width string output dtype.
+
+    """
+    _check_positive("workers", workers)
+    _check_positive("chunksize", chunksize)
+    _check_positive("batch_size", batch_size)
+    _check_positive("max_len", max_len)
+    _check_positive("chunk_elements", chunk_elements)
+    src, dst = Path(src), Path(dst)
+    trailing = () if max_len is None else (max_len,)
+
+    with _open_text_file(src, key) as (shape, fortran_order, dtype, read):
+        order = "F" if fortran_order else "C"
+        output = np.lib.format.open_memmap(
+            dst,
+            mode="w+",
+            dtype=dtype if out_dtype is None else out_dtype,
+            shape=(*shape, *trailing),
+            fortran_order=fortran_order,
+        )
+        size = math.prod(shape)
+        target = output.reshape(size, *trailing, order=order)
+        with _executor_scope(executor, workers) as _executor:
+            for start in range(0, size, chunk_elements):
+                stop = min(start + chunk_elements, size)
+                results = _apply(read(start, stop).tolist(), f, _executor, workers, chunksize, batch_size)
+                _write_dense(results, target[start:stop], max_len, pad)
+        output.flush()
+        del target, output
+    return dst
+
+
+_MAP, _FILTER, _PAD_TRUNCATE = "map", "filter", "pad_truncate"
+
+
+class _FusedSteps:
+    """A single callable running a chain of per element steps, picklable as long as the steps are."""
+
+    def __init__(self, steps: tuple[tuple[str, Any, Any], ...]) -> None:
+        self._steps = steps
+
+    def __call__(self, value: Any) -> Any:
+        """Run every step on `value`, stopping at the first filter it does not pass."""
+        for kind, a, b in self._steps:
+            if kind == _MAP:
+                value = a(value)
+            elif kind == _FILTER:
+                if not a(value):
+                    return b
+            else:
+                value = list(value[:a])
+                if len(value) < a:
+                    value.extend([b] * (a - len(value)))
+        return value
+
+
+class TextPipeline:
+    """A chain of per element steps applied to a text array in a single pass.
+
+    Chaining `process_text_array(process_text_array(x, f1), f2)` validates `x` and builds a
+    full nested output for every step, whereas a pipeline fuses its steps into one function
+    that is applied once per element.
+
+    Pipelines are immutable, each step method returns a new pipeline.
+
+    Examples
+    --------
+    >>> pipeline = TextPipeline().map(str.lower).filter(str.isalpha, sentinel="<unk>").map(str.upper)
+    >>> pipeline.run([["The", "cat"], ["sat", "!"]])
+    [['THE', 'CAT'], ['SAT', '<unk>']]
+
+    """
+
+    def __init__(self, steps: tuple[tuple[str, Any, Any], ...] = ()) -> None:
+        """Initialize the pipeline.
+
+        Parameters
+        ----------
+        steps : tuple[tuple[str, Any, Any], ...], default ()
+            The steps of the pipeline, use the step methods to build them.
+
+        """
+        self._steps = steps
+
+    def map(self, f: Callable[[Any], Any]) -> "TextPipeline":
+        """Add a step transforming each element with `f`.
+
+        Parameters
+        ----------
+        f : Callable[[Any], Any]
+            The function applied to each element.
+
+        Returns
+        -------
+        TextPipeline
+            A new pipeline with the step added.
+
+        """
+        return TextPipeline((*self._steps, (_MAP, f, None)))
+
+    def filter(self, predicate: Callable[[Any], bool], sentinel: Any = None) -> "TextPipeline":
+        """Add a step replacing the elements not satisfying `predicate` with `sentinel`.
+
+        The remaining steps are skipped for the replaced elements.
+
+        Parameters
+        ----------
+        predicate : Callable[[Any], bool]
+            The function telling which elements to keep.
+        sentinel : Any, default None
+            The value replacing the elements that are not kept.
+
+        Returns
+        -------
+        TextPipeline
+            A new pipeline with the step added.
+
+        """
+        return TextPipeline((*self._steps, (_FILTER, predicate, sentinel)))
+
+    def pad_truncate(self, max_len: int, pad: Any = None) -> "TextPipeline":
+        """Add a step turning each element, a sequence such as a list of tokens, into a list of `max_len` items.
+
+        Parameters
+        ----------
+        max_len : int
+            The length of the resulting lists, longer sequences are truncated.
+        pad : Any, default None
+            The value appended to shorter sequences.
+
+        Returns
+        -------
+        TextPipeline
+            A new pipeline with the step added.
+
+        Raises
+        ------
+        ValueError
+            If `max_len` is negative.
+
+        """
+        if max_len < 0:
+            msg = f"max_len must not be negative, got {max_len}"
+            raise ValueError(msg)
+        return TextPipeline((*self._steps, (_PAD_TRUNCATE, max_len, pad)))
+
+    def compile(self) -> Callable[[Any], Any]:
+        """Compile the chain of steps into a single function.
+
+        The function applies every step to one element, without building any intermediate
+        collection between steps. It can be passed as `f` to any of the text array functions.
+
+        Returns
+        -------
+        Callable[[Any], Any]
+            The fused function, picklable when all the step functions are.
+
+        """
+        return _FusedSteps(self._steps)
+
+    def run(self, x: list | RaggedArray, **kwargs: Any) -> list | np.ndarray | RaggedArray:
+        """Apply the pipeline to a nested text array in a single pass.
+
+        Parameters
+        ----------
+        x : list | RaggedArray
+            A (possibly nested) list of strings that should form a balanced array, or a ragged array.
+        **kwargs : Any
+            Options of `process_text_array` (e.g. `dedup`, `workers`, `executor`).
+
+        Returns
+        -------
+        list | np.ndarray | RaggedArray
+            The transformed items, see `process_text_array`.
+
+        """
+        return process_text_array(x, self.compile(), **kwargs)
+
+    def iter(self, rows: Iterable[Any], **kwargs: Any) -> Iterator[Any]:
+        """Lazily apply the pipeline to a stream of text array rows.
+
+        Parameters
+        ----------
+        rows : Iterable[Any]
+            The top level rows of the text array.
+        **kwargs : Any
+            Options of `iter_process_text_array` (e.g. `block_size`, `workers`).
+
+        Returns
+        -------
+        Iterator[Any]
+            The transformed rows, in the order of `rows`.
 
-    return multidim_process(x=x, f=f)
+        """
+        return iter_process_text_array(rows, self.compile(), **kwargs)
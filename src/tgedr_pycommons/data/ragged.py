@@ -0,0 +1,194 @@
+"""Ragged (offsets based) representation of nested text arrays."""
+
+from collections.abc import Sequence
+from typing import Any
+import numpy as np
+
+
+_SEQUENCE_TYPES = (list, tuple)
+
+
+class RaggedArray:
+    """A nested list whose sub-lists may have different lengths, stored as flat buffers.
+
+    The layout follows Arrow list arrays: the leaves are kept, in row-major order, in one
+    flat `values` buffer, and each level of nesting below the top one is described by an
+    offsets array. The sub-lists of level `k` are delimited by `offsets[k][i]:offsets[k][i + 1]`,
+    which index the sub-lists of level `k + 1`, or `values` for the innermost level.
+
+    Examples
+    --------
+    >>> ragged = RaggedArray.from_nested([["Apple", "looking"], ["cars"], []])
+    >>> ragged.values
+    ['Apple', 'looking', 'cars']
+    >>> [o.tolist() for o in ragged.offsets]
+    [[0, 2, 3, 3]]
+    >>> ragged.to_nested()
+    [['Apple', 'looking'], ['cars'], []]
+
+    """
+
+    def __init__(self, values: Sequence[Any], offsets: Sequence[Sequence[int]] = ()) -> None:
+        """Initialize the ragged array from its buffers.
+
+        Parameters
+        ----------
+        values : Sequence[Any]
+            The leaves, in row-major order.
+        offsets : Sequence[Sequence[int]], default ()
+            One offsets array per level of nesting below the top one, outermost first.
+
+        Raises
+        ------
+        ValueError
+            If the offsets are not consistent with each other and with `values`.
+
+        """
+        self._values = values
+        self._offsets = tuple(np.asarray(o, dtype=np.int64) for o in offsets)
+        for level, o in enumerate(self._offsets):
+            size = len(values) if level == len(self._offsets) - 1 else len(self._offsets[level + 1]) - 1
+            if o.ndim != 1 or len(o) == 0 or o[0] != 0 or o[-1] != size or np.any(np.diff(o) < 0):
+                msg = f"offsets[{level}] must be a non-decreasing 1-D array going from 0 to {size}"
+                raise ValueError(msg)
+
+    @property
+    def values(self) -> Sequence[Any]:
+        """The leaves, in row-major order."""
+        return self._values
+
+    @property
+    def offsets(self) -> tuple[np.ndarray, ...]:
+        """The offsets arrays, outermost level first."""
+        return self._offsets
+
+    @property
+    def depth(self) -> int:
+        """The number of levels of nesting, 1 for a flat list."""
+        return len(self._offsets) + 1
+
+    def __len__(self) -> int:
+        """Return the number of top level items."""
+        return len(self._offsets[0]) - 1 if self._offsets else len(self._values)
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the buffers of two ragged arrays."""
+        if not isinstance(other, RaggedArray):
+            return NotImplemented
+        return (
+            len(self._offsets) == len(other.offsets)
+            and all(np.array_equal(a, b) for a, b in zip(self._offsets, other.offsets, strict=True))
+            and _as_list(self._values) == _as_list(other.values)
+        )
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        """Return a developer friendly representation."""
+        return f"RaggedArray(values={self._values!r}, offsets={[o.tolist() for o in self._offsets]!r})"
+
+    def with_values(self, values: Sequence[Any]) -> "RaggedArray":
+        """Create a ragged array with the same nesting and new leaves.
+
+        Parameters
+        ----------
+        values : Sequence[Any]
+            The new leaves, one per leaf of this array.
+
+        Returns
+        -------
+        RaggedArray
+            The new ragged array, sharing the offsets of this one.
+
+        Raises
+        ------
+        ValueError
+            If `values` does not have as many leaves as this array.
+
+        """
+        if len(values) != len(self._values):
+            msg = f"expected {len(self._values)} values, got {len(values)}"
+            raise ValueError(msg)
+        return RaggedArray(values, self._offsets)
+
+    @classmethod
+    def from_nested(cls, x: Sequence[Any]) -> "RaggedArray":
+        """Convert a (possibly unbalanced) nested list into a ragged array.
+
+        All the leaves must be at the same depth, the sub-lists may have any length.
+
+        Parameters
+        ----------
+        x : Sequence[Any]
+            The nested list (or tuple) to convert.
+
+        Returns
+        -------
+        RaggedArray
+            The ragged array.
+
+        Raises
+        ------
+        ValueError
+            If `x` is not a sequence or its leaves are not all at the same depth.
+
+        """
+        if not isinstance(x, _SEQUENCE_TYPES):
+            msg = f"x must be a list or a tuple, got {type(x).__name__}"
+            raise ValueError(msg)  # noqa: TRY004
+
+        depth = _leaf_depth(x)
+        values = []
+        offsets = [[0] for _ in range(depth - 1)]
+
+        def walk(node: Sequence[Any], level: int) -> None:
+            if level == depth - 1:
+                if any(isinstance(item, _SEQUENCE_TYPES) for item in node):
+                    msg = f"found a nested sequence at depth {depth}, expected a leaf"
+                    raise ValueError(msg)
+                values.extend(node)
+                return
+            for child in node:
+                if not isinstance(child, _SEQUENCE_TYPES):
+                    msg = f"found a leaf at depth {level + 1}, expected a sequence"
+                    raise ValueError(msg)  # noqa: TRY004
+                walk(child, level + 1)
+                offsets[level].append(len(values) if level == depth - 2 else len(offsets[level + 1]) - 1)
+
+        walk(x, 0)
+        return cls(values, offsets)
+
+    def to_nested(self) -> list:
+        """Convert the ragged array back into a nested list.
+
+        Returns
+        -------
+        list
+            The nested list.
+
+        """
+        result = _as_list(self._values)
+        for o in reversed(self._offsets):
+            bounds = o.tolist()
+            result = [result[bounds[i] : bounds[i + 1]] for i in range(len(bounds) - 1)]
+        return result
+
+
+def _as_list(values: Sequence[Any]) -> list:
+    """Convert a values buffer, a list or an ndarray, into a list."""
+    return values.tolist() if isinstance(values, np.ndarray) else list(values)
+
+
+def _leaf_depth(x: Sequence[Any]) -> int:
+    """Find the number of levels of nesting of `x`, from its first leaf or, lacking leaves, its deepest sequence."""
+    deepest = 1
+    stack = [(x, 1)]
+    while stack:
+        node, level = stack.pop()
+        deepest = max(deepest, level)
+        # children are pushed in reverse so that the first leaf in row-major order is found first
+        for child in reversed(node):
+            if not isinstance(child, _SEQUENCE_TYPES):
+                return level
+            stack.append((child, level + 1))
+    return deepest
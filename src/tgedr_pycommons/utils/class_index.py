@@ -0,0 +1,146 @@
+"""In memory index of the class hierarchies of packages.
+
+`UtilsReflection.find_class_implementations` goes through every class of every module of the
+packages on each query, and keeps one class per module. A `ClassIndex` imports and goes through
+the packages once, recording for each base class all its concrete subclasses, direct or not,
+defined in the packages or imported there (re-exported) from elsewhere. Queries are then
+dictionary lookups.
+
+The index follows the modules of its packages imported after it was built, e.g. the plugins a
+module imports lazily: each query first checks if new modules were loaded, and indexes them.
+Reloaded modules are not detected, `invalidate` indexes them again. Hierarchies come from the
+MRO, classes only registered with an ABC (`ABC.register`, `__subclasshook__`) are not indexed.
+"""
+
+import inspect
+import logging
+import sys
+from types import ModuleType
+
+from tgedr_pycommons.utils.reflection import UtilsReflection
+
+
+logger = logging.getLogger(__name__)
+
+
+class ClassIndex:
+    """Index of the concrete subclasses of the classes found in the modules of packages."""
+
+    def __init__(self, packages: str, workers: int | None = None) -> None:
+        """Build the index, importing the modules of the packages.
+
+        Args:
+            packages: Comma-separated list of package names.
+            workers: Optional number of threads importing the modules, see `UtilsReflection.import_modules`.
+        """
+        self.packages = [a.strip() for a in packages.split(",")]
+        self._prefixes = tuple(package + "." for package in self.packages)
+        # module name -> the classes found in it
+        self._modules: dict[str, list[type]] = {}
+        # class -> the modules it was found in
+        self._locations: dict[type, dict[str, None]] = {}
+        # base class -> its concrete subclasses
+        self._subclasses: dict[type, dict[type, None]] = {}
+        self._modules_seen = 0
+
+        modules = [module for package in self.packages for module in UtilsReflection.find_package_modules(package)]
+        UtilsReflection.import_modules(modules, workers)
+        for module in modules:
+            self._add(module, sys.modules[module])
+        self._modules_seen = len(sys.modules)
+
+    def __len__(self) -> int:
+        """Return the number of indexed modules."""
+        return len(self._modules)
+
+    def subclasses(self, clazz: type) -> list[type]:
+        """Get the concrete subclasses of a class, direct or not, found in the packages.
+
+        Args:
+            clazz: Parent class.
+
+        Returns:
+            The subclasses, in the order they were indexed.
+        """
+        self.refresh()
+        return list(self._subclasses.get(clazz, ()))
+
+    def modules(self, clazz: type) -> list[str]:
+        """Get the modules of the packages a class was found in, where it is defined or imported.
+
+        Args:
+            clazz: The class.
+
+        Returns:
+            The module names, in the order they were indexed.
+        """
+        self.refresh()
+        return list(self._locations.get(clazz, ()))
+
+    def find_class_implementations(self, clazz: type) -> dict[str, list[type]]:
+        """Find the implementations of a class, all of them for each module.
+
+        Args:
+            clazz: Parent class to find implementations of.
+
+        Returns:
+            Dictionary mapping implementation names, the module names as in
+            `UtilsReflection.find_class_implementations`, to the subclasses found in the module.
+
+        Raises:
+            UtilsReflectionException: If two modules give the same implementation name, see
+                `UtilsReflection.implementation_names`.
+        """
+        found: dict[str, list[type]] = {}
+        for subclass in self.subclasses(clazz):
+            for module in self._locations[subclass]:
+                found.setdefault(module, []).append(subclass)
+        names = UtilsReflection.implementation_names(found)
+        return {names[module]: subclasses for module, subclasses in found.items()}
+
+    def refresh(self) -> None:
+        """Index the modules of the packages imported since the last refresh.
+
+        It only goes through the loaded modules when their number changed, making it cheap enough to
+        run before each query.
+        """
+        if len(sys.modules) == self._modules_seen:
+            return
+        for name, module in list(sys.modules.items()):
+            if name.startswith(self._prefixes) and name not in self._modules and module is not None:
+                self._add(name, module)
+        self._modules_seen = len(sys.modules)
+
+    def invalidate(self, module: str | None = None) -> None:
+        """Index a module again, or all of them, e.g. after they were reloaded.
+
+        Args:
+            module: The module name, all the indexed modules if None.
+        """
+        modules = list(self._modules) if module is None else [module]
+        for name in modules:
+            self._remove(name)
+        for name in modules:
+            if sys.modules.get(name) is not None:
+                self._add(name, sys.modules[name])
+
+    def _add(self, name: str, module: ModuleType) -> None:
+        # a class bound to several names is indexed once
+        classes = list(dict.fromkeys(obj for obj in vars(module).values() if isinstance(obj, type)))
+        self._modules[name] = classes
+        for clazz in classes:
+            locations = self._locations.setdefault(clazz, {})
+            if not locations and not inspect.isabstract(clazz):
+                for base in clazz.__mro__[1:]:
+                    self._subclasses.setdefault(base, {})[clazz] = None
+            locations[name] = None
+        logger.debug("[ClassIndex] indexed %s, %d classes", name, len(classes))
+
+    def _remove(self, module: str) -> None:
+        for clazz in self._modules.pop(module, ()):
+            locations = self._locations[clazz]
+            del locations[module]
+            if not locations:
+                del self._locations[clazz]
+                for base in clazz.__mro__[1:]:
+                    self._subclasses.get(base, {}).pop(clazz, None)
@@ -0,0 +1,273 @@
+"""Persistent index of the class implementations found in packages.
+
+`UtilsReflection.find_class_implementations` imports every module of the packages it scans.
+A `DiscoveryIndex` remembers, on disk, the classes each module defines and their hierarchy,
+so that a warm start imports nothing to find the implementations, and only imports the one
+actually used, on first access to the returned `LazyClassMapping`.
+
+An indexed module is scanned again when its file, or the file of a module its classes derive
+from, changes: a different size, or a different modification time and content hash. Modules
+not loaded from a regular file, e.g. from a zip file, are scanned on each search. Class
+hierarchies are recorded from their MRO, classes only registered with an ABC (`ABC.register`,
+`__subclasshook__`) are not found from the index. The classes are checked against the parent
+class when imported from the returned mapping.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sys
+from collections.abc import Iterator, Mapping
+from importlib import import_module
+from importlib.metadata import EntryPoint
+from pathlib import Path
+from typing import Any
+
+from tgedr_pycommons.utils.reflection import UtilsReflection
+
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+
+
+class LazyClassMapping(Mapping[str, Any]):
+    """Mapping of implementation names to classes, importing each class on first access."""
+
+    def __init__(self, references: dict[str, tuple[str, str] | EntryPoint], super_class: type | None = None) -> None:
+        """Initialize the mapping.
+
+        Args:
+            references: Implementation names mapped to the module and attribute name of their class,
+                or to the entry point declaring it, loaded with `EntryPoint.load`.
+            super_class: Optional parent class the classes are checked against, when imported.
+        """
+        self._references = references
+        self._super_class = super_class
+        self._classes: dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        """Get the class of an implementation, importing its module if needed.
+
+        Raises:
+            TypeError: If the class is not a subclass of the super class of the mapping.
+        """
+        result = self._classes.get(key)
+        if result is None:
+            reference = self._references[key]
+            if isinstance(reference, EntryPoint):
+                result = reference.load()
+                if self._super_class is not None and not UtilsReflection.is_subclass_of(result, self._super_class):
+                    msg = f"Wrong class type, it is not a subclass of {self._super_class.__name__}"
+                    raise TypeError(msg)
+            elif self._super_class is None:
+                result = getattr(import_module(reference[0]), reference[1])
+            else:
+                result = UtilsReflection.load_subclass_from_module(*reference, self._super_class)
+            self._classes[key] = result
+        return result
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the implementation names."""
+        return iter(self._references)
+
+    def __len__(self) -> int:
+        """Return the number of implementations."""
+        return len(self._references)
+
+    def __repr__(self) -> str:
+        """Return the references of the implementations, without importing them."""
+        return f"LazyClassMapping({ {key: self.reference(key) for key in self._references} })"
+
+    def reference(self, key: str) -> str:
+        """Get the fully qualified name of the class of an implementation, without importing it.
+
+        Args:
+            key: Implementation name.
+
+        Returns:
+            The module and attribute name of the class, e.g. 'package.module.ClassName', or
+            'package.module.Outer.Inner' for a nested class declared as an entry point.
+        """
+        reference = self._references[key]
+        if isinstance(reference, EntryPoint):
+            return f"{reference.module}.{reference.attr}"
+        return ".".join(reference)
+
+
+class DiscoveryIndex:
+    """On-disk index of the classes defined in the modules of packages, and of their hierarchy."""
+
+    def __init__(self, path: str | os.PathLike | None = None) -> None:
+        """Initialize the index, loading it from a file.
+
+        Args:
+            path: The JSON file storing the index, if None the index is kept in memory only.
+        """
+        self.path = Path(path) if path is not None else None
+        self.hits = 0
+        self.misses = 0
+        self._packages: dict[str, dict[str, dict[str, Any]]] = self._load()
+        self._dirty = False
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """The number of modules found in the index (hits) and scanned (misses), and the hit rate."""
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def find_class_implementations_in_package(self, package_name: str, super_class: type) -> dict[str, tuple[str, str]]:
+        """Find all implementations of a class in a package, importing only the modules not indexed yet.
+
+        Args:
+            package_name: Package name to search.
+            super_class: Parent class to find implementations of.
+
+        Returns:
+            Dictionary mapping module names to the module and attribute name of their implementation.
+        """
+        logger.debug("[find_class_implementations_in_package|in] (%s, %s)", package_name, super_class)
+        key = _qualified_name(super_class)
+        indexed = self._packages.get(package_name, {})
+        entries = {}
+        checked: dict[str, bool] = {}
+        for module, path in sorted(UtilsReflection.find_package_modules(package_name).items()):
+            entry = indexed.get(module)
+            if entry is not None and entry["path"] == path and self._is_fresh(entry, checked):
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._dirty = True
+                entry = _scan(module, path)
+            entries[module] = entry
+        if entries.keys() != indexed.keys():
+            self._dirty = True
+        self._packages[package_name] = entries
+
+        result = {}
+        for module, entry in entries.items():
+            # as in UtilsReflection, the last matching class in a module is its implementation
+            for name, mro in entry["classes"].items():
+                if key in mro[1:]:
+                    result[module] = (module, name)
+        logger.debug("[find_class_implementations_in_package|out] => %s", result)
+        return result
+
+    def find_class_implementations(self, packages: str, clazz: Any) -> LazyClassMapping:
+        """Find class implementations across multiple packages, and save the index if it changed.
+
+        Args:
+            packages: Comma-separated list of package names.
+            clazz: Parent class to find implementations of.
+
+        Returns:
+            Mapping of implementation names to classes, imported on first access.
+        """
+        found = {}
+        for package_name in [a.strip() for a in packages.split(",")]:
+            found.update(self.find_class_implementations_in_package(package_name, clazz))
+        names = UtilsReflection.implementation_names(found)
+        references = {names[module]: reference for module, reference in found.items()}
+        if self._dirty:
+            self.save()
+        logger.debug("[find_class_implementations] index stats: %s", self.stats)
+        return LazyClassMapping(references, super_class=clazz)
+
+    def invalidate(self, package_name: str | None = None) -> None:
+        """Forget the modules of a package, or of all packages, so that they are scanned again.
+
+        Args:
+            package_name: The package to forget, all of them if None.
+        """
+        if package_name is None:
+            self._packages.clear()
+        else:
+            self._packages.pop(package_name, None)
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the index to its file, if it has one."""
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps({"version": INDEX_VERSION, "packages": self._packages}))
+        self._dirty = False
+
+    def _load(self) -> dict[str, dict[str, dict[str, Any]]]:
+        if self.path is None or not self.path.is_file():
+            return {}
+        try:
+            content = json.loads(self.path.read_text())
+        except ValueError:
+            logger.warning("[DiscoveryIndex] ignoring the unreadable index %s", self.path)
+            return {}
+        if content.get("version") != INDEX_VERSION:
+            return {}
+        return content["packages"]
+
+    def _is_fresh(self, entry: dict[str, Any], checked: dict[str, bool]) -> bool:
+        """Check a module, and the modules its classes derive from, against their indexed files.
+
+        Args:
+            entry: The indexed module.
+            checked: The files already checked, with their freshness, shared across the modules.
+        """
+        if entry["size"] is None:
+            return False
+        files = {entry["path"]: entry, **entry["dependencies"]}
+        for path, state in files.items():
+            if path not in checked:
+                checked[path] = self._is_file_fresh(path, state)
+            if not checked[path]:
+                return False
+        return True
+
+    def _is_file_fresh(self, path: str, state: dict[str, Any]) -> bool:
+        """Check a file against its indexed size, modification time and, when the time changed, content hash."""
+        try:
+            stat = Path(path).stat()
+        except OSError:
+            return False
+        if stat.st_size != state["size"]:
+            return False
+        if stat.st_mtime_ns != state["mtime_ns"]:
+            if _sha256(path) != state["sha256"]:
+                return False
+            state["mtime_ns"] = stat.st_mtime_ns
+            self._dirty = True
+        return True
+
+
+def _scan(module: str, path: str | None) -> dict[str, Any]:
+    """Import a module and record the hierarchy of its classes, along with the state of its files.
+
+    The files of the modules defining the classes of the hierarchies are recorded as dependencies,
+    the module being scanned again when one of them changes.
+    """
+    members = inspect.getmembers(import_module(module), inspect.isclass)
+    classes = {name: [_qualified_name(cls) for cls in obj.__mro__] for name, obj in members}
+    entry: dict[str, Any] = {"path": path, "mtime_ns": None, "size": None, "sha256": None, "classes": classes}
+    if path is not None and Path(path).is_file():
+        entry.update(_file_state(path))
+    dependencies = {}
+    for _, obj in members:
+        for cls in obj.__mro__:
+            source = getattr(sys.modules.get(cls.__module__), "__file__", None)
+            if source is not None and source != path and source not in dependencies and Path(source).is_file():
+                dependencies[source] = _file_state(source)
+    entry["dependencies"] = dependencies
+    return entry
+
+
+def _file_state(path: str) -> dict[str, Any]:
+    stat = Path(path).stat()
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": _sha256(path)}
+
+
+def _qualified_name(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _sha256(path: str) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
@@ -0,0 +1,80 @@
+"""Discovery of class implementations declared as entry points.
+
+Plugins shipped in their own distributions declare their implementations in their metadata,
+e.g. in their `pyproject.toml`:
+
+    [project.entry-points."myapp.sources"]
+    csv = "myapp_csv.source:CsvSource"
+
+Reading the entry points of a group only reads the metadata of the installed distributions,
+nothing is imported: the implementations are returned as lazy references, only the one actually
+used being imported, on first access. Packages declaring no entry point in the group are scanned
+as `UtilsReflection.find_class_implementations` does.
+"""
+
+import logging
+from importlib.metadata import entry_points
+
+from tgedr_pycommons.utils.discovery import LazyClassMapping
+from tgedr_pycommons.utils.reflection import UtilsReflection
+
+
+logger = logging.getLogger(__name__)
+
+
+def find_class_implementations_from_entry_points(
+    group: str, clazz: type, packages: str | None = None
+) -> LazyClassMapping:
+    """Find class implementations from the entry points of a group, scanning the packages declaring none.
+
+    Args:
+        group: Entry point group, e.g. 'myapp.sources'.
+        clazz: Parent class to find implementations of, the entry points classes are checked
+            against it on first access.
+        packages: Optional comma-separated list of package names, only the entry points of these
+            packages are kept and the packages with none in the group are scanned, if None all the
+            entry points of the group are kept.
+
+    Returns:
+        Mapping of implementation names, the entry point names, to classes, loaded with
+        `EntryPoint.load` on first access. Entry points naming a module, not a class, are skipped.
+
+    Raises:
+        UtilsReflectionException: If two modules of a scanned package hold implementations with the
+            same name, see `UtilsReflection.implementation_names`.
+    """
+    logger.debug("[find_class_implementations_from_entry_points|in] (%s, %s, %s)", group, clazz, packages)
+    declared = {}
+    for entry_point in entry_points(group=group):
+        if entry_point.attr is None:
+            logger.warning(
+                "[find_class_implementations_from_entry_points] skipping %s = %s in %s, it names a module, not a class",
+                entry_point.name,
+                entry_point.value,
+                group,
+            )
+        else:
+            declared[entry_point.name] = entry_point
+    if packages is None:
+        references = declared
+    else:
+        references = {}
+        for package_name in [a.strip() for a in packages.split(",")]:
+            found = {
+                name: entry_point
+                for name, entry_point in declared.items()
+                if entry_point.module == package_name or entry_point.module.startswith(package_name + ".")
+            }
+            if not found:
+                logger.debug(
+                    "[find_class_implementations_from_entry_points] scanning %s, no entry points", package_name
+                )
+                implementations = UtilsReflection.find_class_implementations_in_package(package_name, clazz)
+                names = UtilsReflection.implementation_names(implementations)
+                found = {
+                    names[module]: (module, implementation.__name__)
+                    for module, implementation in implementations.items()
+                }
+            references.update(found)
+    logger.debug("[find_class_implementations_from_entry_points|out] => %s", references)
+    return LazyClassMapping(references, super_class=clazz)
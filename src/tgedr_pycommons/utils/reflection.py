@@ -1,12 +1,22 @@
 """Reflection utilities for dynamic class loading and discovery."""
 
 import importlib
+import importlib.util
 import inspect
 import logging
-import os
+import pkgutil
 import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from importlib import import_module
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+
+if TYPE_CHECKING:
+    from tgedr_pycommons.utils.discovery import DiscoveryIndex
 
 
 logger = logging.getLogger(__name__)
@@ -16,10 +26,123 @@ class UtilsReflectionException(Exception):
     """Exception raised by reflection utilities."""
 
 
+_MISSING = object()
+
+
+class ReflectionCache:
+    """LRU cache of the names resolved, and of the subclass checks made, by `UtilsReflection`.
+
+    A resolved name is checked against its module on each hit: the module must still be the one
+    in `sys.modules`, and still bind the name to the cached object, so that a name is resolved again
+    once its module is reloaded (`importlib.reload`) or imported anew. Subclass checks are keyed on
+    the classes themselves, the classes of a reloaded module are new keys. `hits` and `misses`
+    count the lookups of names and of subclass checks alike.
+
+    The cache can be shared across threads, its bookkeeping is done under a lock, released while
+    importing modules and checking subclasses.
+    """
+
+    def __init__(self, maxsize: int | None = 1024) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            maxsize: The number of names, and of subclass checks, kept, unbounded if None.
+
+        Raises:
+            ValueError: If maxsize is not positive.
+        """
+        if maxsize is not None and maxsize <= 0:
+            msg = f"maxsize must be a positive integer or None, got {maxsize}"
+            raise ValueError(msg)
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._names: OrderedDict[tuple[str, str], tuple[Any, Any]] = OrderedDict()
+        self._subclass_checks: OrderedDict[tuple[Any, type], bool] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of cached names and subclass checks."""
+        return len(self._names) + len(self._subclass_checks)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """The number of lookups found in the cache (hits) and not (misses), and the hit rate."""
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def resolve(self, module: str, name: str) -> Any:
+        """Get an object from a module, importing the module if needed.
+
+        Args:
+            module: Module name.
+            name: Name of the object in the module.
+
+        Returns:
+            The object.
+        """
+        key = (module, name)
+        with self._lock:
+            entry = self._names.get(key)
+            if entry is not None:
+                the_module, result = entry
+                if sys.modules.get(module) is the_module and vars(the_module).get(name, _MISSING) is result:
+                    self.hits += 1
+                    self._names.move_to_end(key)
+                    return result
+            self.misses += 1
+        the_module = import_module(module)
+        result = getattr(the_module, name)
+        logger.debug("[ReflectionCache] resolved %s.%s => %s", module, name, result)
+        self._store(self._names, key, (the_module, result))
+        return result
+
+    def is_subclass(self, sub_class: Any, super_class: type) -> bool:
+        """Check if sub_class is a subclass of super_class.
+
+        Args:
+            sub_class: The class to check, objects which are not callable are not subclasses.
+            super_class: The parent class to check against.
+
+        Returns:
+            True if sub_class is a subclass of super_class, False otherwise.
+        """
+        key = (sub_class, super_class)
+        try:
+            with self._lock:
+                result = self._subclass_checks.get(key)
+                if result is not None:
+                    self.hits += 1
+                    self._subclass_checks.move_to_end(key)
+                    return result
+                self.misses += 1
+        except TypeError:
+            # unhashable, not cached
+            return callable(sub_class) and issubclass(sub_class, super_class)
+        result = callable(sub_class) and issubclass(sub_class, super_class)
+        return self._store(self._subclass_checks, key, result)
+
+    def clear(self) -> None:
+        """Drop everything cached, and reset the hits and misses."""
+        with self._lock:
+            self._names.clear()
+            self._subclass_checks.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _store(self, store: OrderedDict, key: tuple, value: Any) -> Any:
+        with self._lock:
+            store[key] = value
+            if self.maxsize is not None and len(store) > self.maxsize:
+                store.popitem(last=False)
+        return value
+
+
 class UtilsReflection:
     """Utility class for reflection operations including class loading and discovery."""
 
-    __MODULE_EXTENSIONS = (".py", ".pyc", ".pyo")
+    # shared by load_class, load_subclass_from_module, get_type and is_subclass_of
+    cache = ReflectionCache()
 
     @staticmethod
     def load_class(clazz: str, parent_check: type | None = None) -> Any:
@@ -35,22 +158,18 @@ class UtilsReflection:
         Raises:
             TypeError: If the object is not callable or not a subclass of parent_check.
         """
-        logger.debug("[load_class|in] (clazz=%s, parent_check=%s)", clazz, parent_check)
-        type_elements = clazz.split(".")
-        module = ".".join(type_elements[:-1])
-        _clazz = type_elements[-1]
+        module, _, _clazz = clazz.rpartition(".")
 
-        result = getattr(import_module(module), _clazz)
+        result = UtilsReflection.cache.resolve(module, _clazz)
 
         if not callable(result):
             msg = f"Object {_clazz} in {module} is not callable."
             raise TypeError(msg)
 
-        if parent_check and (not issubclass(result, parent_check)):
+        if parent_check and (not UtilsReflection.cache.is_subclass(result, parent_check)):
             msg = f"Wrong class type, it is not a subclass of {parent_check.__name__}"
             raise TypeError(msg)
 
-        logger.debug("[load_class|out] => %s", result)
         return result
 
     @staticmethod
@@ -68,18 +187,16 @@ class UtilsReflection:
         Raises:
             TypeError: If the object is not callable or not a subclass of super_clazz.
         """
-        logger.info("[load_subclass_from_module|in] (module=%s, clazz=%s, super_clazz=%s)", module, clazz, super_clazz)
-        result = getattr(import_module(module), clazz)
+        result = UtilsReflection.cache.resolve(module, clazz)
 
         if not callable(result):
             msg = f"Object {clazz} in {module} is not callable."
             raise TypeError(msg)
 
-        if super_clazz and (not issubclass(result, super_clazz)):
+        if super_clazz and (not UtilsReflection.cache.is_subclass(result, super_clazz)):
             msg = f"Wrong class type, it is not a subclass of {super_clazz.__name__}"
             raise TypeError(msg)
 
-        logger.info("[load_subclass_from_module|out] => %s", result)
         return result
 
     @staticmethod
@@ -93,13 +210,7 @@ class UtilsReflection:
         Returns:
             The requested type.
         """
-        logger.info("[get_type|in] (module=%s, _type=%s)", module, _type)
-        result = None
-
-        result = getattr(import_module(module), _type)
-
-        logger.info("[get_type|out] => %s", result)
-        return result
+        return UtilsReflection.cache.resolve(module, _type)
 
     @staticmethod
     def is_subclass_of(sub_class: type, super_class: type) -> bool:
@@ -112,14 +223,7 @@ class UtilsReflection:
         Returns:
             True if sub_class is a subclass of super_class, False otherwise.
         """
-        logger.info("[is_subclass_of|in] (%s, %s)", sub_class, super_class)
-        result = False
-
-        if callable(sub_class) and issubclass(sub_class, super_class):
-            result = True
-
-        logger.info("[is_subclass_of|out] => %s", result)
-        return result
+        return UtilsReflection.cache.is_subclass(sub_class, super_class)
 
     @staticmethod
     def find_module_classes(module: str) -> list[Any]:
@@ -140,12 +244,15 @@ class UtilsReflection:
         return result
 
     @staticmethod
-    def find_class_implementations_in_package(package_name: str, super_class: type) -> dict[str, type]:
-        """Find all implementations of a class in a package.
+    def find_class_implementations_in_package(
+        package_name: str, super_class: type, workers: int | None = None
+    ) -> dict[str, type]:
+        """Find all implementations of a class in a package, and in its subpackages.
 
         Args:
             package_name: Package name to search.
             super_class: Parent class to find implementations of.
+            workers: Optional number of threads importing the modules, see `import_modules`.
 
         Returns:
             Dictionary mapping module names to class implementations.
@@ -153,20 +260,17 @@ class UtilsReflection:
         logger.info("[find_class_implementations_in_package|in] (%s, %s)", package_name, super_class)
         result = {}
 
-        the_package = importlib.import_module(package_name)
-        pkg_path = the_package.__path__[0]
-        modules = [
-            package_name + "." + module.split(".")[0]
-            for module in os.listdir(pkg_path)
-            if module.endswith(UtilsReflection.__MODULE_EXTENSIONS) and module != "__init__.py"
-        ]
+        modules = list(UtilsReflection.find_package_modules(package_name))
 
         logger.info("[find_class_implementations_in_package] found modules: %s", modules)
 
-        for _module in modules:
-            if _module not in sys.modules:
-                importlib.import_module(_module)
+        import_times = UtilsReflection.import_modules(modules, workers)
+        logger.debug(
+            "[find_class_implementations_in_package] import times (s): %s",
+            dict(sorted(import_times.items(), key=lambda item: item[1], reverse=True)),
+        )
 
+        for _module in modules:
             for _class in UtilsReflection.find_module_classes(_module):
                 if UtilsReflection.is_subclass_of(_class, super_class) and _class != super_class:
                     result[_module] = _class
@@ -174,6 +278,107 @@ class UtilsReflection:
         logger.info("[find_class_implementations_in_package|out] => %s", result)
         return result
 
+    @staticmethod
+    def find_package_modules(package_name: str) -> dict[str, str | None]:
+        """Find the modules of a package and of its subpackages, without importing them.
+
+        The package is walked with `pkgutil`, across all the entries of its path (namespace packages)
+        and whatever their importer (directories, zip files, wheels). Each module is listed once, even
+        with both source and bytecode files, where the import system would find it.
+
+        Args:
+            package_name: Package name to search.
+
+        Returns:
+            Dictionary mapping module names, sorted, to their file paths, None for the modules not
+            loaded from a file. The modules are not imported, but the parent packages of a dotted
+            package name are, by `importlib.util.find_spec`.
+
+        Raises:
+            UtilsReflectionException: If the package can not be found.
+        """
+        spec = importlib.util.find_spec(package_name)
+        if spec is None or not spec.submodule_search_locations:
+            msg = f"Package {package_name} not found."
+            raise UtilsReflectionException(msg)
+
+        result: dict[str, str | None] = {}
+        pending = [(list(spec.submodule_search_locations), package_name + ".")]
+        while pending:
+            paths, prefix = pending.pop()
+            for module_info in pkgutil.iter_modules(paths, prefix):
+                # the finder locates the module in its own path entry, no parent package gets imported
+                module_spec = module_info.module_finder.find_spec(module_info.name)
+                result[module_info.name] = module_spec.origin
+                if module_info.ispkg and module_spec.submodule_search_locations:
+                    pending.append((list(module_spec.submodule_search_locations), module_info.name + "."))
+        return dict(sorted(result.items()))
+
+    @staticmethod
+    def import_modules(modules: Iterable[str], workers: int | None = None) -> dict[str, float]:
+        """Import modules, timing each import.
+
+        With workers, the modules are imported on a thread pool, which only pays off for modules
+        releasing the GIL while loading (native extensions, I/O). The import system locks each
+        module, a module imported concurrently by two threads is loaded once, and the time of an
+        import includes the wait for the modules it shares with the other threads.
+
+        Args:
+            modules: Module names.
+            workers: Number of threads importing the modules, None to import them one after the other.
+
+        Returns:
+            Dictionary mapping the module names to the time their import took, in seconds, 0 for the
+            modules already imported.
+        """
+        modules = list(modules)
+        if workers is None:
+            return {module: UtilsReflection._timed_import(module) for module in modules}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="import") as executor:
+            return dict(zip(modules, executor.map(UtilsReflection._timed_import, modules), strict=True))
+
+    @staticmethod
+    def _timed_import(module: str) -> float:
+        if module in sys.modules:
+            return 0.0
+        started = time.perf_counter()
+        importlib.import_module(module)
+        return time.perf_counter() - started
+
+    @staticmethod
+    def find_class_implementations_statically(packages: str, clazz: Any, *, import_dynamic: bool = False) -> Any:
+        """Find class implementations across multiple packages, parsing their sources instead of importing them.
+
+        Args:
+            packages: Comma-separated list of package names.
+            clazz: Parent class to find implementations of, or its fully qualified name.
+            import_dynamic: Whether to import the modules with classes whose bases can not be resolved
+                statically, to check them, they are skipped otherwise.
+
+        Returns:
+            Mapping of implementation names to classes, imported on first access.
+        """
+        from tgedr_pycommons.utils.static_discovery import find_class_implementations_statically
+
+        return find_class_implementations_statically(packages, clazz, import_dynamic=import_dynamic)
+
+    @staticmethod
+    def find_class_implementations_from_entry_points(group: str, clazz: Any, packages: str | None = None) -> Any:
+        """Find class implementations declared as entry points, reading the metadata of the installed distributions.
+
+        Args:
+            group: Entry point group, e.g. 'myapp.sources'.
+            clazz: Parent class to find implementations of.
+            packages: Optional comma-separated list of package names, limiting the entry points to
+                these packages, the packages declaring none in the group being scanned instead.
+
+        Returns:
+            Mapping of implementation names to classes, imported on first access.
+        """
+        from tgedr_pycommons.utils.entry_points import find_class_implementations_from_entry_points
+
+        return find_class_implementations_from_entry_points(group, clazz, packages)
+
     @staticmethod
     def find_package_path(package_name: str) -> str:
         """Find the file system path of a package.
@@ -191,29 +396,61 @@ class UtilsReflection:
         return result
 
     @staticmethod
-    def find_class_implementations(packages: str, clazz: Any) -> dict[str, Any]:
+    def implementation_names(modules: Iterable[str]) -> dict[str, str]:
+        """Name the implementations found in modules after the last component of the module names.
+
+        Args:
+            modules: The names of the modules holding implementations.
+
+        Returns:
+            Dictionary mapping the module names to their implementation names.
+
+        Raises:
+            UtilsReflectionException: If two modules give the same implementation name.
+        """
+        result: dict[str, str] = {}
+        owners: dict[str, str] = {}
+        for module in modules:
+            name = module.split(".")[-1]
+            owner = owners.setdefault(name, module)
+            if owner != module:
+                msg = f"Implementations in {owner} and {module} have the same name {name}."
+                raise UtilsReflectionException(msg)
+            result[module] = name
+        return result
+
+    @staticmethod
+    def find_class_implementations(
+        packages: str, clazz: Any, index: "DiscoveryIndex | None" = None, workers: int | None = None
+    ) -> dict[str, Any]:
         """Find class implementations across multiple packages.
 
         Args:
             packages: Comma-separated list of package names.
             clazz: Parent class to find implementations of.
+            index: Optional persistent index of the packages classes, with it only the modules not
+                indexed yet are imported, and the classes are imported on first access.
+            workers: Optional number of threads importing the modules, see `import_modules`.
 
         Returns:
-            Dictionary mapping implementation names to classes.
+            Dictionary mapping implementation names, the last component of the name of the module of
+            each implementation, to classes.
 
         Raises:
-            UtilsReflectionException: If an error occurs during discovery.
+            UtilsReflectionException: If an error occurs during discovery, or two modules of the
+                packages (e.g. 'pkg.a.impl' and 'pkg.b.impl') hold implementations with the same name.
         """
         logger.info("[find_class_implementations|in] (%s, %s)", packages, clazz)
-        result = {}
+        if index is not None:
+            return index.find_class_implementations(packages, clazz)
+        module_class_map = {}
         _packages = [a.strip() for a in packages.split(",")]
 
         # find classes that extend clazz
         for pack_name in _packages:
-            module_class_map = UtilsReflection.find_class_implementations_in_package(pack_name, clazz)
-            for mod, _clazz in module_class_map.items():
-                impl = mod.split(".")[-1]
-                result[impl] = _clazz
+            module_class_map.update(UtilsReflection.find_class_implementations_in_package(pack_name, clazz, workers))
+        names = UtilsReflection.implementation_names(module_class_map)
+        result = {names[mod]: _clazz for mod, _clazz in module_class_map.items()}
 
         logger.info("[find_class_implementations|out] => %s", result)
         return result
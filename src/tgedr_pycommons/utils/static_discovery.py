@@ -0,0 +1,196 @@
+"""Import-free discovery of class implementations, from the sources of packages.
+
+`UtilsReflection.find_class_implementations` imports every candidate module, running their
+top level imports (ML libraries, DB drivers, ...) even for implementations never used. The
+static mode parses the modules with `ast` instead: it resolves the base classes of each class
+through the imports of its module, follows them across the scanned packages, and returns lazy
+references, only the implementation actually used being imported, on first access.
+
+Results follow `UtilsReflection.find_class_implementations`: each module holding classes of
+the hierarchy, defined or imported there, maps to the last of them by name. Some bases can not
+be resolved statically, e.g. `class A(make_base()):` or a name from a star import. Classes with
+such bases are skipped, unless `import_dynamic` is set, in which case their module is imported
+and the class checked with `issubclass`. When the parent is given as a class, the classes are
+checked against it when imported from the returned mapping.
+
+The sources of the packages are found with `importlib.util.find_spec`, which imports the parent
+packages of a dotted package name: scanning `myapp.plugins` runs `myapp/__init__.py`, so nested
+plugin packages are not found entirely without imports.
+"""
+
+import ast
+import builtins
+import importlib.util
+import logging
+from importlib import import_module
+from pathlib import Path
+from typing import Any
+
+from tgedr_pycommons.utils.discovery import LazyClassMapping
+from tgedr_pycommons.utils.reflection import UtilsReflection
+
+
+logger = logging.getLogger(__name__)
+
+_DYNAMIC = "<dynamic>"
+
+
+class _Module:
+    """The classes and imported names of a module, from its source."""
+
+    def __init__(self, name: str, tree: ast.Module, *, is_package: bool) -> None:
+        self.name = name
+        self.classes: dict[str, list[str]] = {}
+        self.imports: dict[str, str] = {}
+        package = name if is_package else name.rpartition(".")[0]
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                self.classes[node.name] = [self._resolve(base) for base in node.bases]
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        self.imports[alias.asname] = alias.name
+                    else:
+                        head = alias.name.split(".")[0]
+                        self.imports[head] = head
+            elif isinstance(node, ast.ImportFrom):
+                source = node.module or ""
+                if node.level:
+                    parent = package.split(".")[: len(package.split(".")) - node.level + 1]
+                    source = ".".join([*parent, source] if source else parent)
+                for alias in node.names:
+                    if alias.name != "*":
+                        self.imports[alias.asname or alias.name] = f"{source}.{alias.name}"
+
+    def _resolve(self, node: ast.expr) -> str:
+        """Resolve a base class expression into a qualified name, or `_DYNAMIC`."""
+        if isinstance(node, ast.Subscript):
+            # generic bases, e.g. Base[int]
+            node = node.value
+        parts = []
+        while isinstance(node, ast.Attribute):
+            parts.insert(0, node.attr)
+            node = node.value
+        if not isinstance(node, ast.Name):
+            return _DYNAMIC
+        # "module:name", qualified by _Scan once all the imports of the module are known
+        return ".".join([f"{self.name}:{node.id}", *parts])
+
+
+class _Scan:
+    """Resolves the hierarchies of the classes of a set of modules."""
+
+    def __init__(self, modules: dict[str, _Module]) -> None:
+        self._modules = modules
+        self._memo: dict[tuple[str, str], bool | None] = {}
+
+    def canonical(self, qualified: str, seen: frozenset = frozenset()) -> str:
+        """Follow the imports of a name to the module defining it."""
+        if ":" in qualified:
+            module_name, _, rest = qualified.partition(":")
+            head, _, tail = rest.partition(".")
+            module = self._modules[module_name]
+            if head in module.classes:
+                qualified = f"{module_name}.{rest}"
+            elif head in module.imports:
+                qualified = ".".join(filter(None, [module.imports[head], tail]))
+            elif hasattr(builtins, head):
+                qualified = f"builtins.{rest}"
+            else:
+                # e.g. from a star import, or assigned
+                return _DYNAMIC
+        module_name, _, name = qualified.rpartition(".")
+        module = self._modules.get(module_name)
+        if module is None or name in module.classes or name not in module.imports or qualified in seen:
+            return qualified
+        return self.canonical(module.imports[name], seen | {qualified})
+
+    def is_subclass(self, qualified: str, target: str, seen: frozenset = frozenset()) -> bool | None:
+        """Whether a class derives from the target, None when it can not be told statically."""
+        qualified = self.canonical(qualified)
+        if qualified == target:
+            return True
+        if qualified == _DYNAMIC:
+            return None
+        module_name, _, name = qualified.rpartition(".")
+        module = self._modules.get(module_name)
+        if module is None or name not in module.classes or qualified in seen:
+            # defined outside of the scanned packages
+            return False
+        key = (qualified, target)
+        if key not in self._memo:
+            results = [self.is_subclass(base, target, seen | {qualified}) for base in module.classes[name]]
+            self._memo[key] = True if True in results else (None if None in results else False)
+        return self._memo[key]
+
+
+def find_class_implementations_statically(
+    packages: str, clazz: type | str, *, import_dynamic: bool = False
+) -> LazyClassMapping:
+    """Find class implementations across multiple packages, from their sources, without importing them.
+
+    Args:
+        packages: Comma-separated list of package names.
+        clazz: Parent class to find implementations of, or its fully qualified name.
+        import_dynamic: Whether to import the modules with classes whose bases can not be resolved
+            statically, to check them with issubclass, they are skipped otherwise.
+
+    Returns:
+        Mapping of implementation names to classes, imported on first access.
+
+    Raises:
+        UtilsReflectionException: If two modules hold implementations with the same name, see
+            `UtilsReflection.implementation_names`.
+    """
+    logger.debug("[find_class_implementations_statically|in] (%s, %s)", packages, clazz)
+    target = clazz if isinstance(clazz, str) else f"{clazz.__module__}.{clazz.__qualname__}"
+    package_names = [a.strip() for a in packages.split(",")]
+
+    modules: dict[str, _Module] = {}
+    candidates: list[str] = []
+    for package_name in package_names:
+        spec = importlib.util.find_spec(package_name)
+        if spec is not None and spec.origin and spec.origin.endswith(".py"):
+            modules[package_name] = _parse(package_name, spec.origin, is_package=True)
+        for module_name, path in sorted(UtilsReflection.find_package_modules(package_name).items()):
+            if path is not None and path.endswith(".py") and module_name not in modules:
+                modules[module_name] = _parse(module_name, path, is_package=Path(path).name == "__init__.py")
+                candidates.append(module_name)
+
+    scan = _Scan({name: module for name, module in modules.items() if module is not None})
+    found = {}
+    for module_name in candidates:
+        module = modules[module_name]
+        if module is None:
+            continue
+        names = sorted({*module.classes, *module.imports})
+        for name in names:
+            match = scan.is_subclass(f"{module_name}:{name}", target)
+            if match is None and import_dynamic:
+                match = _imported_check(module_name, name, clazz)
+            if match and scan.canonical(f"{module_name}:{name}") != target:
+                found[module_name] = (module_name, name)
+            elif match is None:
+                logger.debug("[find_class_implementations_statically] skipping %s.%s, dynamic bases", module_name, name)
+
+    names = UtilsReflection.implementation_names(found)
+    references = {names[module_name]: reference for module_name, reference in found.items()}
+    logger.debug("[find_class_implementations_statically|out] => %s", references)
+    return LazyClassMapping(references, super_class=clazz if isinstance(clazz, type) else None)
+
+
+def _parse(name: str, path: str, *, is_package: bool) -> _Module | None:
+    try:
+        tree = ast.parse(Path(path).read_bytes(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        # OSError for the sources out of the file system, e.g. in a zip file
+        logger.warning("[find_class_implementations_statically] skipping %s, it can not be parsed", path)
+        return None
+    return _Module(name, tree, is_package=is_package)
+
+
+def _imported_check(module: str, name: str, clazz: type | str) -> bool:
+    """Import a class to check it derives from clazz."""
+    super_class = UtilsReflection.load_class(clazz) if isinstance(clazz, str) else clazz
+    obj: Any = getattr(import_module(module), name)
+    return isinstance(obj, type) and issubclass(obj, super_class) and obj is not super_class
@@ -1,8 +1,25 @@
 """Unit tests for the entrypoint module."""
 
+import asyncio
+import io
 import json
+import logging
+import os
+import pickle
+import subprocess
+import sys
+import threading
+import types
 
-from tgedr_pycommons.cicd.entrypoint import entrypoint, parse_arguments
+import numpy as np
+import pytest
+
+from tests.tgedr_pycommons import classes
+from tests.tgedr_pycommons.classes import CountedClass
+from tgedr_pycommons.cicd import entrypoint as entrypoint_module
+from tgedr_pycommons.cicd import worker
+from tgedr_pycommons.cicd.entrypoint import EntrypointException, complete, entrypoint, import_profile, parse_arguments
+from tgedr_pycommons.cicd.resolution import ResolutionCache
 
 
 
@@ -67,3 +84,333 @@ def test_entrypoint_class_run_function_with_null_params(): # noqa: ANN201, D103
   assert "hello." == entrypoint(
   ["--module", MODULE, "--classname", "AClass", "--callable", "gety", "--params", '{ "n": null }']
   )
+
+
+def test_entrypoint_serve_stdio(monkeypatch, capsys): # noqa: ANN201, D103
+  monkeypatch.setattr("sys.stdin", io.StringIO(json.dumps({"id": 1, "module": MODULE, "callable": "hello"}) + "\n"))
+  assert entrypoint(["--serve"]) is None
+  assert {"id": 1, "result": "hello."} == json.loads(capsys.readouterr().out)
+
+
+def test_entrypoint_serve_socket(monkeypatch): # noqa: ANN201, D103
+  served = []
+  monkeypatch.setattr(worker, "serve_unix_socket", lambda path, use_uvloop: served.append((path, use_uvloop)))
+  assert entrypoint(["--serve", "--socket", "/tmp/worker.sock", "--uvloop"]) is None
+  assert served == [("/tmp/worker.sock", True)]
+
+
+def test_entrypoint_forward_to_worker(tmp_path, capsys): # noqa: ANN201, D103
+  path = str(tmp_path / "worker.sock")
+  with worker.WorkerServer(path) as server:
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+      assert "hello. zero: zero one: one two: two" == entrypoint(
+        [
+          "--socket",
+          path,
+          "--module",
+          MODULE,
+          "--classname",
+          "AClass",
+          "--classparams",
+          '{ "config": {"zero": "zero"} }',
+          "--callable",
+          "getx",
+          "--params",
+          '{ "context": {"one": "one", "two": "two"} }',
+        ]
+      )
+      assert "hello. zero: zero one: one two: two" in capsys.readouterr().out
+      with pytest.raises(EntrypointException, match="AttributeError"):
+        entrypoint(["--socket", path, "--module", MODULE, "--callable", "missing"])
+    finally:
+      server.shutdown()
+      thread.join()
+
+
+def test_entrypoint_forward_loads_params_files(tmp_path, monkeypatch, capsys): # noqa: ANN201, D103
+  path = str(tmp_path / "worker.sock")
+  (tmp_path / "p.bin").write_bytes(pickle.dumps({"n": 1}))
+  (tmp_path / "a.bin").write_bytes(pickle.dumps({"n": {1}}))
+  monkeypatch.setattr("sys.stdin", io.TextIOWrapper(io.BytesIO(b'{"url": "x"}')))
+  with worker.WorkerServer(path) as server:
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+      forward_args = ["--socket", path, "--module", MODULE, "--callable", "hello"]
+      p_bin = f"@{tmp_path / 'p.bin'}"
+      assert "hello. n: 1" == entrypoint([*forward_args, "--params", p_bin, "--params-format", "pickle"])
+      assert "hello. url: x" == entrypoint([*forward_args, "--params", "@-"])
+      with pytest.raises(EntrypointException, match="the parameters can not be sent to the worker, only JSON"):
+        entrypoint([*forward_args, "--params", f"@{tmp_path / 'a.bin'}", "--params-format", "pickle"])
+    finally:
+      server.shutdown()
+      thread.join()
+
+
+PARAMS_LINES = ['{"n": "1"}', "", '{"n": "2"}', '{"n": null}', '{"n": "4"}']
+RESULTS = ["hello. n: 1", "hello. n: 2", "hello.", "hello. n: 4"]
+
+
+@pytest.mark.parametrize(
+  "parallel_args", [[], ["--parallel", "3"], ["--parallel", "2", "--parallel-backend", "process"]]
+)
+def test_entrypoint_params_file(tmp_path, capsys, parallel_args): # noqa: ANN201, D103
+  params_file = tmp_path / "params.jsonl"
+  params_file.write_text("\n".join(PARAMS_LINES) + "\n")
+  before = CountedClass.instances
+  assert RESULTS == entrypoint(
+    ["--module", MODULE, "--classname", "CountedClass", "--callable", "get", "--params-file", str(params_file), *parallel_args]
+  )
+  assert CountedClass.instances == before + 1
+  assert RESULTS == [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_entrypoint_params_file_stdin(monkeypatch, capsys): # noqa: ANN201, D103
+  monkeypatch.setattr("sys.stdin", io.StringIO('{"a": 1}\n{"b": [1, 2]}\n'))
+  assert ["hello. a: 1", "hello. b: [1, 2]"] == entrypoint(["--module", MODULE, "--callable", "hello", "--params-file", "-"])
+  assert ['"hello. a: 1"', '"hello. b: [1, 2]"'] == capsys.readouterr().out.splitlines()
+
+
+
+def test_entrypoint_params_file_array_results(monkeypatch, capsys): # noqa: ANN201, D103
+  monkeypatch.setattr("sys.stdin", io.StringIO('{"n": 2}\n{"n": 3}\n'))
+  entrypoint(["--module", MODULE, "--callable", "arange", "--params-file", "-"])
+  assert [[0, 1], [0, 1, 2]] == [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+def test_entrypoint_params_and_params_file_are_exclusive(): # noqa: ANN201, D103
+  with pytest.raises(SystemExit):
+    parse_arguments(["--module", MODULE, "--callable", "hello", "--params", "{}", "--params-file", "-"])
+
+
+def test_import_has_no_side_effects(): # noqa: ANN201, D103
+  code = (
+    "import sys; import tgedr_pycommons.cicd.entrypoint; "
+    "loaded = [m for m in ('argparse', 'json', 'logging', 'concurrent.futures', 'socket') if m in sys.modules]; "
+    "import logging; print(loaded, len(logging.getLogger().handlers))"
+  )
+  env = {**os.environ, "PYTHONPATH": os.pathsep.join(map(str, sys.path))}
+  completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+  assert completed.stdout.strip() == "[] 0"
+
+
+def test_entrypoint_configures_logging_once(): # noqa: ANN201, D103
+  entrypoint(["--module", MODULE, "--callable", "hello"])
+  entrypoint(["--module", MODULE, "--callable", "hello"])
+  handlers = [h for h in logging.getLogger().handlers if h.get_name() == "tgedr_pycommons.cicd.entrypoint"]
+  assert len(handlers) == 1
+
+
+def test_entrypoint_import_profile(capsys): # noqa: ANN201, D103
+  result = entrypoint(["--module", "tests.tgedr_pycommons.classes", "--import-profile"])
+  modules = [row["module"] for row in result]
+  assert "tests.tgedr_pycommons.classes" in modules
+  cumulative = [row["cumulative_us"] for row in result]
+  assert cumulative == sorted(cumulative, reverse=True)
+  row = result[modules.index("tests.tgedr_pycommons.classes")]
+  assert row["depth"] == 0
+  assert row["self_us"] <= row["cumulative_us"]
+  out = capsys.readouterr().out.splitlines()
+  assert "cumulative [us]" in out[0]
+  assert len(out) == len(result) + 1
+
+
+def test_entrypoint_import_profile_missing_module(): # noqa: ANN201, D103
+  with pytest.raises(EntrypointException, match="failed to import not.a.module: ModuleNotFoundError"):
+    import_profile("not.a.module")
+
+
+def test_entrypoint_coroutine(capsys): # noqa: ANN201, D103
+  assert "hello. you" == entrypoint(["--module", MODULE, "--callable", "ahello", "--params", '{"name": "you"}'])
+  assert "hello. world" == entrypoint(["--module", MODULE, "--callable", "ahello"])
+  assert capsys.readouterr().out.splitlines() == ["hello. you", "hello. world"]
+
+
+def test_entrypoint_streams_generator(capsys): # noqa: ANN201, D103
+  assert [0, 1, 2] == entrypoint(["--module", MODULE, "--callable", "count"])
+  assert capsys.readouterr().out.splitlines() == ["0", "1", "2"]
+
+
+def test_entrypoint_streams_async_generator(capsys): # noqa: ANN201, D103
+  assert [0, 1] == entrypoint(["--module", MODULE, "--callable", "acount", "--params", '{"n": 2}'])
+  assert capsys.readouterr().out.splitlines() == ["0", "1"]
+
+
+@pytest.mark.parametrize(
+  "parallel_args", [[], ["--parallel", "2"], ["--parallel", "2", "--parallel-backend", "process"]]
+)
+def test_entrypoint_params_file_async(tmp_path, capsys, parallel_args): # noqa: ANN201, D103
+  params_file = tmp_path / "params.jsonl"
+  params_file.write_text('{"name": "a"}\n{"name": "b"}\n')
+  assert ["hello. a", "hello. b"] == entrypoint(
+    ["--module", MODULE, "--callable", "ahello", "--params-file", str(params_file), *parallel_args]
+  )
+  params_file.write_text('{"n": 1}\n{"n": 2}\n')
+  for name in ("count", "acount"):
+    assert [[0], [0, 1]] == entrypoint(
+      ["--module", MODULE, "--callable", name, "--params-file", str(params_file), *parallel_args]
+    )
+  assert capsys.readouterr().out.splitlines() == ['"hello. a"', '"hello. b"', "[0]", "[0, 1]", "[0]", "[0, 1]"]
+
+
+def test_entrypoint_params_file_async_threads_run_concurrently(tmp_path, monkeypatch): # noqa: ANN201, D103
+  monkeypatch.setattr(classes, "ARRIVED", [])
+  params_file = tmp_path / "params.jsonl"
+  params_file.write_text('{"name": "a"}\n{"name": "b"}\n{"name": "c"}\n')
+  assert ["a", "b", "c"] == entrypoint(
+    ["--module", MODULE, "--callable", "arrive", "--params-file", str(params_file), "--parallel", "2"]
+  )
+
+
+def test_entrypoint_params_file_mixed_async_results(): # noqa: ANN201, D103
+  def call(n):
+    return classes.ahello(str(n)) if n % 2 else n
+
+  lines = io.StringIO("".join(f'{{"n": {n}}}\n' for n in range(4)))
+  assert [0, "hello. 1", 2, "hello. 3"] == entrypoint_module.run_params_file(call, lines, parallel=2)
+
+
+
+def test_pool_processes_drop_the_inherited_runners(monkeypatch): # noqa: ANN201, D103
+  monkeypatch.setattr(entrypoint_module, "_RUNNERS", {False: "inherited"})
+  entrypoint_module._reset_runners()
+  assert entrypoint_module._RUNNERS == {}
+
+def test_complete_shares_the_event_loop(): # noqa: ANN201, D103
+  async def loop_id():
+    return id(asyncio.get_running_loop())
+
+  first, streamed = complete(loop_id())
+  assert not streamed
+  assert first == complete(loop_id())[0]
+  assert ([0, 1], True) == complete(classes.count(2))
+  assert ("value", False) == complete("value")
+
+
+def test_entrypoint_uvloop_fallback(monkeypatch, caplog): # noqa: ANN201, D103
+  monkeypatch.setitem(sys.modules, "uvloop", None)
+  monkeypatch.setattr(entrypoint_module, "_RUNNERS", {})
+  with caplog.at_level(logging.WARNING):
+    assert "hello. world" == entrypoint(["--module", MODULE, "--callable", "ahello", "--uvloop"])
+  assert "uvloop is not installed" in caplog.text
+
+
+def test_entrypoint_uvloop(monkeypatch): # noqa: ANN201, D103
+  fake_uvloop = types.ModuleType("uvloop")
+  fake_uvloop.new_event_loop = asyncio.new_event_loop
+  monkeypatch.setitem(sys.modules, "uvloop", fake_uvloop)
+  monkeypatch.setattr(entrypoint_module, "_RUNNERS", {})
+  assert "hello. world" == entrypoint(["--module", MODULE, "--callable", "ahello", "--uvloop"])
+  assert set(entrypoint_module._RUNNERS) == {True}
+
+
+def test_entrypoint_params_from_file(tmp_path): # noqa: ANN201, D103
+  (tmp_path / "params.json").write_text('{"url": "http://mybucket/mykey"}')
+  (tmp_path / "classparams.pkl").write_bytes(pickle.dumps({"prefix": "hi."}))
+  assert "hello. url: http://mybucket/mykey" == entrypoint(
+    ["--module", MODULE, "--callable", "hello", "--params", f"@{tmp_path / 'params.json'}"]
+  )
+  assert "hi. n: 1" == entrypoint(
+    [
+      "--module", MODULE, "--classname", "CountedClass", "--classparams", f"@{tmp_path / 'classparams.pkl'}",
+      "--callable", "get", "--params", '{"n": "1"}',
+    ]
+  )
+
+
+def test_entrypoint_params_from_stdin(monkeypatch): # noqa: ANN201, D103
+  monkeypatch.setattr("sys.stdin", io.TextIOWrapper(io.BytesIO(pickle.dumps({"n": 3}))))
+  assert [0, 1, 2] == entrypoint(["--module", MODULE, "--callable", "count", "--params", "@-", "--params-format", "pickle"])
+
+
+def test_entrypoint_output(tmp_path, capsys): # noqa: ANN201, D103
+  output = tmp_path / "result.npy"
+  result = entrypoint(["--module", MODULE, "--callable", "count", "--params", '{"n": 4}', "--output", str(output)])
+  assert result == [0, 1, 2, 3]
+  assert np.load(output).tolist() == [0, 1, 2, 3]
+  output = tmp_path / "result.out"
+  entrypoint(["--module", MODULE, "--callable", "hello", "--output", str(output), "--output-format", "pickle"])
+  assert pickle.loads(output.read_bytes()) == "hello."
+  assert capsys.readouterr().out == ""
+
+
+
+def test_entrypoint_params_file_output(tmp_path, capsys): # noqa: ANN201, D103
+  params_file = tmp_path / "params.jsonl"
+  params_file.write_text('{"n": 1}\n{"n": 2}\n')
+  output = tmp_path / "results.json"
+  assert [[0], [0, 1]] == entrypoint(
+    ["--module", MODULE, "--callable", "count", "--params-file", str(params_file), "--output", str(output), "--timings"]
+  )
+  assert json.loads(output.read_text()) == [[0], [0, 1]]
+  captured = capsys.readouterr()
+  assert captured.out == ""
+  assert list(json.loads(captured.err.strip().splitlines()[-1])) == ["parse", "import", "call", "serialize", "total"]
+
+def test_entrypoint_timings(capsys): # noqa: ANN201, D103
+  entrypoint(
+    [
+      "--module", MODULE, "--classname", "CountedClass", "--classparams", '{"prefix": "hi."}',
+      "--callable", "get", "--params", '{"n": "1"}', "--timings",
+    ]
+  )
+  timings = json.loads(capsys.readouterr().err.strip().splitlines()[-1])
+  assert list(timings) == ["parse", "import", "construct", "call", "serialize", "total"]
+
+
+def test_entrypoint_timings_with_cache(capsys): # noqa: ANN201, D103
+  entrypoint(["--module", MODULE, "--callable", "hello", "--timings"], cache=ResolutionCache())
+  timings = json.loads(capsys.readouterr().err.strip().splitlines()[-1])
+  assert list(timings) == ["parse", "resolve", "call", "serialize", "total"]
+
+
+def test_entrypoint_timings_on_failure(capsys): # noqa: ANN201, D103
+  with pytest.raises(AttributeError):
+    entrypoint(["--module", MODULE, "--callable", "missing", "--timings"])
+  timings = json.loads(capsys.readouterr().err.strip().splitlines()[-1])
+  assert list(timings) == ["parse", "import", "total"]
+
+
+def test_entrypoint_profile(capsys): # noqa: ANN201, D103
+  assert [0, 1] == entrypoint(["--module", MODULE, "--callable", "count", "--params", '{"n": 2}', "--profile", "cpu"])
+  assert "cumulative" in capsys.readouterr().err
+  assert "hello." == entrypoint(["--module", MODULE, "--callable", "hello", "--profile", "mem", "--profile-top", "2"])
+  assert "peak traced memory" in capsys.readouterr().err
+
+
+def test_entrypoint_build_manifest(tmp_path, capsys): # noqa: ANN201, D103
+  path = tmp_path / "manifest.json"
+  manifest = entrypoint(["--build-manifest", MODULE, "--manifest", str(path)])
+  assert json.loads(path.read_text()) == manifest
+  assert capsys.readouterr().out == ""
+  assert manifest == entrypoint(["--build-manifest", MODULE])
+  assert json.loads(capsys.readouterr().out) == manifest
+
+
+def test_entrypoint_list(tmp_path, capsys): # noqa: ANN201, D103
+  result = entrypoint(["--list", "--module", MODULE])
+  out = capsys.readouterr().out.splitlines()
+  assert f"{MODULE}:hello(*args: Any, **kwargs: Any)" in out
+  assert f"async {MODULE}:ahello(name: str='world')" in out
+  assert len(out) == len(result)
+  path = tmp_path / "manifest.json"
+  entrypoint(["--build-manifest", MODULE, "--manifest", str(path)])
+  assert result == entrypoint(["--list", "--manifest", str(path)])
+  with pytest.raises(EntrypointException, match="--list needs a --manifest or a --module"):
+    entrypoint(["--list"])
+
+
+def test_entrypoint_manifest_check(tmp_path, capsys): # noqa: ANN201, D103
+  path = tmp_path / "manifest.json"
+  entrypoint(["--build-manifest", MODULE, "--manifest", str(path)])
+  assert "hello." == entrypoint(["--module", MODULE, "--callable", "hello", "--manifest", str(path), "--timings"])
+  assert "check" in json.loads(capsys.readouterr().err.strip().splitlines()[-1])
+  with pytest.raises(EntrypointException, match="has no function helo, did you mean hello"):
+    entrypoint(["--module", MODULE, "--callable", "helo", "--manifest", str(path)])
+
+
+def test_entrypoint_socket_and_params_file_are_exclusive(capsys): # noqa: ANN201, D103
+  with pytest.raises(SystemExit):
+    parse_arguments(["--socket", "w.sock", "--module", MODULE, "--callable", "hello", "--params-file", "-"])
+  assert "--params-file can not be combined with --socket" in capsys.readouterr().err
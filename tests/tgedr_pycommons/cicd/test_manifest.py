@@ -0,0 +1,251 @@
+"""Unit tests for the manifest module."""
+
+import json
+import sys
+import textwrap
+
+import pytest
+
+from tgedr_pycommons.cicd.manifest import (
+  ManifestException,
+  build_manifest,
+  check,
+  format_target,
+  load_manifest,
+  targets,
+  write_manifest,
+)
+
+
+JOBS = '''
+import os
+from typing import Any as AnyType
+
+LIMIT = 3
+
+
+def run(day: str, n: int = 1) -> str:
+    return day * n
+
+
+async def arun():
+    pass
+
+
+def _private():
+    pass
+
+
+class Job:
+    def __init__(self, config: dict | None = None):
+        self.config = config
+
+    def execute(self, x, /, y=2):
+        return x + y
+
+    @staticmethod
+    def make(a, b=1):
+        return a
+
+    @classmethod
+    def build(cls, c=3):
+        return cls()
+
+    @property
+    def name(self):
+        return "job"
+
+    def _hidden(self):
+        pass
+
+
+class Child(Job):
+    pass
+
+
+class Plain(object):
+    def go(self):
+        pass
+
+
+class _Internal:
+    pass
+'''
+
+GUARDED = '''
+import sys
+
+if sys.platform:
+    def cond():
+        pass
+else:
+    from os import path as cond
+
+try:
+    import fast as speed
+except ImportError as missing:
+    def slow():
+        pass
+
+
+class Aliases:
+    go = staticmethod(cond)
+    size: int = 3
+    label = "x"
+
+    def __call__(self):
+        pass
+
+    if sys.platform:
+        def when(self):
+            pass
+'''
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+  root = tmp_path / "pkgs"
+  files = {
+    "mfpkg/__init__.py": "",
+    "mfpkg/jobs.py": JOBS,
+    "mfpkg/sub/__init__.py": "def hello():\n    pass\n",
+    "mfpkg/sub/deep.py": "def __getattr__(name):\n    return name\n",
+    "mfpkg/star.py": "from mfpkg.jobs import *\n",
+    "mfpkg/guarded.py": GUARDED,
+    "mfpkg/broken.py": "def oops(:\n",
+    "mfpkg/nulls.py": "\x00",
+    "mfpkg/data-files/script.py": "def ignored():\n    pass\n",
+    "mfmod.py": "def single():\n    pass\n",
+  }
+  for name, content in files.items():
+    (root / name).parent.mkdir(parents=True, exist_ok=True)
+    (root / name).write_text(textwrap.dedent(content))
+  monkeypatch.syspath_prepend(str(root))
+  return "mfpkg"
+
+
+def test_build_manifest(package): # noqa: ANN201, D103
+  manifest = build_manifest([package])
+  assert manifest["version"] == 2
+  assert manifest["packages"] == [package]
+  assert list(manifest["modules"]) == ["mfpkg", "mfpkg.guarded", "mfpkg.jobs", "mfpkg.star", "mfpkg.sub", "mfpkg.sub.deep"]
+  assert "mfpkg.jobs" not in sys.modules
+
+  jobs = manifest["modules"]["mfpkg.jobs"]
+  assert jobs["functions"] == {
+    "run": {"signature": "(day: str, n: int=1)", "async": False},
+    "arun": {"signature": "()", "async": True},
+    "_private": {"signature": "()", "async": False},
+  }
+  assert jobs["names"] == ["AnyType", "LIMIT", "os"]
+  assert not jobs["dynamic"]
+  assert list(jobs["classes"]) == ["Job", "Child", "Plain", "_Internal"]
+  job = jobs["classes"]["Job"]
+  assert job["signature"] == "(config: dict | None=None)"
+  assert job["bases"] == []
+  assert job["methods"] == {
+    "__init__": {"signature": "(config: dict | None=None)", "async": False},
+    "execute": {"signature": "(x, /, y=2)", "async": False},
+    "make": {"signature": "(a, b=1)", "async": False},
+    "build": {"signature": "(c=3)", "async": False},
+    "_hidden": {"signature": "()", "async": False},
+  }
+  assert jobs["classes"]["Child"] == {"signature": "(...)", "bases": ["Job"], "methods": {}}
+  assert jobs["classes"]["Plain"] == {"signature": "()", "bases": [], "methods": {"go": {"signature": "()", "async": False}}}
+  assert manifest["modules"]["mfpkg.sub.deep"]["dynamic"]
+  assert manifest["modules"]["mfpkg.star"] == {"functions": {}, "classes": {}, "names": [], "dynamic": True}
+
+
+def test_build_manifest_guarded_definitions(package): # noqa: ANN201, D103
+  guarded = build_manifest(["mfpkg.guarded"])["modules"]["mfpkg.guarded"]
+  assert list(guarded["functions"]) == ["cond", "slow"]
+  assert guarded["names"] == ["cond", "missing", "speed", "sys"]
+  assert guarded["classes"]["Aliases"]["methods"] == {
+    "go": {"signature": "(...)", "async": False},
+    "__call__": {"signature": "()", "async": False},
+    "when": {"signature": "()", "async": False},
+  }
+
+def test_build_manifest_of_modules(package): # noqa: ANN201, D103
+  assert list(build_manifest(["mfmod", "mfpkg.jobs", "mfpkg.sub"])["modules"]) == [
+    "mfmod",
+    "mfpkg.jobs",
+    "mfpkg.sub",
+    "mfpkg.sub.deep",
+  ]
+
+
+def test_build_manifest_of_namespace_package(): # noqa: ANN201, D103
+  manifest = build_manifest(["tests.tgedr_pycommons.classes"])
+  assert "hello" in manifest["modules"]["tests.tgedr_pycommons.classes"]["functions"]
+
+
+@pytest.mark.parametrize("name", ["not_a_package_at_all", "mfpkg.missing", "mfmod.sub", "sys"])
+def test_build_manifest_missing(package, name): # noqa: ANN201, D103
+  with pytest.raises(ManifestException, match="can not be found"):
+    build_manifest([name])
+
+
+def test_targets(package): # noqa: ANN201, D103
+  result = targets(build_manifest(["mfpkg.jobs"]))
+  assert [format_target(t) for t in result] == [
+    "mfpkg.jobs:run(day: str, n: int=1)",
+    "async mfpkg.jobs:arun()",
+    "mfpkg.jobs:Job.execute(x, /, y=2)",
+    "mfpkg.jobs:Job.make(a, b=1)",
+    "mfpkg.jobs:Job.build(c=3)",
+    "mfpkg.jobs:Plain.go()",
+  ]
+  assert "mfpkg.guarded:Aliases.go(...)" in [format_target(t) for t in targets(build_manifest([package]))]
+  assert result[0] == {"module": "mfpkg.jobs", "classname": None, "callable": "run", "signature": "(day: str, n: int=1)", "async": False}
+
+
+@pytest.mark.parametrize(
+  ("module", "name", "classname"),
+  [
+    ("mfpkg.jobs", "run", None),
+    ("mfpkg.jobs", "LIMIT", None),
+    ("mfpkg.jobs", "execute", "Job"),
+    ("mfpkg.jobs", "anything", "Child"),
+    ("mfpkg.jobs", "anything", "AnyType"),
+    ("mfpkg.sub.deep", "anything", None),
+    ("mfpkg.star", "run", None),
+    ("mfpkg.jobs", "_private", None),
+    ("mfpkg.jobs", "_hidden", "Job"),
+    ("mfpkg.jobs", "__init__", "Job"),
+    ("mfpkg.guarded", "cond", None),
+    ("mfpkg.guarded", "slow", None),
+    ("mfpkg.guarded", "go", "Aliases"),
+    ("mfpkg.guarded", "__call__", "Aliases"),
+    ("mfpkg.guarded", "when", "Aliases"),
+  ],
+)
+def test_check_accepts(package, module, name, classname): # noqa: ANN201, D103
+  check(build_manifest([package]), module, name, classname)
+
+
+@pytest.mark.parametrize(
+  ("module", "name", "classname", "message"),
+  [
+    ("mfpkg.jbos", "run", None, "module mfpkg.jbos is not in the manifest, did you mean mfpkg.jobs?"),
+    ("mfpkg.jobs", "rnu", None, "mfpkg.jobs has no function rnu, did you mean run?"),
+    ("mfpkg.jobs", "zzz", None, "mfpkg.jobs has no function zzz$"),
+    ("mfpkg.jobs", "run", "Jbo", "mfpkg.jobs has no class Jbo, did you mean Job?"),
+    ("mfpkg.jobs", "exec", "Job", "mfpkg.jobs.Job has no method exec, did you mean execute?"),
+    ("mfpkg.jobs", "name", "Plain", "mfpkg.jobs.Plain has no method name"),
+    ("mfpkg.guarded", "label", "Aliases", "mfpkg.guarded.Aliases has no method label"),
+  ],
+)
+def test_check_rejects(package, module, name, classname, message): # noqa: ANN201, D103
+  with pytest.raises(ManifestException, match=message):
+    check(build_manifest([package]), module, name, classname)
+
+
+def test_write_load_manifest(package, tmp_path): # noqa: ANN201, D103
+  manifest = build_manifest([package])
+  path = str(tmp_path / "manifest.json")
+  write_manifest(manifest, path)
+  assert load_manifest(path) == manifest
+  (tmp_path / "old.json").write_text(json.dumps({"version": 0}))
+  with pytest.raises(ManifestException, match="is not a version 2 manifest, build it again"):
+    load_manifest(str(tmp_path / "old.json"))
@@ -0,0 +1,71 @@
+"""Unit tests for the profiling module."""
+
+import io
+import json
+import tracemalloc
+
+import pytest
+
+from tgedr_pycommons.cicd.profiling import Profiler, Timings
+
+
+def test_timings(): # noqa: ANN201, D103
+  timings = Timings()
+  timings.add("parse", 0.5)
+  with timings.phase("call"):
+    pass
+  timings.add("parse", 0.25)
+  result = timings.as_dict()
+  assert list(result) == ["parse", "call", "total"]
+  assert result["parse"] == 0.75
+  assert result["total"] == pytest.approx(0.75 + result["call"])
+
+
+def test_timings_report(): # noqa: ANN201, D103
+  timings = Timings()
+  timings.add("call", 1.0)
+  stream = io.StringIO()
+  timings.report(stream)
+  assert json.loads(stream.getvalue()) == {"call": 1.0, "total": 1.0}
+
+
+def test_timings_report_stderr(capsys): # noqa: ANN201, D103
+  Timings().report()
+  assert json.loads(capsys.readouterr().err) == {"total": 0}
+
+
+def test_profiler_invalid_kind(): # noqa: ANN201, D103
+  with pytest.raises(ValueError, match="kind must be one of"):
+    Profiler("gpu")
+
+
+def test_profiler_none(): # noqa: ANN201, D103
+  stream = io.StringIO()
+  with Profiler(None, stream=stream) as profiler:
+    sum(range(10))
+  assert profiler.stats is None
+  assert stream.getvalue() == ""
+
+
+def test_profiler_cpu(): # noqa: ANN201, D103
+  stream = io.StringIO()
+  with Profiler("cpu", top=5, stream=stream) as profiler:
+    sorted(range(1000), reverse=True)
+  assert profiler.stats.total_calls > 0
+  assert "cumulative" in stream.getvalue()
+
+
+@pytest.mark.parametrize("tracing", [False, True])
+def test_profiler_mem(tracing): # noqa: ANN201, D103
+  if tracing:
+    tracemalloc.start()
+  try:
+    stream = io.StringIO()
+    with Profiler("mem", top=3, stream=stream) as profiler:
+      blocks = [bytearray(1024) for _ in range(100)]
+    assert len(blocks) == 100
+    assert 0 < len(profiler.stats) <= 3
+    assert "peak traced memory" in stream.getvalue()
+    assert tracemalloc.is_tracing() == tracing
+  finally:
+    tracemalloc.stop()
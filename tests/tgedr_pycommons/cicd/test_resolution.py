@@ -0,0 +1,127 @@
+"""Unit tests for the resolution module."""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tests.tgedr_pycommons import classes
+from tests.tgedr_pycommons.classes import CountedClass
+from tgedr_pycommons.cicd.entrypoint import entrypoint, resolve_callable
+from tgedr_pycommons.cicd.resolution import ResolutionCache
+
+
+MODULE = "tests.tgedr_pycommons.classes"
+
+
+def test_resolve_function(): # noqa: ANN201, D103
+  cache = ResolutionCache()
+  assert cache.resolve(MODULE, "hello") is classes.hello
+  assert cache.resolve(MODULE, "hello") is classes.hello
+  assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+
+
+def test_resolve_class_new_instance_per_call(): # noqa: ANN201, D103
+  cache = ResolutionCache()
+  before = CountedClass.instances
+  assert "hi. n: 1" == cache.resolve(MODULE, "get", "CountedClass", '{"prefix": "hi."}')(n="1")
+  assert "hi." == cache.resolve(MODULE, "get", "CountedClass", '{"prefix": "hi."}')()
+  assert CountedClass.instances == before + 2
+  assert cache.hits == 1
+
+
+def test_resolve_class_reuse_instances(): # noqa: ANN201, D103
+  cache = ResolutionCache(reuse_instances=True)
+  before = CountedClass.instances
+  first = cache.resolve(MODULE, "get", "CountedClass", {"prefix": "hi."})
+  assert first == cache.resolve(MODULE, "get", "CountedClass", {"prefix": "hi."})
+  assert CountedClass.instances == before + 1
+  assert "hello." == cache.resolve(MODULE, "get", "CountedClass", "")()
+  assert "hello." == cache.resolve(MODULE, "get", "CountedClass")()
+  assert CountedClass.instances == before + 2
+  assert len(cache) == 2
+
+
+def test_resolve_lru_bound(): # noqa: ANN201, D103
+  cache = ResolutionCache(maxsize=2)
+  cache.resolve(MODULE, "hello")
+  cache.resolve(MODULE, "get", "CountedClass")
+  cache.resolve(MODULE, "hello")
+  cache.resolve(MODULE, "getx", "AClass")
+  assert len(cache) == 2
+  misses = cache.misses
+  cache.resolve(MODULE, "hello")
+  assert cache.misses == misses
+  cache.resolve(MODULE, "get", "CountedClass")
+  assert cache.misses == misses + 1
+
+
+
+def test_resolve_shared_across_threads(): # noqa: ANN201, D103
+  cache = ResolutionCache(maxsize=2)
+  names = ["hello", "count", "chatty"] * 500
+  # switch threads often, for evictions to interleave with lookups
+  interval = sys.getswitchinterval()
+  sys.setswitchinterval(1e-6)
+  try:
+    with ThreadPoolExecutor(8) as executor:
+      resolved = list(executor.map(lambda name: cache.resolve(MODULE, name), names))
+  finally:
+    sys.setswitchinterval(interval)
+  assert resolved == [getattr(classes, name) for name in names]
+  assert cache.hits + cache.misses == len(names)
+  assert len(cache) == 2
+
+def test_invalid_maxsize(): # noqa: ANN201, D103
+  with pytest.raises(ValueError, match="maxsize must be a positive integer or None, got 0"):
+    ResolutionCache(maxsize=0)
+
+
+def test_invalidate(): # noqa: ANN201, D103
+  cache = ResolutionCache()
+  cache.resolve(MODULE, "hello")
+  cache.resolve("tgedr_pycommons.cicd.entrypoint", "parse_arguments")
+  cache.parse(["--module", MODULE, "--callable", "hello"])
+  cache.invalidate(MODULE)
+  assert len(cache) == 1
+  cache.invalidate()
+  assert len(cache) == 0
+  misses = cache.misses
+  cache.parse(["--module", MODULE, "--callable", "hello"])
+  assert cache.misses == misses + 1
+
+
+def test_parse(): # noqa: ANN201, D103
+  cache = ResolutionCache()
+  args = cache.parse(["--module", MODULE, "--callable", "hello"])
+  assert args.module == MODULE
+  assert args is cache.parse(["--module", MODULE, "--callable", "hello"])
+  assert cache.hits == 1
+
+
+def test_resolve_callable_with_cache(): # noqa: ANN201, D103
+  cache = ResolutionCache()
+  args = cache.parse(["--module", MODULE, "--callable", "hello"])
+  assert resolve_callable(args, cache) is classes.hello
+  assert len(cache) == 1
+
+
+def test_entrypoint_with_cache(): # noqa: ANN201, D103
+  cache = ResolutionCache(reuse_instances=True)
+  before = CountedClass.instances
+  for _ in range(3):
+    result = entrypoint(
+      ["--module", MODULE, "--classname", "CountedClass", "--classparams", '{"prefix": "hi."}', "--callable", "get"],
+      cache=cache,
+    )
+    assert "hi." == result
+  assert CountedClass.instances == before + 1
+  assert (cache.hits, cache.misses) == (4, 2)
+
+
+def test_entrypoint_with_cache_from_argv(monkeypatch): # noqa: ANN201, D103
+  monkeypatch.setattr("sys.argv", ["entrypoint", "--module", MODULE, "--callable", "hello"])
+  cache = ResolutionCache()
+  assert "hello." == entrypoint(cache=cache)
+  assert "hello." == entrypoint(cache=cache)
+  assert cache.hits == 2
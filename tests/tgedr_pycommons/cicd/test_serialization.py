@@ -0,0 +1,124 @@
+"""Unit tests for the serialization module."""
+
+import io
+import json
+import pickle
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from tgedr_pycommons.cicd import serialization
+from tgedr_pycommons.cicd.serialization import (
+  SerializationException,
+  Serializer,
+  get_serializer,
+  load_params,
+  read,
+  register_serializer,
+  write,
+)
+
+
+@pytest.mark.parametrize(
+  ("name", "value"),
+  [
+    ("data.json", {"a": [1, 2], "b": "x"}),
+    ("data.pkl", {"a": {1, 2}, "b": (3, 4)}),
+    ("data.pickle", [1, "x"]),
+  ],
+)
+def test_round_trip(tmp_path, name, value): # noqa: ANN201, D103
+  path = str(tmp_path / name)
+  write(value, path)
+  assert read(path) == value
+
+
+def test_round_trip_npy(tmp_path): # noqa: ANN201, D103
+  path = str(tmp_path / "data.npy")
+  write(np.arange(6).reshape(2, 3), path)
+  assert np.array_equal(np.load(path), np.arange(6).reshape(2, 3))
+  assert np.array_equal(read(path), np.arange(6).reshape(2, 3))
+  write([1, 2], path)
+  assert read(path).tolist() == [1, 2]
+
+
+def test_round_trip_npz(tmp_path): # noqa: ANN201, D103
+  path = str(tmp_path / "data.npz")
+  write({"x": np.arange(3), "y": np.ones(2)}, path)
+  result = read(path)
+  assert sorted(result) == ["x", "y"]
+  assert result["x"].tolist() == [0, 1, 2]
+  with pytest.raises(SerializationException, match="the npz format writes a dictionary of arrays, got list"):
+    write([1], path)
+
+
+def test_json_writes_arrays_as_lists(tmp_path): # noqa: ANN201, D103
+  path = str(tmp_path / "data.json")
+  write({"x": np.arange(3), "when": tmp_path}, path)
+  assert json.loads((tmp_path / "data.json").read_text()) == {"x": [0, 1, 2], "when": str(tmp_path)}
+
+
+def test_explicit_format_overrides_extension(tmp_path): # noqa: ANN201, D103
+  path = str(tmp_path / "data.bin")
+  write({"a": 1}, path, "pickle")
+  assert pickle.loads((tmp_path / "data.bin").read_bytes()) == {"a": 1}
+  assert read(path, "pickle") == {"a": 1}
+
+
+def test_get_serializer(): # noqa: ANN201, D103
+  assert get_serializer() is get_serializer("json")
+  assert get_serializer(path="x.unknown") is get_serializer("json")
+  assert get_serializer(path="X.NPY") is get_serializer("npy")
+  with pytest.raises(SerializationException, match="unknown format yaml, expected one of"):
+    get_serializer("yaml")
+
+
+def test_register_serializer(monkeypatch, tmp_path): # noqa: ANN201, D103
+  monkeypatch.setattr(serialization, "_SERIALIZERS", dict(serialization._SERIALIZERS))
+  monkeypatch.setattr(serialization, "_EXTENSIONS", dict(serialization._EXTENSIONS))
+  text = Serializer(lambda stream: stream.read().decode(), lambda value, stream: stream.write(value.encode()))
+  register_serializer("text", text, [".txt"])
+  path = str(tmp_path / "data.txt")
+  write("hello.", path)
+  assert (tmp_path / "data.txt").read_text() == "hello."
+  assert read(path) == "hello."
+
+
+def test_msgpack_missing(monkeypatch, tmp_path): # noqa: ANN201, D103
+  monkeypatch.setitem(sys.modules, "msgpack", None)
+  with pytest.raises(SerializationException, match="the msgpack format needs the msgpack package"):
+    write({"a": 1}, str(tmp_path / "data.msgpack"))
+
+
+def test_msgpack(monkeypatch, tmp_path): # noqa: ANN201, D103
+  fake_msgpack = types.ModuleType("msgpack")
+  fake_msgpack.pack = pickle.dump
+  fake_msgpack.unpack = pickle.load
+  monkeypatch.setitem(sys.modules, "msgpack", fake_msgpack)
+  path = str(tmp_path / "data.mpk")
+  write({"a": 1}, path)
+  assert read(path) == {"a": 1}
+
+
+def test_stdio(monkeypatch, capsysbinary): # noqa: ANN201, D103
+  buffer = io.BytesIO()
+  np.save(buffer, np.arange(3))
+  monkeypatch.setattr("sys.stdin", io.TextIOWrapper(io.BytesIO(buffer.getvalue())))
+  assert read("-", "npy").tolist() == [0, 1, 2]
+  write({"a": 1}, "-")
+  assert capsysbinary.readouterr().out == b'{"a": 1}'
+
+
+def test_load_params(tmp_path): # noqa: ANN201, D103
+  assert load_params(None) == {}
+  assert load_params("") == {}
+  assert load_params({"a": 1}) == {"a": 1}
+  assert load_params('{"a": 1}') == {"a": 1}
+  (tmp_path / "params.pkl").write_bytes(pickle.dumps({"a": {1}}))
+  assert load_params(f"@{tmp_path / 'params.pkl'}") == {"a": {1}}
+  (tmp_path / "params").write_bytes(pickle.dumps({"a": 2}))
+  assert load_params(f"@{tmp_path / 'params'}", "pickle") == {"a": 2}
+  with pytest.raises(SerializationException, match="parameters must be a dictionary, got list"):
+    load_params("[1, 2]")
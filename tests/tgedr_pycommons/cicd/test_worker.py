@@ -0,0 +1,159 @@
+"""Unit tests for the worker module."""
+
+import io
+import json
+import socket
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from tests.tgedr_pycommons.classes import CountedClass
+from tgedr_pycommons.cicd.worker import Worker, WorkerServer, send, serve_unix_socket
+
+
+MODULE = "tests.tgedr_pycommons.classes"
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+  return str(tmp_path / "worker.sock")
+
+
+def test_worker_invoke_function(): # noqa: ANN201, D103
+  assert "hello. url: http://mybucket/mykey" == Worker().invoke(
+    {"module": MODULE, "callable": "hello", "params": {"url": "http://mybucket/mykey"}}
+  )
+
+
+def test_worker_invoke_class_with_json_string_params(): # noqa: ANN201, D103
+  assert "hello. zero: zero one: one" == Worker().invoke(
+    {
+      "module": MODULE,
+      "classname": "AClass",
+      "classparams": '{"config": {"zero": "zero"}}',
+      "callable": "getx",
+      "params": '{"context": {"one": "one"}}',
+    }
+  )
+
+
+def test_worker_keeps_instances_warm(): # noqa: ANN201, D103
+  worker = Worker()
+  before = CountedClass.instances
+  message = {"module": MODULE, "classname": "CountedClass", "classparams": {"prefix": "hi."}, "callable": "get"}
+  assert "hi." == worker.invoke(message)
+  assert "hi. n: 1" == worker.invoke({**message, "params": {"n": "1"}})
+  assert CountedClass.instances == before + 1
+  assert "hello." == worker.invoke({**message, "classparams": None})
+  assert CountedClass.instances == before + 2
+
+
+@pytest.mark.parametrize(
+  ("name", "params", "expected"),
+  [("ahello", {"name": "async"}, "hello. async"), ("count", {"n": 3}, [0, 1, 2]), ("acount", {"n": 2}, [0, 1])],
+)
+def test_worker_completes_coroutines_and_generators(name, params, expected): # noqa: ANN201, D103
+  worker = Worker()
+  assert expected == worker.invoke({"module": MODULE, "callable": name, "params": params})
+  assert {"id": 1, "result": expected} == json.loads(
+    worker.handle(json.dumps({"id": 1, "module": MODULE, "callable": name, "params": params}))
+  )
+
+
+def test_worker_server_completes_coroutines(socket_path, recwarn): # noqa: ANN201, D103
+  with WorkerServer(socket_path) as server:
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+      assert "hello. world" == send(socket_path, {"module": MODULE, "callable": "ahello"})["result"]
+      assert [0, 1] == send(socket_path, {"module": MODULE, "callable": "acount", "params": {"n": 2}})["result"]
+    finally:
+      server.shutdown()
+      thread.join()
+  assert not [warning for warning in recwarn if "never awaited" in str(warning.message)]
+
+
+def test_worker_handle(): # noqa: ANN201, D103
+  worker = Worker()
+  assert {"id": 7, "result": "hello."} == json.loads(worker.handle('{"id": 7, "module": "%s", "callable": "hello"}' % MODULE))
+  response = json.loads(worker.handle('{"id": 8, "module": "%s", "callable": "missing"}' % MODULE))
+  assert response["id"] == 8
+  assert response["error"]["type"] == "AttributeError"
+  assert "missing" in response["error"]["message"]
+  assert json.loads(worker.handle("not json"))["error"]["type"] == "JSONDecodeError"
+
+
+
+def test_worker_handle_array_result(): # noqa: ANN201, D103
+  response = json.loads(Worker().handle('{"id": 1, "module": "%s", "callable": "arange"}' % MODULE))
+  assert {"id": 1, "result": [0, 1, 2]} == response
+
+def test_worker_serve_stdio(): # noqa: ANN201, D103
+  reader = io.StringIO(
+    json.dumps({"id": 1, "module": MODULE, "callable": "hello", "params": {"a": 1}})
+    + "\n\n"
+    + json.dumps({"id": 2, "module": MODULE, "classname": "AClass", "callable": "gety2"})
+    + "\n"
+  )
+  writer = io.StringIO()
+  Worker().serve(reader, writer)
+  assert [json.loads(line) for line in writer.getvalue().splitlines()] == [
+    {"id": 1, "result": "hello. a: 1"},
+    {"id": 2, "result": "hello."},
+  ]
+
+
+def test_worker_server(socket_path): # noqa: ANN201, D103
+  with WorkerServer(socket_path) as server:
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+      assert {"id": None, "result": "hello. x: 1"} == send(socket_path, {"module": MODULE, "callable": "hello", "params": {"x": 1}})
+      assert "error" in send(socket_path, {"module": MODULE, "callable": "missing"})
+    finally:
+      server.shutdown()
+      thread.join()
+
+
+def test_serve_unix_socket(socket_path): # noqa: ANN201, D103
+  thread = threading.Thread(target=serve_unix_socket, args=(socket_path,), daemon=True)
+  thread.start()
+  for _ in range(100):
+    try:
+      assert "hello." == send(socket_path, {"module": MODULE, "callable": "hello"})["result"]
+      break
+    except (FileNotFoundError, ConnectionRefusedError):
+      threading.Event().wait(0.01)
+  else:
+    pytest.fail("the worker did not start")
+
+
+def test_worker_serve_stdio_keeps_prints_out_of_responses(monkeypatch, capsys): # noqa: ANN201, D103
+  reader = io.StringIO(json.dumps({"id": 1, "module": MODULE, "callable": "chatty"}) + "\n")
+  Worker().serve(reader, sys.stdout)
+  captured = capsys.readouterr()
+  assert [json.loads(line) for line in captured.out.splitlines()] == [{"id": 1, "result": "hello."}]
+  assert "printing hello." in captured.err
+
+
+def test_worker_server_removes_stale_socket(socket_path): # noqa: ANN201, D103
+  stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  stale.bind(socket_path)
+  stale.close()
+  with WorkerServer(socket_path) as server:
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+      with pytest.raises(FileExistsError, match="a worker is already serving on"):
+        WorkerServer(socket_path)
+    finally:
+      server.shutdown()
+      thread.join()
+
+
+def test_worker_server_refuses_other_files(socket_path): # noqa: ANN201, D103
+  Path(socket_path).write_text("")
+  with pytest.raises(FileExistsError, match="exists and is not a socket"):
+    WorkerServer(socket_path)
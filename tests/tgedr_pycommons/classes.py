@@ -1,6 +1,10 @@
 """Module containing classes for testing purposes."""
+import asyncio
+from collections.abc import AsyncIterator, Iterator
 from typing import Any # noqa: D100
 
+import numpy as np
+
 
 class AClass: # noqa: D101
   def __init__(self, config: dict[str, Any] | None = None): # noqa: ANN204, D107
@@ -34,3 +38,57 @@ def hello(*args: Any, **kwargs: Any) -> Any:
   for key, value in kwargs.items():
     msg += f" {key}: {value}"
   return msg
+
+
+class CountedClass: # noqa: D101
+  instances = 0
+
+  def __init__(self, prefix: str = "hello."): # noqa: D107
+    CountedClass.instances += 1
+    self._prefix = prefix
+
+  def get(self, n: str | None = None) -> Any: # noqa: D102
+    return f"{self._prefix} n: {n}" if n else self._prefix
+
+
+async def ahello(name: str = "world") -> Any:
+  """A coroutine function returning a greeting."""
+  await asyncio.sleep(0)
+  return f"hello. {name}"
+
+
+ARRIVED: list[str] = []
+
+
+async def arrive(name: str, expected: int = 2) -> Any:
+  """A coroutine waiting for expected calls to run concurrently, failing if they run one after the other."""
+  ARRIVED.append(name)
+  for _ in range(200):
+    if len(ARRIVED) >= expected:
+      return name
+    await asyncio.sleep(0.01)
+  msg = f"{name} ran alone"
+  raise TimeoutError(msg)
+
+
+def count(n: int = 3) -> Iterator[int]:
+  """A generator counting up to n."""
+  yield from range(n)
+
+
+async def acount(n: int = 3) -> AsyncIterator[int]:
+  """An async generator counting up to n."""
+  for i in range(n):
+    await asyncio.sleep(0)
+    yield i
+
+
+def arange(n: int = 3) -> np.ndarray:
+  """An array counting up to n."""
+  return np.arange(n)
+
+
+def chatty(text: str = "hello.") -> Any:
+  """A function printing what it returns."""
+  print(f"printing {text}") # noqa: T201
+  return text
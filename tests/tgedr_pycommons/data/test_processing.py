@@ -1,5 +1,21 @@
+import asyncio
+import logging
+import pickle
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 import pytest
-from tgedr_pycommons.data.processing import process_text_array
+import numpy as np
+from tgedr_pycommons.data.processing import (
+    ProcessingStats,
+    TextPipeline,
+    iter_process_text_array,
+    process_text_array,
+    process_text_array_async,
+    process_text_file,
+)
+from tgedr_pycommons.data.ragged import RaggedArray
 
 
 def test_process_text_array():
@@ -38,3 +54,611 @@ def test_process_text_array_unbalanced():
     
     with pytest.raises(ValueError, match="x must be a balanced array"):
         process_text_array(x=x, f=lambda s: s.upper())
+
+
+@pytest.mark.parametrize(
+    ("x", "expected"),
+    [
+        ([], []),
+        ([[], []], [[], []]),
+        ([[[]], [[]]], [[[]], [[]]]),
+        (["Apple"], ["APPLE"]),
+        ([("Apple", "looking"), ("Autonomous", "cars")], [["APPLE", "LOOKING"], ["AUTONOMOUS", "CARS"]]),
+        ([[["a", "b"], ["c", "d"], ["e", "f"]]], [[["A", "B"], ["C", "D"], ["E", "F"]]]),
+    ],
+)
+def test_process_text_array_shapes(x, expected):
+    """Test that the output mirrors the nested structure of the input."""
+    assert process_text_array(x=x, f=lambda s: s.upper()) == expected
+
+
+def test_process_text_array_ndarray():
+    """Test that numpy arrays are accepted as input."""
+    x = np.array([["Apple", "looking"], ["Autonomous", "cars"]])
+    assert process_text_array(x=x, f=lambda s: s.upper()) == [["APPLE", "LOOKING"], ["AUTONOMOUS", "CARS"]]
+
+
+def test_process_text_array_list_of_ndarrays():
+    """Test that numpy arrays nested in lists are walked like lists, not passed to f."""
+    x = [np.array(["a", "b"]), np.array(["c", "d"])]
+    assert process_text_array(x=x, f=lambda s: s.upper()) == [["A", "B"], ["C", "D"]]
+    assert process_text_array(x=[np.array([["a"]]), np.array([["b"]])], f=lambda s: s.upper()) == [[["A"]], [["B"]]]
+    with pytest.raises(ValueError, match="inhomogeneous shape at depth 1"):
+        process_text_array(x=[np.array(["a", "b"]), np.array(["c"])], f=lambda s: s.upper())
+
+
+def test_process_text_array_applies_f_in_row_major_order():
+    """Test that f is called once per element, in row-major order."""
+    calls = []
+    x = [[["a", "b"], ["c", "d"]], [["e", "f"], ["g", "h"]]]
+    process_text_array(x=x, f=calls.append)
+    assert calls == list("abcdefgh")
+
+
+@pytest.mark.parametrize(
+    "x",
+    [
+        "Apple",
+        [["Apple"], "looking"],
+        ["Apple", ["looking"]],
+        [[["Apple"]], [["looking", "cars"]]],
+        [[], ["Apple"]],
+    ],
+)
+def test_process_text_array_unbalanced_shapes(x):
+    """Test that scalars and every kind of unbalanced nesting raise ValueError."""
+    with pytest.raises(ValueError, match="x must be a balanced array"):
+        process_text_array(x=x, f=lambda s: s.upper())
+
+
+def test_process_text_array_dedup(caplog):
+    """Test that dedup mode calls f once per distinct string and reports the dedup ratio."""
+    calls = []
+
+    def f(s):
+        calls.append(s)
+        return s.upper()
+
+    x = [["the", "cat", "<pad>"], ["the", "dog", "<pad>"]]
+    with caplog.at_level(logging.INFO):
+        actual = process_text_array(x=x, f=f, dedup=True)
+    assert actual == [["THE", "CAT", "<PAD>"], ["THE", "DOG", "<PAD>"]]
+    assert calls == ["the", "cat", "<pad>", "dog"]
+    assert "dedup ratio: 0.6667 (4 distinct out of 6)" in caplog.text
+
+
+def test_process_text_array_dedup_empty(caplog):
+    """Test dedup mode on an empty array."""
+    with caplog.at_level(logging.INFO):
+        assert process_text_array(x=[[], []], f=lambda s: s.upper(), dedup=True) == [[], []]
+    assert "dedup ratio: 1.0000 (0 distinct out of 0)" in caplog.text
+
+
+TOKENS = [["the", "cat", "sat", "on", "the"], ["mat", "and", "the", "dog", "sat"], ["on", "a", "log", "too", "."]]
+UPPER_TOKENS = [[t.upper() for t in row] for row in TOKENS]
+
+
+@pytest.mark.parametrize("chunksize", [None, 1, 4, 100])
+def test_process_text_array_process_pool(chunksize):
+    """Test that a process pool keeps the original nested order."""
+    assert process_text_array(x=TOKENS, f=str.upper, workers=2, chunksize=chunksize) == UPPER_TOKENS
+
+
+def test_process_text_array_process_pool_dedup():
+    """Test that dedup mode and a process pool can be combined."""
+    assert process_text_array(x=TOKENS, f=str.upper, dedup=True, workers=2, chunksize=2) == UPPER_TOKENS
+
+
+def test_process_text_array_process_pool_unpicklable_falls_back_to_serial(caplog):
+    """Test that a lambda, which cannot be pickled, runs serially with a warning."""
+    with caplog.at_level(logging.WARNING):
+        assert process_text_array(x=TOKENS, f=lambda s: s.upper(), workers=2, chunksize=2) == UPPER_TOKENS
+    assert "cannot be pickled, falling back to serial execution" in caplog.text
+
+
+def test_process_text_array_executor():
+    """Test that a provided executor is used and left running."""
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        assert process_text_array(x=TOKENS, f=lambda s: s.upper(), executor=executor) == UPPER_TOKENS
+        assert process_text_array(x=TOKENS, f=lambda s: s.upper(), executor=executor, chunksize=2) == UPPER_TOKENS
+
+
+@pytest.mark.parametrize(("workers", "chunksize"), [(0, None), (2, 0)])
+def test_process_text_array_invalid_parallel_options(workers, chunksize):
+    """Test that non positive workers or chunksize are rejected."""
+    with pytest.raises(ValueError, match="must be a positive number"):
+        process_text_array(x=TOKENS, f=str.upper, workers=workers, chunksize=chunksize)
+
+
+class InFlight:
+    """Tracks the maximum number of concurrent calls."""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *args):
+        with self.lock:
+            self.current -= 1
+
+
+@pytest.mark.parametrize("workers", [None, 1, 4])
+def test_process_text_array_thread_pool(workers):
+    """Test that a thread pool keeps the original nested order and bounds the calls in flight."""
+    in_flight = InFlight()
+
+    def f(s):
+        with in_flight:
+            time.sleep(0.005)
+            return s.upper()
+
+    assert process_text_array(x=TOKENS, f=f, workers=workers, executor="thread", chunksize=1) == UPPER_TOKENS
+    assert in_flight.peak <= (workers or len(TOKENS) * len(TOKENS[0]))
+
+
+def test_process_text_array_unknown_executor():
+    """Test that an unknown kind of pool is rejected."""
+    with pytest.raises(ValueError, match="executor must be an Executor or one of"):
+        process_text_array(x=TOKENS, f=str.upper, workers=2, executor="fiber")
+
+
+@pytest.mark.parametrize("concurrency", [1, 3, 100])
+def test_process_text_array_async(concurrency):
+    """Test that coroutine functions run concurrently, bounded, and keep the original nested order."""
+    in_flight = InFlight()
+
+    async def f(s):
+        with in_flight:
+            await asyncio.sleep(0.001)
+            return s.upper()
+
+    assert asyncio.run(process_text_array_async(x=TOKENS, f=f, concurrency=concurrency)) == UPPER_TOKENS
+    assert in_flight.peak == min(concurrency, len(TOKENS) * len(TOKENS[0]))
+
+
+def test_process_text_array_async_dedup_with_plain_function():
+    """Test the async variant with dedup mode and a plain function."""
+    assert asyncio.run(process_text_array_async(x=TOKENS, f=str.upper, dedup=True)) == UPPER_TOKENS
+
+
+def test_process_text_array_async_propagates_errors():
+    """Test that an exception raised by f surfaces to the caller."""
+
+    async def f(s):
+        raise KeyError(s)
+
+    with pytest.raises(ExceptionGroup) as e:
+        asyncio.run(process_text_array_async(x=TOKENS, f=f))
+    assert e.group_contains(KeyError)
+
+
+def test_process_text_array_async_invalid_concurrency():
+    """Test that a non positive concurrency is rejected."""
+    with pytest.raises(ValueError, match="concurrency must be a positive number"):
+        asyncio.run(process_text_array_async(x=TOKENS, f=str.upper, concurrency=0))
+
+
+def test_process_text_array_async_unbalanced():
+    """Test that unbalanced arrays raise ValueError in the async variant."""
+    with pytest.raises(ValueError, match="x must be a balanced array"):
+        asyncio.run(process_text_array_async(x=[["a"], ["b", "c"]], f=str.upper))
+
+
+def upper_batch(batch):
+    """A batch function, module level so that it can be pickled."""
+    return [s.upper() for s in batch]
+
+
+@pytest.mark.parametrize("batch_size", [1, 4, 15, 100])
+def test_process_text_array_batched(batch_size):
+    """Test that a batch function is called with batches of up to batch_size elements."""
+    batches = []
+
+    def f(batch):
+        batches.append(len(batch))
+        return upper_batch(batch)
+
+    assert process_text_array(x=TOKENS, f=f, batch_size=batch_size) == UPPER_TOKENS
+    assert max(batches) <= batch_size
+    assert sum(batches) == 15
+    assert len(batches) == -(-15 // batch_size)
+
+
+def test_process_text_array_batched_returning_ndarray():
+    """Test that a batch function can return a numpy array."""
+    actual = process_text_array(x=TOKENS, f=lambda batch: np.char.str_len(np.array(batch)), batch_size=4)
+    assert actual == [[len(t) for t in row] for row in TOKENS]
+
+
+@pytest.mark.parametrize(("workers", "executor", "chunksize"), [(2, "process", None), (2, "process", 3), (3, "thread", None)])
+def test_process_text_array_batched_parallel(workers, executor, chunksize):
+    """Test that batch functions can be combined with a pool and dedup mode."""
+    assert process_text_array(x=TOKENS, f=upper_batch, batch_size=2, workers=workers, executor=executor, chunksize=chunksize) == UPPER_TOKENS
+    assert process_text_array(x=TOKENS, f=upper_batch, batch_size=2, workers=workers, executor=executor, dedup=True) == UPPER_TOKENS
+
+
+def test_process_text_array_batched_wrong_length():
+    """Test that a batch function returning the wrong number of results is rejected."""
+    with pytest.raises(ValueError, match="the batch function returned 1 results for a batch of 4 values"):
+        process_text_array(x=TOKENS, f=lambda batch: batch[:1], batch_size=4)
+
+
+def test_process_text_array_invalid_batch_size():
+    """Test that a non positive batch_size is rejected."""
+    with pytest.raises(ValueError, match="batch_size must be a positive number"):
+        process_text_array(x=TOKENS, f=upper_batch, batch_size=0)
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 1024])
+def test_iter_process_text_array(block_size):
+    """Test that rows are transformed in order."""
+    actual = iter_process_text_array(rows=iter(TOKENS), f=str.upper, block_size=block_size)
+    assert list(actual) == UPPER_TOKENS
+
+
+def test_iter_process_text_array_is_lazy():
+    """Test that rows are only read one block at a time."""
+    read = []
+
+    def rows():
+        for row in TOKENS:
+            read.append(row)
+            yield row
+
+    actual = iter_process_text_array(rows=rows(), f=str.upper, block_size=2)
+    assert read == []
+    assert next(actual) == UPPER_TOKENS[0]
+    assert len(read) == 2
+    assert next(actual) == UPPER_TOKENS[1]
+    assert len(read) == 2
+    assert next(actual) == UPPER_TOKENS[2]
+    assert len(read) == 3
+
+
+@pytest.mark.parametrize(
+    ("rows", "expected"),
+    [
+        ([], []),
+        (["the", "cat"], ["THE", "CAT"]),
+        ([[], []], [[], []]),
+        ([[["a", "b"]], [["c", "d"]]], [[["A", "B"]], [["C", "D"]]]),
+    ],
+)
+def test_iter_process_text_array_shapes(rows, expected):
+    """Test streaming rows of different shapes, including scalar rows."""
+    assert list(iter_process_text_array(rows=rows, f=str.upper)) == expected
+
+
+def test_iter_process_text_array_parallel_batched():
+    """Test that pools and batch functions can be used on streams."""
+    rows = TOKENS * 4
+    expected = UPPER_TOKENS * 4
+    assert list(iter_process_text_array(rows=rows, f=upper_batch, batch_size=3, workers=2, block_size=3)) == expected
+
+
+@pytest.mark.parametrize(
+    ("rows", "match"),
+    [
+        ([["a", "b"], ["c"]], r"row 1 has shape \(1,\), expected \(2,\) as the first row"),
+        (["a", ["b"]], r"row 1 has shape \(1,\), expected \(\) as the first row"),
+        ([["a", "b"], ["c", ["d"]]], "row 1 must be a balanced array"),
+    ],
+)
+def test_iter_process_text_array_unbalanced(rows, match):
+    """Test that a row that is unbalanced or differs from the first row's shape raises ValueError."""
+    actual = iter_process_text_array(rows=rows, f=str.upper, block_size=1)
+    assert next(actual) is not None
+    with pytest.raises(ValueError, match=match):
+        next(actual)
+
+
+def test_iter_process_text_array_invalid_block_size():
+    """Test that a non positive block_size is rejected upfront."""
+    with pytest.raises(ValueError, match="block_size must be a positive number"):
+        iter_process_text_array(rows=TOKENS, f=str.upper, block_size=0)
+
+
+def test_text_pipeline():
+    """Test that a pipeline applies its steps in order and in a single pass."""
+    calls = []
+
+    def tokenize(s):
+        calls.append(s)
+        return s.split()
+
+    SEQUENCE_MAX_LEN = 3
+    x = [["the cat sat on the mat", ""], ["a dog", "!"]]
+    pipeline = (
+        TextPipeline()
+        .map(str.lower)
+        .filter(lambda s: s and s[0].isalnum(), sentinel=None)
+        .map(tokenize)
+        .pad_truncate(SEQUENCE_MAX_LEN, pad="<pad>")
+    )
+    expected = [[["the", "cat", "sat"], None], [["a", "dog", "<pad>"], None]]
+    assert pipeline.run(x) == expected
+    assert calls == ["the cat sat on the mat", "a dog"]
+
+
+def test_text_pipeline_is_immutable():
+    """Test that adding a step leaves the original pipeline untouched."""
+    base = TextPipeline().map(str.upper)
+    extended = base.map(lambda s: s + "!")
+    assert base.run(["a"]) == ["A"]
+    assert extended.run(["a"]) == ["A!"]
+    assert TextPipeline().run(["a"]) == ["a"]
+
+
+def test_text_pipeline_compile():
+    """Test that a compiled pipeline is a single picklable function usable with any text array function."""
+    f = TextPipeline().map(str.strip).map(str.upper).pad_truncate(2).compile()
+    assert f(" ab ") == ["A", "B"]
+    assert f("") == [None, None]
+    assert pickle.loads(pickle.dumps(f))("abc") == ["A", "B"]
+    assert process_text_array(x=[" a ", "bcd"], f=f) == [["A", None], ["B", "C"]]
+
+
+def test_text_pipeline_run_options_and_iter():
+    """Test that the options of the text array functions can be given to a pipeline."""
+    pipeline = TextPipeline().map(str.upper)
+    assert pipeline.run(TOKENS, workers=2, chunksize=2, dedup=True) == UPPER_TOKENS
+    assert list(pipeline.iter(iter(TOKENS), block_size=2)) == UPPER_TOKENS
+
+
+def test_text_pipeline_pad_truncate_negative():
+    """Test that a negative max_len is rejected."""
+    with pytest.raises(ValueError, match="max_len must not be negative"):
+        TextPipeline().pad_truncate(-1)
+
+
+def test_process_text_array_out_dtype():
+    """Test that numeric results are written straight into an ndarray shaped like the input."""
+    actual = process_text_array(x=TOKENS, f=len, out_dtype=np.int32)
+    assert isinstance(actual, np.ndarray)
+    assert actual.dtype == np.int32
+    np.testing.assert_array_equal(actual, np.char.str_len(np.array(TOKENS)))
+
+
+def test_process_text_array_out():
+    """Test that results are written into a preallocated array, which is returned."""
+    out = np.zeros((3, 5), dtype=np.int64)
+    actual = process_text_array(x=TOKENS, f=len, out=out, out_dtype=np.int64)
+    assert actual is out
+    np.testing.assert_array_equal(out, np.char.str_len(np.array(TOKENS)))
+
+
+@pytest.mark.parametrize("dedup", [False, True])
+def test_process_text_array_out_max_len(dedup):
+    """Test that sequence results are padded/truncated to fill a trailing dimension."""
+    SEQUENCE_MAX_LEN = 3
+    x = [["the cat sat on the mat", "a dog"], ["", "a dog"]]
+    actual = process_text_array(
+        x=x, f=lambda s: [len(t) for t in s.split()], out_dtype=np.int16, max_len=SEQUENCE_MAX_LEN, pad=-1, dedup=dedup
+    )
+    assert actual.shape == (2, 2, SEQUENCE_MAX_LEN)
+    assert actual.tolist() == [[[3, 3, 3], [1, 3, -1]], [[-1, -1, -1], [1, 3, -1]]]
+
+
+def test_process_text_array_out_dedup_parallel_batched():
+    """Test that dense outputs can be combined with the other modes."""
+    actual = process_text_array(
+        x=TOKENS, f=lambda batch: [len(s) for s in batch], out_dtype=np.int8, dedup=True, batch_size=2, executor="thread", workers=2
+    )
+    np.testing.assert_array_equal(actual, np.char.str_len(np.array(TOKENS)))
+
+
+def test_process_text_array_out_empty():
+    """Test dense outputs for empty arrays."""
+    assert process_text_array(x=[[], []], f=len, out_dtype=np.int8, dedup=True).shape == (2, 0)
+    assert process_text_array(x=[], f=len, out_dtype=np.int8, max_len=4).shape == (0, 4)
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "match"),
+    [
+        ({"max_len": 3}, "max_len requires an output array"),
+        ({"out_dtype": np.int8, "max_len": 0}, "max_len must be a positive number"),
+        ({"out": np.zeros((5, 3), dtype=np.int8)}, r"out must have shape \(3, 5\), got \(5, 3\)"),
+        ({"out": np.zeros((3, 5), dtype=np.int8), "out_dtype": np.int16}, "which does not match out_dtype int16"),
+        ({"out": np.zeros((5, 3), dtype=np.int8).T}, "out must be a C-contiguous array"),
+    ],
+)
+def test_process_text_array_invalid_out(kwargs, match):
+    """Test that inconsistent output options are rejected before f is applied."""
+
+    def f(s):
+        raise AssertionError
+
+    with pytest.raises(ValueError, match=match):
+        process_text_array(x=TOKENS, f=f, **kwargs)
+
+
+def test_process_text_array_ragged():
+    """Test that ragged arrays are processed over their values only and keep their offsets."""
+    calls = []
+
+    def f(s):
+        calls.append(s)
+        return s.upper()
+
+    x = RaggedArray.from_nested([["Apple", "looking", "extra"], ["Autonomous", "cars"], []])
+    actual = process_text_array(x=x, f=f)
+    assert isinstance(actual, RaggedArray)
+    assert actual.to_nested() == [["APPLE", "LOOKING", "EXTRA"], ["AUTONOMOUS", "CARS"], []]
+    assert calls == ["Apple", "looking", "extra", "Autonomous", "cars"]
+
+
+def test_process_text_array_ragged_modes():
+    """Test that ragged arrays can be combined with the other modes."""
+    x = RaggedArray.from_nested([["the", "cat"], ["the"]])
+    assert process_text_array(x=x, f=upper_batch, batch_size=2, dedup=True, workers=2).to_nested() == [["THE", "CAT"], ["THE"]]
+    actual = process_text_array(x=x, f=lambda s: [len(s)], out_dtype=np.int8, max_len=2, pad=-1)
+    assert isinstance(actual.values, np.ndarray)
+    assert actual.to_nested() == [[[3, -1], [3, -1]], [[3, -1]]]
+    assert TextPipeline().map(len).run(x) == RaggedArray([3, 3, 3], x.offsets)
+
+
+@pytest.mark.parametrize("chunk_elements", [1, 4, 65536])
+def test_process_text_file_npy(tmp_path, chunk_elements):
+    """Test processing a memory-mapped .npy file into a new .npy file, chunk by chunk."""
+    src, dst = tmp_path / "tokens.npy", tmp_path / "upper.npy"
+    np.save(src, np.array(TOKENS))
+    assert process_text_file(src, dst, str.upper, chunk_elements=chunk_elements) == dst
+    actual = np.load(dst)
+    assert actual.dtype == np.array(TOKENS).dtype
+    assert actual.tolist() == UPPER_TOKENS
+
+
+@pytest.mark.parametrize(
+    ("tokens", "f", "wide"),
+    [(["ab", "cd"], lambda s: s[0] * 5, "U10"), (["ß"], str.upper, "U10"), ([b"ab"], lambda s: s * 2, "S10")],
+)
+def test_process_text_file_rejects_results_wider_than_dtype(tmp_path, tokens, f, wide):
+    """Test that results longer than the fixed width input dtype raise instead of being truncated."""
+    src, dst = tmp_path / "tokens.npy", tmp_path / "out.npy"
+    np.save(src, np.array(tokens))
+    with pytest.raises(ValueError, match="does not fit the output dtype"):
+        process_text_file(src, dst, f)
+    process_text_file(src, dst, f, out_dtype=wide)
+    assert np.load(dst).tolist() == [f(token) for token in tokens]
+
+
+def test_process_text_array_rejects_sequences_wider_than_dtype():
+    """Test that the width check covers the items of max_len sequences too."""
+    with pytest.raises(ValueError, match="result 'abc' does not fit the output dtype <U2"):
+        process_text_array(x=["abc d"], f=str.split, out_dtype="U2", max_len=2, pad="")
+    assert process_text_array(x=["ab d e"], f=str.split, out_dtype="U2", max_len=2, pad="").tolist() == [["ab", "d"]]
+    assert process_text_array(x=["ab"], f=len, out_dtype="U1").tolist() == ["2"]
+
+
+def test_process_text_file_fortran_order_max_len(tmp_path):
+    """Test that Fortran ordered inputs keep their element positions, with a trailing max_len dimension."""
+    src, dst = tmp_path / "tokens.npy", str(tmp_path / "lengths.npy")
+    np.save(src, np.asfortranarray(np.array(TOKENS)))
+    process_text_file(str(src), dst, lambda s: [len(s), ord(s[0])], out_dtype=np.int32, max_len=3, pad=-1, chunk_elements=4)
+    expected = [[[len(t), ord(t[0]), -1] for t in row] for row in TOKENS]
+    assert np.load(dst).tolist() == expected
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_process_text_file_npz(tmp_path, compressed):
+    """Test streaming a member of a .npz archive."""
+    src, dst = tmp_path / "tokens.npz", tmp_path / "lengths.npy"
+    (np.savez_compressed if compressed else np.savez)(src, tokens=np.array(TOKENS))
+    process_text_file(src, dst, len, out_dtype=np.int8, chunk_elements=4)
+    assert np.load(dst).tolist() == [[len(t) for t in row] for row in TOKENS]
+
+    np.savez(src, tokens=np.array(TOKENS), other=np.array(["a"]))
+    process_text_file(src, dst, upper_batch, key="tokens", batch_size=2, workers=2, chunk_elements=8)
+    assert np.load(dst).tolist() == UPPER_TOKENS
+    with pytest.raises(ValueError, match="key must be one of the arrays in"):
+        process_text_file(src, dst, str.upper)
+
+
+def test_process_text_file_header_v2(tmp_path):
+    """Test inputs written with version 2.0 of the .npy format."""
+    src, dst = tmp_path / "tokens.npy", tmp_path / "upper.npy"
+    with src.open("wb") as fp:
+        np.lib.format.write_array(fp, np.array(TOKENS), version=(2, 0))
+    process_text_file(src, dst, str.upper)
+    assert np.load(dst).tolist() == UPPER_TOKENS
+
+
+@pytest.mark.parametrize(
+    ("array", "match"),
+    [
+        (np.array([["a", "b"], ["c"]], dtype=object), "found an object array"),
+        (np.array("a"), "found a scalar"),
+    ],
+)
+def test_process_text_file_rejects_from_header(tmp_path, array, match):
+    """Test that object arrays and scalars are rejected from the header, before any processing."""
+    src, dst = tmp_path / "tokens.npy", tmp_path / "upper.npy"
+    np.save(src, array, allow_pickle=True)
+    with pytest.raises(ValueError, match=match):
+        process_text_file(src, dst, str.upper)
+    assert not dst.exists()
+
+
+def test_process_text_file_invalid_chunk_elements(tmp_path):
+    """Test that a non positive chunk_elements is rejected."""
+    with pytest.raises(ValueError, match="chunk_elements must be a positive number"):
+        process_text_file(tmp_path / "a.npy", tmp_path / "b.npy", str.upper, chunk_elements=0)
+
+
+def test_process_text_array_on_stats():
+    """Test that an instrumented call reports its statistics through the callback."""
+    reports = []
+
+    def f(s):
+        time.sleep(0.001)
+        return s.upper()
+
+    assert process_text_array(x=TOKENS, f=f, on_stats=reports.append) == UPPER_TOKENS
+    assert len(reports) == 1
+    stats = reports[0]
+    assert isinstance(stats, ProcessingStats)
+    assert stats.elements == 15
+    assert stats.calls == 15
+    assert stats.distinct is None
+    assert stats.dedup_ratio is None
+    assert 0.001 <= stats.f_latency_percentile(50) <= stats.f_latency_percentile(99)
+    assert 0.015 <= stats.f_total_seconds <= stats.apply_seconds
+    assert stats.validation_seconds + stats.apply_seconds <= stats.total_seconds
+    assert stats.elements_per_second == pytest.approx(15 / stats.total_seconds)
+    assert stats.peak_memory_bytes > 0
+    summary = stats.as_dict()
+    assert summary["f_latency_p95_seconds"] == stats.f_latency_percentile(95)
+    assert set(summary) >= {"validation_seconds", "f_latency_p50_seconds", "f_latency_p99_seconds", "elements_per_second", "peak_memory_bytes"}
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "calls", "distinct"),
+    [
+        ({"dedup": True}, 11, 11),
+        ({"workers": 2, "chunksize": 2}, 15, None),
+        ({"batch_size": 4, "executor": "thread", "workers": 2}, 4, None),
+        ({"out_dtype": np.int8, "dedup": True, "batch_size": 5}, 3, 11),
+    ],
+)
+def test_process_text_array_on_stats_modes(kwargs, calls, distinct):
+    """Test the statistics of the other modes, latencies are collected from the workers too."""
+    reports = []
+    f = upper_batch if "batch_size" in kwargs else str.upper
+    if "out_dtype" in kwargs:
+        f = lambda batch: [len(s) for s in batch]  # noqa: E731
+    process_text_array(x=TOKENS, f=f, on_stats=reports.append, **kwargs)
+    assert reports[0].calls == calls
+    assert reports[0].distinct == distinct
+    assert reports[0].elements == 15
+
+
+def test_process_text_array_on_stats_empty_and_tracing():
+    """Test the statistics of an empty array, when memory is already being traced."""
+    reports = []
+    tracemalloc.start()
+    try:
+        process_text_array(x=[[], []], f=str.upper, dedup=True, on_stats=reports.append)
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    assert reports[0].calls == 0
+    assert reports[0].dedup_ratio == 1.0
+    assert reports[0].f_latency_percentile(50) == 0.0
+    assert ProcessingStats().elements_per_second == 0.0
+
+
+def test_process_text_array_on_stats_not_called_on_error():
+    """Test that a failing call does not report statistics and stops tracing memory."""
+    reports = []
+    with pytest.raises(ValueError, match="x must be a balanced array"):
+        process_text_array(x=[["a"], ["b", "c"]], f=str.upper, on_stats=reports.append)
+    assert reports == []
+    assert not tracemalloc.is_tracing()
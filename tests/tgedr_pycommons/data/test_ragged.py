@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from tgedr_pycommons.data.ragged import RaggedArray
+
+
+@pytest.mark.parametrize(
+    ("x", "values", "offsets"),
+    [
+        ([], [], []),
+        (["Apple", "looking"], ["Apple", "looking"], []),
+        ([["Apple", "looking", "extra"], ["Autonomous", "cars"]], ["Apple", "looking", "extra", "Autonomous", "cars"], [[0, 3, 5]]),
+        ([[], ["a"], []], ["a"], [[0, 0, 1, 1]]),
+        ([[], [[]]], [], [[0, 0, 1], [0, 0]]),
+        ([[["a"], []], [["b", "c"]], []], ["a", "b", "c"], [[0, 2, 3, 3], [0, 1, 1, 3]]),
+        ((("a", "b"), ("c",)), ["a", "b", "c"], [[0, 2, 3]]),
+    ],
+)
+def test_ragged_array_round_trip(x, values, offsets):
+    """Test the conversions to and from nested lists."""
+    ragged = RaggedArray.from_nested(x)
+    assert ragged.values == values
+    assert [o.tolist() for o in ragged.offsets] == offsets
+    assert ragged.depth == len(offsets) + 1
+    assert len(ragged) == len(x)
+    assert ragged.to_nested() == RaggedArray(values, offsets).to_nested()
+    assert RaggedArray.from_nested(ragged.to_nested()) == ragged
+    assert ragged == RaggedArray(values, offsets)
+
+
+def test_ragged_array_ndarray_values():
+    """Test that ndarray values are converted back to nested lists."""
+    ragged = RaggedArray(np.array([[1, 2], [3, 4], [5, 6]]), [[0, 1, 3]])
+    assert ragged.to_nested() == [[[1, 2]], [[3, 4], [5, 6]]]
+    assert ragged == RaggedArray([[1, 2], [3, 4], [5, 6]], [np.array([0, 1, 3])])
+
+
+def test_ragged_array_equality_and_repr():
+    """Test equality and representation."""
+    ragged = RaggedArray(["a", "b"], [[0, 1, 2]])
+    assert ragged != RaggedArray(["a", "b"], [[0, 2, 2]])
+    assert ragged != RaggedArray(["a", "b"])
+    assert ragged != [["a"], ["b"]]
+    assert repr(ragged) == "RaggedArray(values=['a', 'b'], offsets=[[0, 1, 2]])"
+
+
+def test_ragged_array_with_values():
+    """Test replacing the values while keeping the offsets."""
+    ragged = RaggedArray.from_nested([["a", "b"], ["c"]])
+    assert ragged.with_values(["A", "B", "C"]).to_nested() == [["A", "B"], ["C"]]
+    with pytest.raises(ValueError, match="expected 3 values, got 2"):
+        ragged.with_values(["A", "B"])
+
+
+@pytest.mark.parametrize(
+    "x",
+    ["abc", [["a"], "b"], [["a"], [["b"]]], [[["a"]], ["b"]], [[], ["a", ["b"]]]],
+)
+def test_ragged_array_from_nested_mixed_depths(x):
+    """Test that leaves at different depths are rejected."""
+    with pytest.raises(ValueError):
+        RaggedArray.from_nested(x)
+
+
+@pytest.mark.parametrize(
+    ("values", "offsets"),
+    [
+        (["a", "b"], [[0, 1]]),
+        (["a", "b"], [[1, 2]]),
+        (["a", "b"], [[0, 2, 1, 2]]),
+        (["a", "b"], [[]]),
+        (["a", "b"], [[[0, 2]]]),
+        (["a", "b"], [[0, 3], [0, 1, 2]]),
+    ],
+)
+def test_ragged_array_inconsistent_offsets(values, offsets):
+    """Test that inconsistent offsets are rejected."""
+    with pytest.raises(ValueError, match="must be a non-decreasing 1-D array"):
+        RaggedArray(values, offsets)
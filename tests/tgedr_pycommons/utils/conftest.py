@@ -0,0 +1,47 @@
+import importlib
+import sys
+import zipfile
+
+import pytest
+
+
+class PackageWriter:
+    """Writes packages of modules to sys.path entries under a temporary folder, unloading them afterwards."""
+
+    def __init__(self, tmp_path, monkeypatch):
+        self.tmp_path = tmp_path
+        self.monkeypatch = monkeypatch
+        self.packages = set()
+
+    def __call__(self, package, modules, entry="src"):
+        """Write the modules, a dict of file names relative to the package to their source, and return the
+        package folder, or archive when entry ends with .zip."""
+        root = self.tmp_path / entry
+        if entry.endswith(".zip"):
+            with zipfile.ZipFile(root, "a") as zip_file:
+                for name, content in modules.items():
+                    zip_file.writestr(f"{package}/{name}", content)
+            location = root
+        else:
+            location = root / package
+            for name, content in modules.items():
+                (location / name).parent.mkdir(parents=True, exist_ok=True)
+                (location / name).write_text(content)
+        if str(root) not in map(str, sys.path):
+            self.monkeypatch.syspath_prepend(str(root))
+        importlib.invalidate_caches()
+        self.packages.add(package)
+        return location
+
+    def unload(self):
+        """Remove the modules of the written packages from sys.modules, so they are imported again."""
+        for name in [name for name in sys.modules if name.split(".")[0] in self.packages]:
+            del sys.modules[name]
+        importlib.invalidate_caches()
+
+
+@pytest.fixture
+def write_package(tmp_path, monkeypatch):
+    writer = PackageWriter(tmp_path, monkeypatch)
+    yield writer
+    writer.unload()
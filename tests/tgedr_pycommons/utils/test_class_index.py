@@ -0,0 +1,78 @@
+import importlib
+import sys
+
+import pytest
+
+from tgedr_pycommons.utils.class_index import ClassIndex
+
+
+PACKAGE = "indexed_plugins"
+
+MODULES = {
+    "__init__.py": "",
+    "base.py": (
+        "from abc import ABC, abstractmethod\n\n\nclass Plugin(ABC):\n    @abstractmethod\n    def run(self):\n"
+        "        pass\n\n\nclass Other:\n    pass\n"
+    ),
+    "pair.py": (
+        "from indexed_plugins.base import Other, Plugin\n\n\nclass First(Plugin):\n    def run(self):\n"
+        "        pass\n\n\nclass Second(First):\n    pass\n\n\nAlias = Second\n"
+    ),
+    "abstract.py": "from indexed_plugins.base import Plugin\n\n\nclass Partial(Plugin):\n    pass\n",
+    "reexport.py": "from indexed_plugins.pair import Second\n",
+}
+
+
+@pytest.fixture
+def plugins(write_package):
+    return write_package(PACKAGE, MODULES)
+
+
+def _classes(module, *names):
+    the_module = importlib.import_module(f"{PACKAGE}.{module}")
+    return [getattr(the_module, name) for name in names]
+
+
+def test_subclasses(plugins):
+    index = ClassIndex(PACKAGE)
+    plugin, other = _classes("base", "Plugin", "Other")
+    first, second = _classes("pair", "First", "Second")
+    assert len(index) == 4
+    assert set(index.subclasses(plugin)) == {first, second}
+    assert index.subclasses(first) == [second]
+    assert index.subclasses(other) == []
+    assert index.modules(second) == [f"{PACKAGE}.pair", f"{PACKAGE}.reexport"]
+
+
+def test_find_class_implementations_keeps_all_classes(plugins):
+    index = ClassIndex(PACKAGE, workers=2)
+    plugin = _classes("base", "Plugin")[0]
+    first, second = _classes("pair", "First", "Second")
+    assert index.find_class_implementations(plugin) == {"pair": [first, second], "reexport": [second]}
+
+
+def test_refresh_on_new_modules(write_package, plugins):
+    index = ClassIndex(PACKAGE)
+    plugin = _classes("base", "Plugin")[0]
+    write_package(PACKAGE, {"late.py": MODULES["pair.py"].replace("First", "Late").replace("Second", "Later")})
+    late = _classes("late", "Late")[0]
+    assert late in index.subclasses(plugin)
+    assert index.modules(late) == [f"{PACKAGE}.late"]
+
+
+def test_invalidate_after_reload(plugins):
+    index = ClassIndex(PACKAGE)
+    plugin = _classes("base", "Plugin")[0]
+    old_first, old_second = _classes("pair", "First", "Second")
+    importlib.reload(sys.modules[f"{PACKAGE}.pair"])
+    index.invalidate(f"{PACKAGE}.pair")
+    first, second = _classes("pair", "First", "Second")
+    assert index.subclasses(plugin) == [old_second, first, second]
+    assert index.modules(old_first) == []
+    assert index.modules(old_second) == [f"{PACKAGE}.reexport"]
+
+    importlib.reload(sys.modules[f"{PACKAGE}.reexport"])
+    del sys.modules[f"{PACKAGE}.abstract"]
+    index.invalidate()
+    assert set(index.subclasses(plugin)) == {first, second}
+    assert len(index) == 3
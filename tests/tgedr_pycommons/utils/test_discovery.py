@@ -0,0 +1,186 @@
+import importlib
+import json
+import os
+import sys
+
+import pytest
+
+from tgedr_pycommons.utils.discovery import DiscoveryIndex, LazyClassMapping
+from tgedr_pycommons.utils.reflection import UtilsReflection
+from tests.tgedr_pycommons.utils.impls import ASource, Source
+
+
+PACKAGE = "discovery_plugins"
+
+MODULES = {
+    "__init__.py": "",
+    "base.py": "class Plugin:\n    pass\n",
+    "alpha.py": "from discovery_plugins.base import Plugin\n\n\nclass Alpha(Plugin):\n    pass\n",
+    "beta.py": "from discovery_plugins.base import Plugin\n\n\nclass Beta(Plugin):\n    pass\n",
+    "gamma.py": "from discovery_plugins.alpha import Alpha\n\n\nclass Gamma(Alpha):\n    pass\n",
+}
+
+
+@pytest.fixture
+def plugins(write_package):
+    return write_package(PACKAGE, MODULES)
+
+
+def _base():
+    return importlib.import_module(f"{PACKAGE}.base").Plugin
+
+
+def test_cold_then_warm(write_package, plugins, tmp_path):
+    path = tmp_path / "index.json"
+    index = DiscoveryIndex(path)
+    result = UtilsReflection.find_class_implementations(PACKAGE, _base(), index=index)
+    assert sorted(result) == ["alpha", "beta", "gamma"]
+    assert result["gamma"].__name__ == "Gamma"
+    assert index.stats == {"hits": 0, "misses": 4, "hit_rate": 0.0}
+    assert path.is_file()
+
+    write_package.unload()
+    base = _base()
+    warm = DiscoveryIndex(path)
+    result = UtilsReflection.find_class_implementations(PACKAGE, base, index=warm)
+    assert warm.stats == {"hits": 4, "misses": 0, "hit_rate": 1.0}
+    assert sorted(result) == ["alpha", "beta", "gamma"]
+    assert f"{PACKAGE}.beta" not in sys.modules
+    assert result.reference("beta") == f"{PACKAGE}.beta.Beta"
+    assert "discovery_plugins.beta.Beta" in repr(result)
+    assert f"{PACKAGE}.beta" not in sys.modules
+    assert issubclass(result["beta"], base)
+    assert result["beta"] is result["beta"]
+    assert f"{PACKAGE}.alpha" not in sys.modules
+
+
+def test_same_results_as_scanning():
+    index = DiscoveryIndex()
+    result = UtilsReflection.find_class_implementations("tests.tgedr_pycommons.utils", Source, index=index)
+    assert dict(result) == UtilsReflection.find_class_implementations("tests.tgedr_pycommons.utils", Source)
+    assert result["impls"] is ASource
+    assert isinstance(result, LazyClassMapping)
+    assert set(result.values()) == {ASource}
+
+
+def test_changed_module_is_scanned_again(write_package, plugins, tmp_path):
+    path = tmp_path / "index.json"
+    DiscoveryIndex(path).find_class_implementations(PACKAGE, _base())
+    (plugins / "beta.py").write_text(MODULES["beta.py"].replace("Beta", "BetaTwo"))
+    (plugins / "delta.py").write_text(MODULES["beta.py"].replace("Beta", "Delta"))
+    os.remove(plugins / "gamma.py")
+    write_package.unload()
+
+    index = DiscoveryIndex(path)
+    result = index.find_class_implementations(PACKAGE, _base())
+    assert index.stats["misses"] == 2
+    assert sorted(result) == ["alpha", "beta", "delta"]
+    assert result.reference("beta") == f"{PACKAGE}.beta.BetaTwo"
+    assert sorted(json.loads(path.read_text())["packages"][PACKAGE]) == [
+        f"{PACKAGE}.alpha", f"{PACKAGE}.base", f"{PACKAGE}.beta", f"{PACKAGE}.delta"
+    ]
+
+
+def test_touched_module_is_checked_by_hash(write_package, plugins, tmp_path):
+    path = tmp_path / "index.json"
+    DiscoveryIndex(path).find_class_implementations(PACKAGE, _base())
+    stat = (plugins / "alpha.py").stat()
+    os.utime(plugins / "alpha.py", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    (plugins / "beta.py").write_text(MODULES["beta.py"].replace("Beta", "Atem"))
+    os.utime(plugins / "beta.py", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    write_package.unload()
+
+    index = DiscoveryIndex(path)
+    index.find_class_implementations(PACKAGE, _base())
+    assert index.stats["hits"] == 3
+    assert index.stats["misses"] == 1
+    assert json.loads(path.read_text())["packages"][PACKAGE][f"{PACKAGE}.alpha"]["mtime_ns"] == stat.st_mtime_ns + 10**9
+
+
+def test_invalidate(plugins, tmp_path):
+    index = DiscoveryIndex(tmp_path / "index.json")
+    index.find_class_implementations(PACKAGE, _base())
+    index.invalidate(PACKAGE)
+    index.find_class_implementations(PACKAGE, _base())
+    assert index.stats["misses"] == 8
+    index.find_class_implementations(PACKAGE, _base())
+    assert index.stats["hits"] == 4
+    index.invalidate()
+    index.find_class_implementations(PACKAGE, _base())
+    assert index.stats["misses"] == 12
+
+
+def test_unreadable_or_old_index(plugins, tmp_path):
+    path = tmp_path / "index.json"
+    path.write_text("not json")
+    index = DiscoveryIndex(path)
+    index.find_class_implementations(PACKAGE, _base())
+    assert index.stats["misses"] == 4
+    path.write_text(json.dumps({"version": 0, "packages": {}}))
+    assert DiscoveryIndex(path).find_class_implementations(PACKAGE, _base()) is not None
+
+
+def test_find_package_modules():
+    modules = UtilsReflection.find_package_modules("tests.tgedr_pycommons.utils")
+    assert modules["tests.tgedr_pycommons.utils.impls"].endswith("impls.py")
+
+
+def test_find_package_modules_not_a_package():
+    with pytest.raises(Exception, match="Package tests.tgedr_pycommons.utils.impls not found"):
+        UtilsReflection.find_package_modules("tests.tgedr_pycommons.utils.impls")
+
+
+def test_same_results_as_scanning_plugins(plugins):
+    base = _base()
+    expected = UtilsReflection.find_class_implementations(PACKAGE, base)
+    assert dict(DiscoveryIndex().find_class_implementations(PACKAGE, base)) == expected
+
+
+def test_zipped_package_is_always_scanned(write_package, tmp_path):
+    write_package(PACKAGE, MODULES, "plugins.zip")
+    path = tmp_path / "index.json"
+    DiscoveryIndex(path).find_class_implementations(PACKAGE, _base())
+    index = DiscoveryIndex(path)
+    assert sorted(index.find_class_implementations(PACKAGE, _base())) == ["alpha", "beta", "gamma"]
+    assert index.stats["misses"] == 4
+
+
+def test_changed_base_module_is_a_dependency(write_package, plugins, tmp_path):
+    path = tmp_path / "index.json"
+    DiscoveryIndex(path).find_class_implementations(PACKAGE, _base())
+    (plugins / "alpha.py").write_text("class Alpha:\n    pass\n")
+    write_package.unload()
+
+    index = DiscoveryIndex(path)
+    result = index.find_class_implementations(PACKAGE, _base())
+    # alpha and gamma, whose Gamma derives from Alpha
+    assert index.stats["misses"] == 2
+    assert sorted(result) == ["beta"]
+    assert UtilsReflection.find_class_implementations(PACKAGE, _base()).keys() == result.keys()
+
+
+def test_removed_dependency_scans_again(plugins, tmp_path):
+    path = tmp_path / "index.json"
+    index = DiscoveryIndex(path)
+    index.find_class_implementations(PACKAGE, _base())
+    content = json.loads(path.read_text())
+    gamma = content["packages"][PACKAGE][f"{PACKAGE}.gamma"]
+    assert str(plugins / "alpha.py") in gamma["dependencies"]
+    gamma["dependencies"][str(tmp_path / "gone.py")] = {"mtime_ns": 0, "size": 0, "sha256": ""}
+    path.write_text(json.dumps(content))
+
+    index = DiscoveryIndex(path)
+    index.find_class_implementations(PACKAGE, _base())
+    assert index.stats["misses"] == 1
+
+
+def test_mapping_checks_the_parent_class(plugins, tmp_path):
+    (plugins / "other.py").write_text("class Other:\n    pass\n")
+    path = tmp_path / "index.json"
+    DiscoveryIndex(path).find_class_implementations(PACKAGE, _base())
+    content = json.loads(path.read_text())
+    content["packages"][PACKAGE][f"{PACKAGE}.other"]["classes"]["Other"].insert(1, f"{PACKAGE}.base.Plugin")
+    path.write_text(json.dumps(content))
+    result = DiscoveryIndex(path).find_class_implementations(PACKAGE, _base())
+    with pytest.raises(TypeError, match="Wrong class type"):
+        result["other"]
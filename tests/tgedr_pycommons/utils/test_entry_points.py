@@ -0,0 +1,87 @@
+import sys
+
+import pytest
+
+from tgedr_pycommons.utils.discovery import LazyClassMapping
+from tgedr_pycommons.utils.reflection import UtilsReflection
+from tests.tgedr_pycommons.utils.impls import ASource, Source
+
+
+PACKAGE = "ep_plugins"
+GROUP = "tgedr_pycommons.tests.sources"
+
+MODULES = {
+    "__init__.py": "",
+    "alpha.py": (
+        "from tests.tgedr_pycommons.utils.impls import Source\n\n\nclass Alpha(Source):\n"
+        "    def get(self, context=None):\n        return 'alpha'\n\n\nclass Outer:\n    class Inner(Alpha):\n"
+        "        pass\n"
+    ),
+    "beta.py": "class Beta:\n    pass\n",
+}
+
+ENTRY_POINTS = f"""[{GROUP}]
+alpha = {PACKAGE}.alpha:Alpha
+beta = {PACKAGE}.beta:Beta
+nested = {PACKAGE}.alpha:Outer.Inner
+module = {PACKAGE}.beta
+elsewhere = tests.tgedr_pycommons.utils.impls:ASource
+
+[another.group]
+gamma = {PACKAGE}.gamma:Gamma
+"""
+
+
+@pytest.fixture
+def distribution(write_package):
+    root = write_package(PACKAGE, MODULES, "site-packages").parent
+    dist_info = root / "ep_plugins-1.0.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text("Metadata-Version: 2.1\nName: ep-plugins\nVersion: 1.0\n")
+    (dist_info / "entry_points.txt").write_text(ENTRY_POINTS)
+    return root
+
+
+def test_entry_points(distribution):
+    result = UtilsReflection.find_class_implementations_from_entry_points(GROUP, Source)
+    assert isinstance(result, LazyClassMapping)
+    assert list(result) == ["alpha", "beta", "nested", "elsewhere"]
+    assert result.reference("alpha") == f"{PACKAGE}.alpha.Alpha"
+    assert f"{PACKAGE}.alpha" not in sys.modules
+    assert result["alpha"]().get() == "alpha"
+    assert result["elsewhere"] is ASource
+    with pytest.raises(TypeError, match="Wrong class type, it is not a subclass of Source"):
+        result["beta"]
+
+
+
+def test_nested_class_entry_point(distribution):
+    result = UtilsReflection.find_class_implementations_from_entry_points(GROUP, Source)
+    assert result.reference("nested") == f"{PACKAGE}.alpha.Outer.Inner"
+    assert "ep_plugins.alpha.Outer.Inner" in repr(result)
+    assert f"{PACKAGE}.alpha" not in sys.modules
+    assert result["nested"] is sys.modules[f"{PACKAGE}.alpha"].Outer.Inner
+    assert result["nested"]().get() == "alpha"
+
+
+def test_module_entry_point_is_skipped(distribution, caplog):
+    result = UtilsReflection.find_class_implementations_from_entry_points(GROUP, Source)
+    assert "module" not in result
+    assert f"skipping module = {PACKAGE}.beta in {GROUP}, it names a module, not a class" in caplog.text
+
+def test_entry_points_of_packages(distribution):
+    result = UtilsReflection.find_class_implementations_from_entry_points(GROUP, Source, packages=PACKAGE)
+    assert list(result) == ["alpha", "beta", "nested"]
+    assert PACKAGE not in sys.modules
+
+
+def test_fallback_to_scanning(write_package, distribution):
+    write_package("ep_scanned", {"__init__.py": "", "delta.py": MODULES["alpha.py"].replace("Alpha", "Delta")}, "site-packages")
+    result = UtilsReflection.find_class_implementations_from_entry_points(GROUP, Source, packages=f"{PACKAGE}, ep_scanned")
+    assert list(result) == ["alpha", "beta", "nested", "delta"]
+    assert result.reference("delta") == "ep_scanned.delta.Delta"
+    assert result["delta"]().get() == "alpha"
+
+
+def test_unknown_group():
+    assert len(UtilsReflection.find_class_implementations_from_entry_points("no.such.group", Source)) == 0
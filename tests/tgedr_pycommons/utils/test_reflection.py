@@ -1,7 +1,16 @@
+import importlib
 import logging
 import os
+import py_compile
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
-from tgedr_pycommons.utils.reflection import UtilsReflection
+from tgedr_pycommons.utils.class_index import ClassIndex
+from tgedr_pycommons.utils.discovery import DiscoveryIndex
+from tgedr_pycommons.utils.reflection import ReflectionCache, UtilsReflection, UtilsReflectionException
+from tgedr_pycommons.utils.static_discovery import find_class_implementations_statically
+from tests.tgedr_pycommons.utils import impls
 from tests.tgedr_pycommons.utils.impls import ASource, Sink, Source
 
 
@@ -116,3 +125,151 @@ def test_load_subclass_from_module_not_callable():
     """Test loading a non-callable object raises TypeError in load_subclass_from_module"""
     with pytest.raises(TypeError, match="is not callable"):
         UtilsReflection.load_subclass_from_module(MODULE, "NOT_A_CLASS", Source)
+
+
+WALK_MODULES = {
+    "__init__.py": "",
+    "base.py": "class Plugin:\n    pass\n",
+    "alpha.py": "from walk_plugins.base import Plugin\n\n\nclass Alpha(Plugin):\n    pass\n",
+    "sub/__init__.py": "from walk_plugins.base import Plugin\n\n\nclass Sub(Plugin):\n    pass\n",
+    "sub/deep.py": "from walk_plugins.base import Plugin\n\n\nclass Deep(Plugin):\n    pass\n",
+    "not_a_package/orphan.py": "",
+}
+
+
+@pytest.fixture
+def walk_plugins(write_package):
+    root = write_package("walk_plugins", WALK_MODULES)
+    # a legacy bytecode twin, next to its source
+    py_compile.compile(str(root / "alpha.py"), cfile=str(root / "alpha.pyc"))
+    return root
+
+
+def test_find_package_modules_walks_subpackages(walk_plugins):
+    modules = UtilsReflection.find_package_modules("walk_plugins")
+    assert list(modules) == ["walk_plugins.alpha", "walk_plugins.base", "walk_plugins.sub", "walk_plugins.sub.deep"]
+    assert modules["walk_plugins.alpha"] == str(walk_plugins / "alpha.py")
+    assert modules["walk_plugins.sub"] == str(walk_plugins / "sub" / "__init__.py")
+    assert "walk_plugins" not in sys.modules
+
+
+def test_find_class_implementations_in_subpackages(walk_plugins):
+    base = importlib.import_module("walk_plugins.base").Plugin
+    result = UtilsReflection.find_class_implementations("walk_plugins", base)
+    assert {name: cls.__name__ for name, cls in result.items()} == {"alpha": "Alpha", "sub": "Sub", "deep": "Deep"}
+
+
+
+def _walk_base():
+    return importlib.import_module("walk_plugins.base").Plugin
+
+
+@pytest.mark.parametrize(
+    "find",
+    [
+        lambda path: UtilsReflection.find_class_implementations("walk_plugins", _walk_base()),
+        lambda path: UtilsReflection.find_class_implementations("walk_plugins", _walk_base(), index=DiscoveryIndex(path)),
+        lambda path: ClassIndex("walk_plugins").find_class_implementations(_walk_base()),
+        lambda path: find_class_implementations_statically("walk_plugins", "walk_plugins.base.Plugin"),
+    ],
+    ids=["scan", "index", "class_index", "static"],
+)
+def test_find_class_implementations_same_name_in_subpackages(write_package, walk_plugins, tmp_path, find):
+    write_package("walk_plugins", {"sub/alpha.py": WALK_MODULES["alpha.py"]})
+    with pytest.raises(UtilsReflectionException, match="walk_plugins.alpha and walk_plugins.sub.alpha have the same name alpha"):
+        find(tmp_path / "index.json")
+
+
+def test_find_package_modules_namespace_package(write_package, tmp_path):
+    for entry, module in (("one", "a"), ("two", "b"), ("three", "a")):
+        write_package("walk_namespace", {f"{module}.py": f"WHERE = {entry!r}\n"}, entry)
+    modules = UtilsReflection.find_package_modules("walk_namespace")
+    # the first path entry holding a module wins, as when importing it
+    assert modules == {
+        "walk_namespace.a": str(tmp_path / "three" / "walk_namespace" / "a.py"),
+        "walk_namespace.b": str(tmp_path / "two" / "walk_namespace" / "b.py"),
+    }
+
+
+def test_find_package_modules_zip(write_package):
+    archive = write_package("walk_plugins", WALK_MODULES, "plugins.zip")
+    modules = UtilsReflection.find_package_modules("walk_plugins")
+    assert list(modules) == ["walk_plugins.alpha", "walk_plugins.base", "walk_plugins.sub", "walk_plugins.sub.deep"]
+    assert modules["walk_plugins.sub.deep"] == os.path.join(str(archive), "walk_plugins", "sub", "deep.py")
+    base = importlib.import_module("walk_plugins.base").Plugin
+    assert sorted(UtilsReflection.find_class_implementations("walk_plugins", base)) == ["alpha", "deep", "sub"]
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_import_modules(walk_plugins, workers):
+    importlib.import_module("walk_plugins.base")
+    modules = list(UtilsReflection.find_package_modules("walk_plugins"))
+    times = UtilsReflection.import_modules(modules, workers)
+    assert list(times) == modules
+    assert times["walk_plugins.base"] == 0.0
+    assert all(seconds > 0 for module, seconds in times.items() if module != "walk_plugins.base")
+    assert all(module in sys.modules for module in modules)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ReflectionCache(maxsize=2)
+    monkeypatch.setattr(UtilsReflection, "cache", cache)
+    return cache
+
+
+def test_cache_hits(cache):
+    assert UtilsReflection.load_class(MODULE + ".ASource", Source) is ASource
+    assert UtilsReflection.load_subclass_from_module(MODULE, "ASource", Source) is ASource
+    assert UtilsReflection.get_type(MODULE, "ASource") is ASource
+    assert UtilsReflection.is_subclass_of(ASource, Source)
+    assert cache.stats == {"hits": 4, "misses": 2, "hit_rate": 4 / 6}
+    assert len(cache) == 2
+
+
+def test_cache_lru_bound_and_clear(cache):
+    for name in ("ASource", "ASink", "NotASource", "ASource"):
+        UtilsReflection.get_type(MODULE, name)
+    assert cache.misses == 4
+    assert len(cache) == 2
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats == {"hits": 0, "misses": 0, "hit_rate": 0.0}
+
+
+def test_cache_invalidated_on_reload(cache, walk_plugins):
+    old = UtilsReflection.load_class("walk_plugins.alpha.Alpha")
+    importlib.reload(sys.modules["walk_plugins.alpha"])
+    new = UtilsReflection.load_class("walk_plugins.alpha.Alpha")
+    assert new is not old
+    del sys.modules["walk_plugins.alpha"]
+    assert UtilsReflection.load_class("walk_plugins.alpha.Alpha") is not new
+    assert cache.misses == 3
+
+
+def test_cache_unhashable_and_not_callable(cache):
+    assert not UtilsReflection.is_subclass_of([], Source)
+    assert not UtilsReflection.is_subclass_of("not callable", Source)
+    assert not UtilsReflection.is_subclass_of("not callable", Source)
+    assert cache.stats == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+
+def test_cache_shared_across_threads(cache):
+    names = ["ASource", "ASink", "NotASource"] * 500
+    # switch threads often, for evictions to interleave with lookups
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(8) as executor:
+            resolved = list(executor.map(lambda name: UtilsReflection.get_type(MODULE, name), names))
+    finally:
+        sys.setswitchinterval(interval)
+    assert resolved == [getattr(impls, name) for name in names]
+    assert cache.hits + cache.misses == len(names)
+    assert len(cache) == 2
+
+def test_cache_maxsize():
+    assert len(ReflectionCache(maxsize=None)) == 0
+    with pytest.raises(ValueError, match="maxsize must be a positive integer or None, got 0"):
+        ReflectionCache(maxsize=0)
@@ -0,0 +1,84 @@
+import importlib
+import sys
+
+import pytest
+
+from tgedr_pycommons.utils.reflection import UtilsReflection
+from tgedr_pycommons.utils.static_discovery import find_class_implementations_statically
+from tests.tgedr_pycommons.utils.impls import Source
+
+
+PACKAGE = "static_plugins"
+BASE = f"{PACKAGE}.base.Plugin"
+
+MODULES = {
+    "__init__.py": "from static_plugins.base import Plugin\n",
+    "base.py": "class Plugin:\n    pass\n",
+    "alpha.py": "from .base import Plugin\n\n\nclass Alpha(Plugin):\n    pass\n",
+    "beta.py": "import static_plugins.base as b\n\n\nclass Beta(b.Plugin):\n    pass\n\n\nclass Error(Exception):\n    pass\n",
+    "gamma.py": "from static_plugins.alpha import Alpha\n\n\nclass Gamma(Alpha):\n    pass\n",
+    "delta.py": "from static_plugins import Plugin\n\n\nclass Delta(Plugin):\n    pass\n",
+    "epsilon.py": "import static_plugins\n\n\nclass Epsilon(static_plugins.base.Plugin):\n    pass\n",
+    "heavy.py": "import not_an_installed_library\nfrom .base import Plugin\n\n\nclass Heavy(Plugin):\n    pass\n",
+    "generic.py": (
+        "from typing import Generic, TypeVar\nfrom .base import Plugin\n\nT = TypeVar('T')\n\n\n"
+        "class Gen(Plugin, Generic[T]):\n    pass\n\n\nclass Sub(Gen[int]):\n    pass\n"
+    ),
+    "dynamic.py": "from .base import Plugin\n\n\ndef make():\n    return Plugin\n\n\nclass Dyn(make()):\n    pass\n",
+    "star.py": "from .base import *\n\n\nclass Star(Plugin):\n    pass\n",
+    "cycle.py": "from .cycle import Loop as Loop\n\n\nclass Other(Loop):\n    pass\n",
+    "broken.py": "class (:\n",
+    "unrelated.py": "import os\nfrom .base import Plugin\n\n\nclass Thing(os.PathLike):\n    pass\n",
+}
+
+
+@pytest.fixture
+def plugins(write_package):
+    return write_package(PACKAGE, MODULES)
+
+
+def test_static_discovery(plugins):
+    result = find_class_implementations_statically(PACKAGE, BASE)
+    assert sorted(result) == ["alpha", "beta", "delta", "epsilon", "gamma", "generic", "heavy"]
+    assert not [name for name in sys.modules if name.split(".")[0] == PACKAGE]
+    assert result.reference("gamma") == f"{PACKAGE}.gamma.Gamma"
+    assert result.reference("generic") == f"{PACKAGE}.generic.Sub"
+    assert result["alpha"].__name__ == "Alpha"
+    assert f"{PACKAGE}.beta" not in sys.modules
+    with pytest.raises(ModuleNotFoundError):
+        result["heavy"]
+
+
+def test_static_discovery_with_class(plugins):
+    base = importlib.import_module(f"{PACKAGE}.base").Plugin
+    result = UtilsReflection.find_class_implementations_statically(PACKAGE, base)
+    assert issubclass(result["delta"], base)
+    assert "dynamic" not in result
+
+
+
+def test_static_discovery_checks_the_class_on_import(write_package, plugins):
+    write_package(PACKAGE, {"rebound.py": MODULES["alpha.py"].replace("Alpha", "Rebound") + "\n\nRebound = object\n"})
+    base = importlib.import_module(f"{PACKAGE}.base").Plugin
+    result = find_class_implementations_statically(PACKAGE, base)
+    assert result.reference("rebound") == f"{PACKAGE}.rebound.Rebound"
+    with pytest.raises(TypeError, match="Wrong class type, it is not a subclass of Plugin"):
+        result["rebound"]
+
+def test_static_discovery_import_dynamic(plugins):
+    result = UtilsReflection.find_class_implementations_statically(PACKAGE, BASE, import_dynamic=True)
+    assert {"dynamic", "star"} <= set(result)
+    assert result.reference("star") == f"{PACKAGE}.star.Star"
+    assert "cycle" not in result
+
+
+def test_same_results_as_importing():
+    expected = UtilsReflection.find_class_implementations("tests.tgedr_pycommons.utils", Source)
+    result = UtilsReflection.find_class_implementations_statically("tests.tgedr_pycommons.utils", Source)
+    assert dict(result) == expected
+
+
+def test_static_discovery_skips_zipped_sources(write_package, caplog):
+    write_package(PACKAGE, {"__init__.py": "", "alpha.py": MODULES["alpha.py"]}, "plugins.zip")
+    assert dict(find_class_implementations_statically(PACKAGE, BASE)) == {}
+    assert "alpha.py, it can not be parsed" in caplog.text